@@ -0,0 +1,46 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+
+from recommendation_engine.app.auth.models import AccessToken
+from recommendation_engine.app.auth.secure import LoggedIn
+from recommendation_engine.app.cooccurrence.models import RelatedProductModel
+from recommendation_engine.app.cooccurrence.repository import CooccurrenceRepositoryException
+from recommendation_engine.app.providers import CooccurrenceRepositorySingleton
+from recommendation_engine.settings import Settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class RelatedProductsResponse(BaseModel):
+    product_id: int
+    related: list[RelatedProductModel]
+
+
+class ProductController:
+    def __init__(self) -> None:
+        self.router: APIRouter = APIRouter()
+        self.settings: Settings = Settings.get()
+        self._register_routes()
+
+    def _register_routes(self) -> None:
+        self.router.add_api_route(path="/{product_id}/related", endpoint=self.related, methods=["GET"])
+
+    @staticmethod
+    async def related(
+        product_id: int,
+        repository: CooccurrenceRepositorySingleton,
+        _: AccessToken = Depends(LoggedIn),
+        k: int = Query(10, ge=1, le=100, description="Maximum number of related products returned"),
+    ) -> RelatedProductsResponse:
+        try:
+            related = await repository.related(product_id, limit=k)
+        except CooccurrenceRepositoryException as _:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Unexpected error, please try again later...",
+            )
+
+        return RelatedProductsResponse(product_id=product_id, related=related)
@@ -1,24 +1,61 @@
+import asyncio
 import logging
+import typing as t
 from datetime import datetime
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, Field, conlist
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter, conlist, model_validator
 
 from recommendation_engine.app.auth.models import AccessToken
 from recommendation_engine.app.auth.secure import LoggedIn
-from recommendation_engine.app.providers import RecommendationRepositorySingleton
+from recommendation_engine.app.core.bloom import BloomFilterStats
+from recommendation_engine.app.core.cache import CacheStats
+from recommendation_engine.app.core.msgpack import MSGPACK_MEDIA_TYPE, packb
+from recommendation_engine.app.core.single_flight import SingleFlightStats
+from recommendation_engine.app.providers import (
+    RecommendationRepositorySingleton,
+    RecommendationServiceSingleton,
+    ResponseBodyCacheSingleton,
+)
 from recommendation_engine.app.recommendation.algorithm import (
-    generate_product_ids_fingerprint,
-    generate_recommendation_subsequences,
+    count_recommendation_subsequences,
+    format_product_ids_fingerprint,
+    iter_recommendation_subsequences,
+    order_product_ids,
+)
+from recommendation_engine.app.recommendation.executor import SubsequencesExecutorBusy
+from recommendation_engine.app.recommendation.models import (
+    RecommendationModel,
+    RecommendationSummaryModel,
+    TFingerprintField,
+)
+from recommendation_engine.app.recommendation.packed import (
+    PACKED_MEDIA_TYPE,
+    PackedLayout,
+    pack_recommendation,
+    pack_recommendations,
 )
-from recommendation_engine.app.recommendation.models import RecommendationModel
+from recommendation_engine.app.recommendation.pagination import PageCursor
 from recommendation_engine.app.recommendation.repository import (
     RecommendationDuplicate,
     RecommendationRepositoryException,
+    RecommendationUpdateConflict,
 )
+from recommendation_engine.app.recommendation.serializer import (
+    NDJSON_MEDIA_TYPE,
+    iter_recommendation_json,
+    iter_recommendation_ndjson,
+    iter_recommendations_ndjson,
+)
+from recommendation_engine.app.recommendation.service import RecommendationSequenceEmpty
+from recommendation_engine.app.recommendation.subsequences import DerivedSubsequences
 from recommendation_engine.app.recommendation.types import (
-    TProductIdsFingerPrint,
+    BatchItemStatus,
+    CompactSubSequences,
+    ListView,
+    SearchMatch,
     TProductIdsOrderedAndUnique,
     TRecommendationSubSequences,
 )
@@ -35,13 +72,87 @@ class CreateRequest(BaseModel):
     )
 
 
+class BatchCreateRequest(BaseModel):
+    baskets: conlist(conlist(int, min_length=1), min_length=1) = Field(  # type: ignore[valid-type]
+        ...,
+        description="Sequences of product IDs, one per recommendation",
+    )
+
+
+class UpdateRequest(BaseModel):
+    add: list[int] = Field(default_factory=list, description="Product IDs to add to the sequence")
+    remove: list[int] = Field(default_factory=list, description="Product IDs to remove from the sequence")
+
+    @model_validator(mode="after")
+    def check_not_empty(self) -> t.Self:
+        if not self.add and not self.remove:
+            raise ValueError("At least one product ID to add or remove is required")
+        return self
+
+
 class ListResponse(BaseModel):
-    sequence: TProductIdsOrderedAndUnique
+    """A listed recommendation, with only the fields selected by `view` / `fields`."""
+
+    id: str | None = None
+    fingerprint: TFingerprintField | None = None
+    sequence: TProductIdsOrderedAndUnique | None = None
+    subsequences: TRecommendationSubSequences | None = None
+    subsequences_count: int | None = Field(default=None, description="Number of subsequences (2^n-1)")
+    createdAt: datetime | None = None
+
+
+# Cursor of the next page of the list, the body stays a plain list of recommendations
+NEXT_CURSOR_HEADER: t.Final[str] = "X-Next-Cursor"
+LIST_FIELDS: t.Final[tuple[str, ...]] = tuple(ListResponse.model_fields)
+LIST_RESPONSE_ADAPTER: t.Final[TypeAdapter[list[ListResponse]]] = TypeAdapter(list[ListResponse])
+JSON_MEDIA_TYPE: t.Final[str] = "application/json"
+ACCEPTED_MEDIA_TYPES: t.Final[tuple[str, ...]] = (
+    JSON_MEDIA_TYPE,
+    PACKED_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+)
+SEARCH_RESPONSE_ADAPTER: t.Final[TypeAdapter[list[RecommendationSummaryModel]]] = TypeAdapter(
+    list[RecommendationSummaryModel]
+)
+LIST_VIEW_FIELDS: t.Final[dict[ListView, tuple[str, ...]]] = {
+    ListView.FULL: ("sequence", "subsequences"),
+    ListView.SUMMARY: ("fingerprint", "sequence", "subsequences_count", "createdAt"),
+}
+
+
+class SubsequencesPageResponse(BaseModel):
+    total: int = Field(..., description="Number of subsequences (2^n-1, or C(n,length) when length is given)")
+    offset: int
+    limit: int
+    length: int | None
     subsequences: TRecommendationSubSequences
 
 
+class StatsResponse(BaseModel):
+    subsequences_cache: CacheStats
+    response_body_cache: CacheStats
+    fingerprint_filter: BloomFilterStats | None = None
+    create_flights: SingleFlightStats
+
+
+class BatchCreateItemResponse(BaseModel):
+    status: BatchItemStatus
+    id: str | None = None
+    fingerprint: TFingerprintField
+    sequence: TProductIdsOrderedAndUnique
+    detail: str | None = None
+
+
+class BatchCreateResponse(BaseModel):
+    created: int
+    duplicates: int
+    errors: int
+    items: list[BatchCreateItemResponse] = Field(..., description="The outcome of each basket, in the same order")
+
+
 class RecommendationResponse(BaseModel):
-    fingerprint: TProductIdsFingerPrint
+    fingerprint: TFingerprintField
     sequence: list[int]
     subsequences: list[list[int]]
     createdAt: datetime
@@ -54,21 +165,167 @@ class RecommendationController:
         self._register_routes()
 
     def _register_routes(self) -> None:
-        self.router.add_api_route(path="/{recommendation_id}", endpoint=self.show, methods=["GET"])
-        self.router.add_api_route(path="/", endpoint=self.create, methods=["POST"], status_code=status.HTTP_201_CREATED)
-        self.router.add_api_route(path="/", endpoint=self.list, methods=["GET"])
+        self.router.add_api_route(path="/stats", endpoint=self.stats, methods=["GET"])
+        self.router.add_api_route(
+            path="/search",
+            endpoint=self.search,
+            methods=["GET"],
+            response_model=list[RecommendationSummaryModel],
+        )
+        self.router.add_api_route(path="/export", endpoint=self.export, methods=["GET"])
+        self.router.add_api_route(
+            path="/{recommendation_id}",
+            endpoint=self.show,
+            methods=["GET"],
+            response_model=RecommendationModel,
+        )
+        self.router.add_api_route(
+            path="/{recommendation_id}",
+            endpoint=self.update,
+            methods=["PATCH"],
+            response_model=RecommendationModel,
+        )
+        self.router.add_api_route(
+            path="/{recommendation_id}/subsequences",
+            endpoint=self.subsequences,
+            methods=["GET"],
+        )
+        self.router.add_api_route(
+            path="/",
+            endpoint=self.create,
+            methods=["POST"],
+            status_code=status.HTTP_201_CREATED,
+            response_model=RecommendationModel,
+        )
+        self.router.add_api_route(
+            path="/batch",
+            endpoint=self.create_batch,
+            methods=["POST"],
+            response_model=BatchCreateResponse,
+        )
+        self.router.add_api_route(
+            path="/",
+            endpoint=self.list,
+            methods=["GET"],
+            response_model=list[ListResponse],
+            response_model_exclude_unset=True,
+        )
 
     @staticmethod
     async def show(
+        recommendation_id: str,
+        repository: RecommendationRepositorySingleton,
+        response_body_cache: ResponseBodyCacheSingleton,
+        _: AccessToken = Depends(LoggedIn),
+        accept: str | None = Header(default=None),
+    ) -> Response:
+        if not ObjectId.is_valid(recommendation_id):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ID format")
+
+        media_type = _accepted_media_type(accept)
+        document: RecommendationModel | RecommendationSummaryModel | None
+        try:
+            if media_type == NDJSON_MEDIA_TYPE:
+                document = await repository.get_summary(recommendation_id)
+            else:
+                document = await repository.get(recommendation_id)
+        except RecommendationRepositoryException as _:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Unexpected error, please try again later...",
+            )
+
+        if not document:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Recommendation subsequence of {recommendation_id} not found",
+            )
+
+        if isinstance(document, RecommendationSummaryModel):
+            # Subsequences are fully determined by the sequence, no need to load them from the database
+            subsequences = iter_recommendation_subsequences(document.sequence)
+            return _ndjson_response(document, subsequences)
+        if media_type is not None or not response_body_cache.enabled:
+            return await _encode_document_response(document, document.subsequences, media_type, accept)
+
+        # Bodies are cached by ID and fingerprint, so that an update made through any worker changes the key
+        cache_key = (str(document.id), document.fingerprint)
+        if (body := response_body_cache.get(cache_key)) is not None:
+            return _json_response(body)
+        if len(document.sequence) <= Settings.get().app_executor_inline_max_products:
+            body = document.model_dump_json(by_alias=True).encode()
+        else:
+            body = (await asyncio.to_thread(document.model_dump_json, by_alias=True)).encode()
+        response_body_cache.put(cache_key, body)
+        return _json_response(body)
+
+    @staticmethod
+    async def search(
+        repository: RecommendationRepositorySingleton,
+        _: AccessToken = Depends(LoggedIn),
+        contains: str = Query(..., description="Comma separated product IDs, e.g. 1,2,3"),
+        match: SearchMatch = Query(SearchMatch.ALL, description="Whether sequences contain all or any of the IDs"),
+        limit: int = Query(20, ge=1, le=100, description="Maximum number of recommendations returned"),
+        after: str | None = Query(None, description=f"`{NEXT_CURSOR_HEADER}` header of the previous page"),
+    ) -> Response:
+        try:
+            product_ids = order_product_ids(int(product_id) for product_id in contains.split(","))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="contains must be a comma separated list of product IDs",
+            )
+        try:
+            cursor = PageCursor.decode(after) if after is not None else None
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor format")
+
+        try:
+            documents = await repository.search(product_ids, match, limit=limit, after=cursor)
+        except RecommendationRepositoryException as _:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Unexpected error, please try again later...",
+            )
+
+        return _json_response(
+            SEARCH_RESPONSE_ADAPTER.dump_json(documents, by_alias=True),
+            headers=_next_cursor_headers(documents, limit),
+        )
+
+    @staticmethod
+    async def export(
+        repository: RecommendationRepositorySingleton,
+        _: AccessToken = Depends(LoggedIn),
+        since: datetime | None = Query(None, description="Only recommendations created at or after this date"),
+        view: ListView = Query(ListView.FULL, description="`summary` exports everything but the subsequences"),
+        batch_size: int = Query(1000, ge=1, le=10_000, description="Documents fetched and written at a time"),
+    ) -> StreamingResponse:
+        """Streams every recommendation as NDJSON, one document per line, oldest first."""
+        documents = repository.export(
+            since=since,
+            with_subsequences=view == ListView.FULL,
+            batch_size=batch_size,
+        )
+        return StreamingResponse(
+            iter_recommendations_ndjson(documents, batch_size, Settings.get().app_stream_chunk_max_bytes),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    @staticmethod
+    async def subsequences(
         recommendation_id: str,
         repository: RecommendationRepositorySingleton,
         _: AccessToken = Depends(LoggedIn),
-    ) -> RecommendationModel:
+        offset: int = Query(0, ge=0, description="Position of the first subsequence returned"),
+        limit: int = Query(100, ge=1, le=1000, description="Maximum number of subsequences returned"),
+        length: int | None = Query(None, ge=1, description="Only subsequences of this length, offset is within them"),
+    ) -> SubsequencesPageResponse:
         if not ObjectId.is_valid(recommendation_id):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ID format")
 
         try:
-            document = await repository.get(recommendation_id)
+            document = await repository.get_summary(recommendation_id)
         except RecommendationRepositoryException as _:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -80,23 +337,120 @@ class RecommendationController:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Recommendation subsequence of {recommendation_id} not found",
             )
-        return document
+
+        # The page is computed straight from the sequence, the stored subsequences are never loaded
+        subsequences = DerivedSubsequences(document.sequence, sequence_length=length)
+        return SubsequencesPageResponse(
+            total=len(subsequences),
+            offset=offset,
+            limit=limit,
+            length=length,
+            subsequences=subsequences[offset : offset + limit],
+        )
 
     @staticmethod
     async def create(
         payload: CreateRequest,
-        repository: RecommendationRepositorySingleton,
+        service: RecommendationServiceSingleton,
+        _: AccessToken = Depends(LoggedIn),
+        accept: str | None = Header(default=None),
+    ) -> Response:
+        try:
+            document, generated = await service.create(payload.product_ids)
+        except SubsequencesExecutorBusy as _:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many recommendations being generated, please try again later...",
+            )
+        except RecommendationDuplicate as error:
+            if error.document is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=_duplicate_detail(error),
+                )
+
+            logger.info(f"Recommendation document already exists: {error.document.id}")
+            media_type = _accepted_media_type(accept)
+            return await _encode_document_response(error.document, error.document.subsequences, media_type, accept)
+        except RecommendationRepositoryException as _:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Unexpected error, please try again later...",
+            )
+
+        logger.info(f"Created recommendation document {document.id}, sequence: {generated.sequence}")
+        media_type = _accepted_media_type(accept)
+        # Encoded straight from the generated subsequences, the model was built from them without validation
+        return await _encode_document_response(
+            document, generated.subsequences, media_type, accept, status_code=status.HTTP_201_CREATED
+        )
+
+    @staticmethod
+    async def create_batch(
+        payload: BatchCreateRequest,
+        service: RecommendationServiceSingleton,
+        _: AccessToken = Depends(LoggedIn),
+    ) -> BatchCreateResponse:
+        max_size = Settings.get().app_batch_max_size
+        if len(payload.baskets) > max_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"A batch can contain at most {max_size} baskets",
+            )
+
+        try:
+            results = await service.create_many(payload.baskets)
+        except RecommendationRepositoryException as _:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Unexpected error, please try again later...",
+            )
+
+        items = [
+            BatchCreateItemResponse(
+                status=result.status,
+                id=result.document.id if result.document else None,
+                fingerprint=result.fingerprint,
+                sequence=result.sequence,
+                detail=result.detail,
+            )
+            for result in results
+        ]
+        response = BatchCreateResponse(
+            created=sum(item.status == BatchItemStatus.CREATED for item in items),
+            duplicates=sum(item.status == BatchItemStatus.DUPLICATE for item in items),
+            errors=sum(item.status == BatchItemStatus.ERROR for item in items),
+            items=items,
+        )
+        logger.info(
+            f"Created batch of {len(items)} recommendations: {response.created} created, "
+            f"{response.duplicates} duplicates, {response.errors} errors"
+        )
+        return response
+
+    @staticmethod
+    async def update(
+        recommendation_id: str,
+        payload: UpdateRequest,
+        service: RecommendationServiceSingleton,
         _: AccessToken = Depends(LoggedIn),
-    ) -> RecommendationModel:
-        unique_ordered_product_ids, recommendations = generate_recommendation_subsequences(payload.product_ids)
-        fingerprint = generate_product_ids_fingerprint(unique_ordered_product_ids)
+    ) -> Response:
+        if not ObjectId.is_valid(recommendation_id):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ID format")
 
         try:
-            document = await repository.create(fingerprint, unique_ordered_product_ids, recommendations)
-        except RecommendationDuplicate as _:
+            document = await service.update(recommendation_id, payload.add, payload.remove)
+        except RecommendationSequenceEmpty as error:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(error))
+        except RecommendationDuplicate as error:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail=f"Product_ids {unique_ordered_product_ids} (fingerprint={fingerprint}) Already exists",
+                detail=_duplicate_detail(error),
+            )
+        except RecommendationUpdateConflict as _:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Recommendation {recommendation_id} was modified concurrently, please try again",
             )
         except RecommendationRepositoryException as _:
             raise HTTPException(
@@ -104,23 +458,222 @@ class RecommendationController:
                 detail="Unexpected error, please try again later...",
             )
 
-        logger.info(f"Created recommendation document: {document}, sequence: {unique_ordered_product_ids}")
-        return document
+        if not document:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Recommendation subsequence of {recommendation_id} not found",
+            )
+
+        logger.info(f"Updated recommendation document: {document.id}, added {payload.add}, removed {payload.remove}")
+        # Already encoded, or streamed for a large basket, rather than validated again against `response_model`
+        return await _encode_document_response(document, document.subsequences, media_type=None, accept=None)
+
+    @staticmethod
+    async def stats(
+        service: RecommendationServiceSingleton,
+        response_body_cache: ResponseBodyCacheSingleton,
+        _: AccessToken = Depends(LoggedIn),
+    ) -> StatsResponse:
+        fingerprint_filter = service.repository.fingerprint_filter
+        return StatsResponse(
+            subsequences_cache=service.subsequences_cache.stats(),
+            response_body_cache=response_body_cache.stats(),
+            fingerprint_filter=fingerprint_filter.stats() if fingerprint_filter is not None else None,
+            create_flights=service.create_flights.stats(),
+        )
 
     @staticmethod
     async def list(
         repository: RecommendationRepositorySingleton,
         _: AccessToken = Depends(LoggedIn),
-    ) -> list[ListResponse]:
+        limit: int = Query(10, ge=1, le=100, description="Maximum number of recommendations returned"),
+        after: str | None = Query(None, description=f"`{NEXT_CURSOR_HEADER}` header of the previous page"),
+        view: ListView = Query(ListView.FULL, description="`summary` lists everything but the subsequences"),
+        fields: str | None = Query(
+            None,
+            description=f"Comma separated fields to list, overrides `view`, any of {', '.join(LIST_FIELDS)}",
+        ),
+        accept: str | None = Header(default=None),
+    ) -> Response:
+        selected = LIST_VIEW_FIELDS[view]
+        if fields is not None:
+            selected = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+            unknown = set(selected) - set(LIST_FIELDS)
+            if not selected or unknown:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"fields must be a comma separated list of {', '.join(LIST_FIELDS)}",
+                )
+        try:
+            cursor = PageCursor.decode(after) if after is not None else None
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor format")
+
+        documents: t.Sequence[RecommendationModel | RecommendationSummaryModel]
         try:
-            documents = await repository.paginate(limit=10)
+            # The subsequences are only read when listed, the other fields are projected out of the documents
+            if "subsequences" in selected:
+                documents = await repository.paginate(limit=limit, after=cursor)
+            else:
+                documents = await repository.paginate_summaries(limit=limit, after=cursor)
         except RecommendationRepositoryException as _:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Unexpected error, please try again later...",
             )
 
-        response = [
-            ListResponse(sequence=document.sequence, subsequences=document.subsequences) for document in documents
+        headers = _next_cursor_headers(documents, limit)
+        media_type = _accepted_media_type(accept)
+        if media_type == PACKED_MEDIA_TYPE:
+            # Records always hold the ID, fingerprint, sequence and creation date, `fields` only selects subsequences
+            layout = _packed_layout(accept) if "subsequences" in selected else PackedLayout.NONE
+            return Response(pack_recommendations(documents, layout), media_type=media_type, headers=headers)
+
+        # Fields are taken from the documents as read, they are not validated again
+        items = [
+            ListResponse.model_construct(
+                **{
+                    field: count_recommendation_subsequences(len(document.sequence))
+                    if field == "subsequences_count"
+                    else getattr(document, field)
+                    for field in selected
+                }
+            )
+            for document in documents
         ]
-        return response
+        if media_type == MSGPACK_MEDIA_TYPE:
+            content = packb(LIST_RESPONSE_ADAPTER.dump_python(items, mode="json", exclude_unset=True))
+            return Response(content, media_type=media_type, headers=headers)
+        return _json_response(LIST_RESPONSE_ADAPTER.dump_json(items, exclude_unset=True), headers=headers)
+
+
+def _next_cursor_headers(
+    documents: t.Sequence[RecommendationModel | RecommendationSummaryModel],
+    limit: int,
+) -> dict[str, str]:
+    """The cursor of the next page when the page is full, as the `after` of the next request."""
+    if len(documents) < limit:
+        return {}
+    last = documents[-1]
+    return {NEXT_CURSOR_HEADER: PageCursor(created_at=last.createdAt, id=ObjectId(last.id)).encode()}
+
+
+def _duplicate_detail(error: RecommendationDuplicate) -> str:
+    fingerprint = format_product_ids_fingerprint(error.fingerprint) if error.fingerprint is not None else None
+    return f"Product_ids {error.product_ids} (fingerprint={fingerprint}) Already exists"
+
+
+def _json_response(
+    content: str | bytes,
+    headers: dict[str, str] | None = None,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    """A response of already encoded JSON, which FastAPI does not validate nor encode again."""
+    return Response(content=content, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def _parse_accept(accept: str) -> list[tuple[str, float, dict[str, str]]]:
+    """The media ranges of an `Accept` header, in order, with their quality and their other parameters.
+
+    Example:
+        >>> _parse_accept("application/json, application/msgpack;q=0")
+        [('application/json', 1.0, {}), ('application/msgpack', 0.0, {})]
+    """
+    media_ranges: list[tuple[str, float, dict[str, str]]] = []
+    for item in accept.lower().split(","):
+        media_range, *parameters = (part.strip() for part in item.split(";"))
+        if not media_range:
+            continue
+        options = {
+            name.strip(): value.strip().strip('"')
+            for name, _, value in (parameter.partition("=") for parameter in parameters)
+        }
+        try:
+            quality = float(options.pop("q", 1))
+        except ValueError:
+            quality = 1.0
+        media_ranges.append((media_range, quality, options))
+    return media_ranges
+
+
+def _accepted_media_type(accept: str | None) -> str | None:
+    """The preferred of the media types accepted, None for JSON.
+
+    Media types rank by the quality of their range, the first listed winning
+    ties, and those with `q=0` are refused. JSON is also accepted through
+    `application/*` and `*/*`, the binary and streamed types only by name.
+    Without an acceptable one, JSON is answered.
+    """
+    if accept is None:
+        return None
+
+    preferred: str | None = None
+    preferred_quality = 0.0
+    for media_range, quality, _ in _parse_accept(accept):
+        media_type = JSON_MEDIA_TYPE if media_range in ("application/*", "*/*") else media_range
+        if media_type in ACCEPTED_MEDIA_TYPES and quality > preferred_quality:
+            preferred, preferred_quality = media_type, quality
+    return None if preferred == JSON_MEDIA_TYPE else preferred
+
+
+def _packed_layout(accept: str | None) -> PackedLayout:
+    """Subsequences as bitmasks by default, as offsets and positions with `;layout=offsets`."""
+    for media_range, _, options in _parse_accept(accept or ""):
+        if media_range == PACKED_MEDIA_TYPE and options.get("layout") == "offsets":
+            return PackedLayout.OFFSETS
+    return PackedLayout.BITMASK
+
+
+def _document_response(
+    document: RecommendationModel,
+    media_type: str | None,
+    accept: str | None,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    """The document encoded as MessagePack, packed binary or by default JSON."""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return Response(packb(document.model_dump(mode="json", by_alias=True)), status_code, media_type=media_type)
+    if media_type == PACKED_MEDIA_TYPE:
+        return Response(pack_recommendation(document, _packed_layout(accept)), status_code, media_type=media_type)
+    return _json_response(document.model_dump_json(by_alias=True), status_code=status_code)
+
+
+async def _encode_document_response(
+    document: RecommendationModel,
+    subsequences: TRecommendationSubSequences | CompactSubSequences,
+    media_type: str | None,
+    accept: str | None,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    """The document in the accepted media type, without encoding a large basket at once on the event loop.
+
+    Baskets of more products than are generated inline have their JSON
+    streamed chunk by chunk out of `subsequences`, e.g. the compact
+    generator output, and their other media types encoded on a thread.
+    """
+    if media_type == NDJSON_MEDIA_TYPE:
+        return _ndjson_response(document, subsequences, status_code=status_code)
+
+    settings = Settings.get()
+    if len(document.sequence) <= settings.app_executor_inline_max_products:
+        return _document_response(document, media_type, accept, status_code)
+    if media_type is None:
+        return StreamingResponse(
+            iter_recommendation_json(document, subsequences, settings.app_stream_chunk_size),
+            status_code=status_code,
+            media_type="application/json",
+        )
+    return await asyncio.to_thread(_document_response, document, media_type, accept, status_code)
+
+
+def _ndjson_response(
+    document: RecommendationModel | RecommendationSummaryModel,
+    subsequences: t.Iterable[list[int]] | CompactSubSequences,
+    status_code: int = status.HTTP_200_OK,
+) -> StreamingResponse:
+    chunk_size = Settings.get().app_stream_chunk_size
+    return StreamingResponse(
+        iter_recommendation_ndjson(document, subsequences, chunk_size),
+        status_code=status_code,
+        media_type=NDJSON_MEDIA_TYPE,
+    )
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 
 from recommendation_engine.app.api.controllers.auth import AuthController
 from recommendation_engine.app.api.controllers.index import IndexController
+from recommendation_engine.app.api.controllers.product import ProductController
 from recommendation_engine.app.api.controllers.recommendation import RecommendationController
 
 
@@ -22,5 +23,8 @@ def get_router() -> APIRouter:
     recommendation_controller = RecommendationController()
     api_v1.include_router(recommendation_controller.router, prefix="/recommendations", tags=["Recommendations"])
 
+    product_controller = ProductController()
+    api_v1.include_router(product_controller.router, prefix="/products", tags=["Products"])
+
     router.include_router(api_v1)
     return router
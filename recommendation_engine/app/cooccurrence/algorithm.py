@@ -0,0 +1,41 @@
+import typing as t
+from collections import Counter
+from itertools import permutations
+
+from recommendation_engine.app.recommendation.types import TProductIdsOrderedAndUnique
+
+
+type TCooccurrencePair = tuple[int, int]
+
+
+def count_cooccurrence_pairs(sequences: t.Iterable[TProductIdsOrderedAndUnique]) -> Counter[TCooccurrencePair]:
+    """Counts, for every ordered pair of distinct products, the sequences containing both.
+
+    Both (a, b) and (b, a) are counted, so that the products related to one
+    of them are found by its own key.
+
+    Example:
+        >>> count_cooccurrence_pairs([[1, 2], [1, 2, 3]])
+        Counter({(1, 2): 2, (2, 1): 2, (1, 3): 1, (2, 3): 1, (3, 1): 1, (3, 2): 1})
+    """
+    pairs: Counter[TCooccurrencePair] = Counter()
+    for sequence in sequences:
+        pairs.update(permutations(sequence, 2))
+    return pairs
+
+
+def diff_cooccurrence_pairs(
+    previous_sequence: TProductIdsOrderedAndUnique,
+    sequence: TProductIdsOrderedAndUnique,
+) -> Counter[TCooccurrencePair]:
+    """Count changes of the pairs when a sequence is replaced by another one.
+
+    Pairs present in both sequences are left out.
+
+    Example:
+        >>> diff_cooccurrence_pairs([1, 2], [2, 3])
+        Counter({(2, 3): 1, (3, 2): 1, (1, 2): -1, (2, 1): -1})
+    """
+    pairs = count_cooccurrence_pairs([sequence])
+    pairs.subtract(count_cooccurrence_pairs([previous_sequence]))
+    return Counter({pair: delta for pair, delta in pairs.items() if delta})
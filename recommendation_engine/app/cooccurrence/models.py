@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+
+
+class RelatedProductModel(BaseModel):
+    product_id: int = Field(..., description="The related product")
+    count: int = Field(..., description="Number of recommendations containing both products")
@@ -0,0 +1,86 @@
+import logging
+import typing as t
+from collections import Counter
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import PyMongoError
+
+from recommendation_engine.app.cooccurrence.algorithm import TCooccurrencePair
+from recommendation_engine.app.cooccurrence.models import RelatedProductModel
+from recommendation_engine.app.core.database.repository_base import RepositoryBase
+
+
+logger = logging.getLogger(__name__)
+
+
+class CooccurrenceRepositoryException(Exception):
+    pass
+
+
+class CooccurrenceRepository(RepositoryBase):
+    """Counts of the recommendations containing each pair of products.
+
+    One document per ordered pair `{"product": a, "other": b, "count": n}`,
+    both (a, b) and (b, a) are stored so the products related to `a` are
+    read from the (product, count) index alone.
+    """
+
+    COLLECTION_NAME: t.ClassVar[str] = "cooccurrences"
+    COLLECTION_INDEXES: t.ClassVar[list[dict[str, t.Any]]] = [
+        {"key": [("product", ASCENDING), ("other", ASCENDING)], "unique": True},
+        {"key": [("product", ASCENDING), ("count", DESCENDING)], "unique": False},
+    ]
+    COLLECTION_VALIDATOR: t.ClassVar[dict[str, t.Any]] = {
+        "$jsonSchema": {
+            "bsonType": "object",
+            "required": ["product", "other", "count"],
+            "properties": {
+                "_id": {"bsonType": "objectId"},
+                "product": {"bsonType": ["int", "long"]},
+                "other": {"bsonType": ["int", "long"]},
+                "count": {"bsonType": ["int", "long"]},
+            },
+            "additionalProperties": False,
+        }
+    }
+
+    async def increment(self, pairs: Counter[TCooccurrencePair]) -> None:
+        """Adds the (possibly negative) deltas to the pair counts with a single unordered bulk upsert.
+
+        Raises:
+            CooccurrenceRepositoryException: If the counts could not be updated.
+        """
+        if not pairs:
+            return
+
+        updates = [
+            UpdateOne({"product": product, "other": other}, {"$inc": {"count": delta}}, upsert=True)
+            for (product, other), delta in pairs.items()
+            if delta
+        ]
+        try:
+            await self.collection.bulk_write(updates, ordered=False)
+        except PyMongoError as error:
+            logger.error(f"Exception while updating {len(updates)} co-occurrence counts, error: {error!r}")
+            raise CooccurrenceRepositoryException("PyMongoError while updating co-occurrence counts")
+
+    async def related(self, product_id: int, limit: int) -> list[RelatedProductModel]:
+        """The products most often in the same recommendations as `product_id`, most frequent first.
+
+        Raises:
+            CooccurrenceRepositoryException: If the counts could not be read.
+        """
+        try:
+            cursor = (
+                self.collection.find(
+                    {"product": product_id, "count": {"$gt": 0}},
+                    projection={"_id": 0, "other": 1, "count": 1},
+                )
+                .sort("count", DESCENDING)
+                .limit(limit)
+            )
+            documents = await cursor.to_list()
+        except PyMongoError as error:
+            logger.error(f"Exception while reading the products related to {product_id}, error: {error!r}")
+            raise CooccurrenceRepositoryException("PyMongoError while reading related products")
+        return [RelatedProductModel(product_id=document["other"], count=document["count"]) for document in documents]
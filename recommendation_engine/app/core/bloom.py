@@ -0,0 +1,95 @@
+import hashlib
+import math
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class BloomFilterStats:
+    entries: int
+    capacity: int
+    bits: int
+    hashes: int
+    nbytes: int
+    false_positive_rate: float
+    lookups: int
+    negatives: int
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a bounded rate of false positives.
+
+    Sized for `capacity` keys at `error_rate` false positives, with the bit
+    array capped to `max_bytes` (the false positive rate grows instead).
+    Keys are hashed once with BLAKE2b and the `hashes` bit positions are
+    derived from the two halves of the digest (double hashing). Keys cannot
+    be removed.
+
+    Not thread safe, meant to be used from the event loop only.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, max_bytes: int | None = None) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        if max_bytes is not None:
+            bits = min(bits, max(max_bytes, 1) * 8)
+
+        self.capacity: int = capacity
+        self.bits: int = bits
+        self.hashes: int = max(round(bits / capacity * math.log(2)), 1)
+        self._array: bytearray = bytearray((bits + 7) // 8)
+
+        self._entries: int = 0
+        self._lookups: int = 0
+        self._negatives: int = 0
+
+    def __len__(self) -> int:
+        """Number of keys added, including repeated ones."""
+        return self._entries
+
+    def __contains__(self, key: str | bytes) -> bool:
+        self._lookups += 1
+        array = self._array
+        for position in self._positions(key):
+            if not array[position >> 3] & (1 << (position & 7)):
+                self._negatives += 1
+                return False
+        return True
+
+    def add(self, key: str | bytes) -> None:
+        array = self._array
+        for position in self._positions(key):
+            array[position >> 3] |= 1 << (position & 7)
+        self._entries += 1
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._array)
+
+    def false_positive_rate(self) -> float:
+        """Expected false positive rate with the keys added so far."""
+        return float((1 - math.exp(-self.hashes * self._entries / self.bits)) ** self.hashes)
+
+    def stats(self) -> BloomFilterStats:
+        return BloomFilterStats(
+            entries=self._entries,
+            capacity=self.capacity,
+            bits=self.bits,
+            hashes=self.hashes,
+            nbytes=self.nbytes,
+            false_positive_rate=self.false_positive_rate(),
+            lookups=self._lookups,
+            negatives=self._negatives,
+        )
+
+    def _positions(self, key: str | bytes) -> list[int]:
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        bits = self.bits
+        return [(first + index * second) % bits for index in range(self.hashes)]
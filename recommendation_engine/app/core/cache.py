@@ -0,0 +1,87 @@
+import typing as t
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+    max_bytes: int
+
+
+class ByteBudgetLRUCache[K, V]:
+    """Least recently used cache bounded by an approximate size in bytes.
+
+    Entries can differ in size by orders of magnitude, so instead of a
+    maximum number of entries the cache keeps the sum of `sizeof(value)`
+    under `max_bytes`, evicting the least recently used entries first.
+    Values bigger than the whole budget are never cached.
+
+    Not thread safe, meant to be used from the event loop only.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: t.Callable[[V], int]) -> None:
+        self.max_bytes: int = max_bytes
+        self._sizeof: t.Callable[[V], int] = sizeof
+        self._entries: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self._nbytes: int = 0
+
+        self._hits: int = 0
+        self._misses: int = 0
+        self._evictions: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
+
+    def get(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: K, value: V) -> None:
+        nbytes = self._sizeof(value)
+        self.pop(key)
+        if nbytes > self.max_bytes:
+            return
+
+        self._entries[key] = (value, nbytes)
+        self._nbytes += nbytes
+        while self._nbytes > self.max_bytes:
+            _, (_, evicted_nbytes) = self._entries.popitem(last=False)
+            self._nbytes -= evicted_nbytes
+            self._evictions += 1
+
+    def pop(self, key: K) -> V | None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+
+        value, nbytes = entry
+        self._nbytes -= nbytes
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._nbytes = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            entries=len(self._entries),
+            nbytes=self._nbytes,
+            max_bytes=self.max_bytes,
+        )
@@ -0,0 +1,230 @@
+import asyncio
+import importlib
+import importlib.util
+import logging
+import typing as t
+import zlib
+from dataclasses import dataclass
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+logger = logging.getLogger(__name__)
+
+# Python package each content coding needs, gzip only needs the standard library
+RESPONSE_COMPRESSION_MODULES: t.Final[dict[str, str]] = {"zstd": "zstandard", "br": "brotli", "gzip": "zlib"}
+# Streams of events must reach the client as they are written
+_EXCLUDED_MEDIA_TYPES: t.Final[tuple[str, ...]] = ("text/event-stream",)
+
+
+class CompressionStream(t.Protocol):
+    """A compressor of a streamed body.
+
+    `flush` returns everything compressed so far in a form the client can
+    already decompress, so that each chunk of a stream is delivered as it
+    is written. `finish` ends the stream.
+    """
+
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class _ZlibStream:
+    def __init__(self, level: int) -> None:
+        # wbits 16 + 15 writes the gzip header and trailer around the deflate stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _ZstdStream:
+    def __init__(self, level: int) -> None:
+        self._zstandard = importlib.import_module("zstandard")
+        self._compressor = self._zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return t.cast(bytes, self._compressor.compress(data))
+
+    def flush(self) -> bytes:
+        return t.cast(bytes, self._compressor.flush(self._zstandard.COMPRESSOBJ_FLUSH_BLOCK))
+
+    def finish(self) -> bytes:
+        return t.cast(bytes, self._compressor.flush(self._zstandard.COMPRESSOBJ_FLUSH_FINISH))
+
+
+class _BrotliStream:
+    def __init__(self, level: int) -> None:
+        self._compressor = importlib.import_module("brotli").Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return t.cast(bytes, self._compressor.process(data))
+
+    def flush(self) -> bytes:
+        return t.cast(bytes, self._compressor.flush())
+
+    def finish(self) -> bytes:
+        return t.cast(bytes, self._compressor.finish())
+
+
+@dataclass(frozen=True)
+class ResponseEncoder:
+    """A content coding and the level it compresses the responses with."""
+
+    encoding: str
+    level: int
+
+    def stream(self) -> CompressionStream:
+        if self.encoding == "zstd":
+            return _ZstdStream(self.level)
+        if self.encoding == "br":
+            return _BrotliStream(self.level)
+        return _ZlibStream(self.level)
+
+    @classmethod
+    def available(cls, encodings: t.Iterable[str], levels: t.Mapping[str, int]) -> list[t.Self]:
+        """The encoders of the content codings whose package is installed, the others are skipped with a warning."""
+        encoders = []
+        for encoding in encodings:
+            module = RESPONSE_COMPRESSION_MODULES[encoding]
+            if importlib.util.find_spec(module) is None:
+                logger.warning(f"Response compression {encoding} skipped, the {module} package is not installed")
+                continue
+            encoders.append(cls(encoding=encoding, level=levels[encoding]))
+        return encoders
+
+
+def negotiate_encoding(accept_encoding: str, encodings: t.Sequence[str]) -> str | None:
+    """The first of `encodings` accepted by an `Accept-Encoding` header, codings with `q=0` are refused.
+
+    Example:
+        >>> negotiate_encoding("gzip, br;q=0.5, zstd;q=0", ("zstd", "br", "gzip"))
+        'br'
+    """
+    accepted: set[str] = set()
+    refused: set[str] = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, parameters = item.partition(";")
+        quality = parameters.strip().removeprefix("q=")
+        try:
+            refuse = bool(parameters.strip()) and float(quality) == 0
+        except ValueError:
+            refuse = False
+        (refused if refuse else accepted).add(coding.strip())
+
+    for encoding in encodings:
+        if encoding in refused:
+            continue
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """Compresses the responses with the preferred content coding accepted by the client.
+
+    Complete bodies are compressed in one go, and only from `minimum_size`
+    bytes. Streamed bodies are compressed and flushed chunk by chunk as they
+    are sent.
+    Bodies or chunks of at least `thread_minimum_size` bytes are compressed
+    on a thread so they do not block the event loop. The compressors
+    release the GIL while they work.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encoders: t.Sequence[ResponseEncoder],
+        minimum_size: int = 1024,
+        thread_minimum_size: int = 256 * 1024,
+    ) -> None:
+        self.app: ASGIApp = app
+        self.encoders: dict[str, ResponseEncoder] = {encoder.encoding: encoder for encoder in encoders}
+        self.minimum_size: int = minimum_size
+        self.thread_minimum_size: int = thread_minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.encoders:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), tuple(self.encoders))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, self.encoders[encoding], send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoder: ResponseEncoder, send: Send) -> None:
+        self.middleware: CompressionMiddleware = middleware
+        self.encoder: ResponseEncoder = encoder
+        self.downstream: Send = send
+        self.start_message: Message | None = None
+        self.stream: CompressionStream | None = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body message tells whether and how the body is compressed
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            if self._compressible(Headers(raw=start_message["headers"]), body, more_body):
+                self.stream = self.encoder.stream()
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = self.encoder.encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = await self._compress(self.stream, body, final=True)
+                    headers["Content-Length"] = str(len(body))
+                    await self.downstream(start_message)
+                    await self.downstream({"type": "http.response.body", "body": body, "more_body": False})
+                    return
+            await self.downstream(start_message)
+
+        if self.stream is None:
+            await self.downstream(message)
+            return
+
+        body = await self._compress(self.stream, body, final=not more_body)
+        if body or not more_body:
+            await self.downstream({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    def _compressible(self, headers: Headers, body: bytes, more_body: bool) -> bool:
+        if "content-encoding" in headers or headers.get("content-type", "").startswith(_EXCLUDED_MEDIA_TYPES):
+            return False
+        # The size of a streamed body is unknown, it is compressed whatever its first chunk
+        return more_body or (bool(body) and len(body) >= self.middleware.minimum_size)
+
+    async def _compress(self, stream: CompressionStream, data: bytes, final: bool) -> bytes:
+        if not data and not final:
+            return b""
+
+        def compress() -> bytes:
+            # Flushed chunk by chunk, the client decompresses each one as soon as it is received
+            return stream.compress(data) + (stream.finish() if final else stream.flush())
+
+        if len(data) >= self.middleware.thread_minimum_size:
+            return await asyncio.to_thread(compress)
+        return compress()
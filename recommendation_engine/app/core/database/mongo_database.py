@@ -36,6 +36,7 @@ class MongoDatabase(DatabaseClientBase):
             self._uri,
             minPoolSize=self._settings.db_mongo_min_pool_size,
             maxPoolSize=self._settings.db_mongo_max_pool_size,
+            compressors=",".join(self._settings.db_mongo_compressors) or None,
             server_api=ServerApi(
                 "1",
                 strict=True,
@@ -51,18 +52,27 @@ class MongoDatabase(DatabaseClientBase):
         logger.info("Initializing MongoDB database")
         await self.ping()
 
+        options: dict[str, t.Any] = {}
+        if self._settings.db_mongo_block_compressor:
+            options["storageEngine"] = {
+                "wiredTiger": {"configString": f"block_compressor={self._settings.db_mongo_block_compressor}"}
+            }
+
         db = self.db
         for repository in repositories:
             collection_name = repository.COLLECTION_NAME
 
             try:
-                await db.create_collection(collection_name, validator=repository.COLLECTION_VALIDATOR)
+                await db.create_collection(collection_name, validator=repository.COLLECTION_VALIDATOR, **options)
             except CollectionInvalid:
-                pass
+                # Collection already exists, keep its validator in sync with the repository one
+                await db.command("collMod", collection_name, validator=repository.COLLECTION_VALIDATOR)
 
             collection = db[collection_name]
             for index in repository.COLLECTION_INDEXES:
-                await collection.create_index([(index["key"], index["order"])], unique=index["unique"])
+                # Single field indexes declare a `key` and its `order`, compound ones a list of (key, order)
+                keys = index["key"] if isinstance(index["key"], list) else [(index["key"], index["order"])]
+                await collection.create_index(keys, unique=index["unique"])
             logger.info(f"Collection {collection_name} initialized")
 
         logger.info("MongoDB database initialized")
@@ -0,0 +1,23 @@
+import typing as t
+
+import msgpack
+
+
+MSGPACK_MEDIA_TYPE: t.Final[str] = "application/msgpack"
+
+
+def packb(value: t.Any) -> bytes:
+    r"""Encodes a JSON like value as MessagePack, with the C extension of the `msgpack` package.
+
+    Strings are encoded as str and bytes as bin, as in the current spec.
+
+    Example:
+        >>> packb({"sequence": [1, 2]})
+        b'\x81\xa8sequence\x92\x01\x02'
+
+    Raises:
+        TypeError: If a value has an unsupported type.
+        OverflowError: If an integer does not fit in 64 bits.
+    """
+    packed: bytes = msgpack.packb(value, use_bin_type=True)
+    return packed
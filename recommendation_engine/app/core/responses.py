@@ -0,0 +1,50 @@
+import typing as t
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+from recommendation_engine.app.core.cache import ByteBudgetLRUCache, CacheStats
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded by the Rust serializer of pydantic-core instead of the standard `json` module.
+
+    The output is the same compact UTF-8 JSON, datetimes, bytes and models
+    included, at a fraction of the CPU. Subclass and override `render` to
+    plug in another encoder.
+    """
+
+    def render(self, content: t.Any) -> bytes:
+        return pydantic_core.to_json(content)
+
+
+class ResponseBodyCache:
+    """Encoded response bodies by key, e.g. the JSON of a document by ID and fingerprint, to skip the encoding.
+
+    Keys must identify the version of what was encoded, not only where it
+    is read from: a write then changes the key of the next read instead of
+    having to invalidate the body, which the caches of the other worker
+    processes could not see. Bodies of versions that are not read anymore
+    are evicted by the byte budget.
+
+    Not thread safe, meant to be used from the event loop only.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._bodies: ByteBudgetLRUCache[t.Hashable, bytes] = ByteBudgetLRUCache(max_bytes=max_bytes, sizeof=len)
+
+    @property
+    def enabled(self) -> bool:
+        return self._bodies.max_bytes > 0
+
+    def get(self, key: t.Hashable) -> bytes | None:
+        return self._bodies.get(key)
+
+    def put(self, key: t.Hashable, body: bytes) -> None:
+        self._bodies.put(key, body)
+
+    def clear(self) -> None:
+        self._bodies.clear()
+
+    def stats(self) -> CacheStats:
+        return self._bodies.stats()
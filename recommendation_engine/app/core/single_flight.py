@@ -0,0 +1,50 @@
+import asyncio
+import typing as t
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SingleFlightStats:
+    calls: int
+    coalesced: int
+    in_flight: int
+
+
+class SingleFlight[K, V]:
+    """Coalesces concurrent calls with the same key into a single one.
+
+    The first caller of a key runs the function in a task of its own, the
+    callers arriving while it is still running await the same task instead,
+    getting the same result or exception. No caller owns the task, so any of
+    them, the first one included, can be cancelled without cancelling the
+    call for the others. Once it completes the key is forgotten, so the next
+    caller runs the function again.
+
+    Not thread safe, meant to be used from the event loop only.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: dict[K, asyncio.Future[V]] = {}
+        self._calls: int = 0
+        self._coalesced: int = 0
+
+    async def do(self, key: K, function: t.Callable[[], t.Awaitable[V]]) -> V:
+        self._calls += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(function())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._coalesced += 1
+        # Shielded, so that a caller being cancelled does not cancel the call for everyone else
+        return await asyncio.shield(future)
+
+    def _forget(self, key: K, future: asyncio.Future[V]) -> None:
+        del self._in_flight[key]
+        if not future.cancelled():
+            # Marks the exception as retrieved, every caller may have been cancelled meanwhile
+            future.exception()
+
+    def stats(self) -> SingleFlightStats:
+        return SingleFlightStats(calls=self._calls, coalesced=self._coalesced, in_flight=len(self._in_flight))
@@ -5,8 +5,15 @@ from fastapi import Depends
 
 from recommendation_engine.app.auth.access_token import HashLibPasswordHasher, JWTAccessTokenAuth
 from recommendation_engine.app.auth.service import AuthService
+from recommendation_engine.app.cooccurrence.repository import CooccurrenceRepository
+from recommendation_engine.app.core.bloom import BloomFilter
+from recommendation_engine.app.core.cache import ByteBudgetLRUCache
 from recommendation_engine.app.core.database.mongo_database import MongoDatabase
+from recommendation_engine.app.core.responses import ResponseBodyCache
+from recommendation_engine.app.recommendation.executor import SubsequencesExecutor
 from recommendation_engine.app.recommendation.repository import RecommendationRepository
+from recommendation_engine.app.recommendation.service import RecommendationService, TSubsequencesCache
+from recommendation_engine.settings import Settings
 
 
 def provide_access_token_auth() -> JWTAccessTokenAuth:
@@ -32,12 +39,84 @@ def get_database() -> MongoDatabase:
     return _database
 
 
+@cache
+def fingerprint_filter() -> BloomFilter | None:
+    settings = Settings.get()
+    if not settings.app_fingerprint_filter_enabled:
+        return None
+
+    _filter = BloomFilter(
+        capacity=settings.app_fingerprint_filter_capacity,
+        error_rate=settings.app_fingerprint_filter_error_rate,
+        max_bytes=settings.app_fingerprint_filter_max_bytes,
+    )
+    return _filter
+
+
 @cache
 def recommendation_repository(database_client: MongoDatabase = Depends(get_database)) -> RecommendationRepository:
     _repository = RecommendationRepository(
         database_client=database_client,
+        fingerprint_filter=fingerprint_filter(),
     )
     return _repository
 
 
 RecommendationRepositorySingleton = Annotated[RecommendationRepository, Depends(recommendation_repository)]
+
+
+@cache
+def cooccurrence_repository(database_client: MongoDatabase = Depends(get_database)) -> CooccurrenceRepository:
+    _repository = CooccurrenceRepository(
+        database_client=database_client,
+    )
+    return _repository
+
+
+CooccurrenceRepositorySingleton = Annotated[CooccurrenceRepository, Depends(cooccurrence_repository)]
+
+
+@cache
+def subsequences_executor() -> SubsequencesExecutor:
+    _executor = SubsequencesExecutor.from_settings()
+    return _executor
+
+
+SubsequencesExecutorSingleton = Annotated[SubsequencesExecutor, Depends(subsequences_executor)]
+
+
+@cache
+def subsequences_cache() -> TSubsequencesCache:
+    _cache: TSubsequencesCache = ByteBudgetLRUCache(
+        max_bytes=Settings.get().app_subsequences_cache_max_bytes,
+        sizeof=lambda generated: generated.nbytes,
+    )
+    return _cache
+
+
+@cache
+def response_body_cache() -> ResponseBodyCache:
+    _cache = ResponseBodyCache(max_bytes=Settings.get().app_response_cache_max_bytes)
+    return _cache
+
+
+ResponseBodyCacheSingleton = Annotated[ResponseBodyCache, Depends(response_body_cache)]
+
+
+@cache
+def recommendation_service(
+    repository: RecommendationRepository = Depends(recommendation_repository),
+    executor: SubsequencesExecutor = Depends(subsequences_executor),
+    _subsequences_cache: TSubsequencesCache = Depends(subsequences_cache),
+    _cooccurrence_repository: CooccurrenceRepository = Depends(cooccurrence_repository),
+) -> RecommendationService:
+    service = RecommendationService(
+        repository=repository,
+        executor=executor,
+        subsequences_cache=_subsequences_cache,
+        cooccurrence_repository=_cooccurrence_repository,
+    )
+    return service
+
+
+RecommendationServiceSingleton = Annotated[RecommendationService, Depends(recommendation_service)]
@@ -1,14 +1,29 @@
 import hashlib
+import heapq
 import json
+import struct
+import typing as t
+from bisect import bisect_left
 from itertools import combinations
+from math import comb
+
+import numpy as np
 
 from recommendation_engine.app.recommendation.types import (
+    DEFAULT_FINGERPRINT_SCHEME,
+    CompactSubSequences,
+    FingerprintScheme,
+    RecommendationEngine,
     TProductIdsFingerPrint,
     TProductIdsOrderedAndUnique,
     TRecommendationSubSequences,
+    TRecommendationSubSequencesIterator,
 )
 
 
+FINGERPRINT_V2_DIGEST_SIZE: t.Final[int] = 16
+
+
 def generate_recommendation_subsequences(
     product_ids: tuple[int, ...] | list[int],
 ) -> tuple[TProductIdsOrderedAndUnique, TRecommendationSubSequences]:
@@ -30,20 +45,294 @@ def generate_recommendation_subsequences(
             [1, 2, 3]
         ]
     """
-    unique_ordered_product_ids = sorted(set(product_ids))
+    unique_ordered_product_ids = order_product_ids(product_ids)
+    subsequences = list(iter_recommendation_subsequences(unique_ordered_product_ids))
+    return unique_ordered_product_ids, subsequences
+
+
+def generate_recommendation_subsequences_compact(
+    product_ids: tuple[int, ...] | list[int],
+) -> tuple[TProductIdsOrderedAndUnique, CompactSubSequences]:
+    """Vectorized version of `generate_recommendation_subsequences`.
+
+    Same subsequences and same order, but returned as flat values + offsets
+    arrays instead of a list per subsequence. The combinations of each
+    length are built as a matrix of indices out of the combinations of the
+    previous length: the block starting with index `i` is `i` prepended to
+    the (length - 1)-combinations whose first index is greater than `i`,
+    which are a suffix of the previous matrix.
+
+    Example:
+        >>> _, subsequences = generate_recommendation_subsequences_compact([3, 1, 2])
+        >>> subsequences.values, subsequences.offsets
+        (array([1, 2, 3, 1, 2, 1, 3, 2, 3, 1, 2, 3], dtype=int32), array([ 0,  1,  2,  3,  5,  7,  9, 12]))
+    """
+    unique_ordered_product_ids = order_product_ids(product_ids)
     count = len(unique_ordered_product_ids)
 
-    subsequences: list[list[int]] = []
+    dtype: type[np.int32] | type[np.int64] = np.int64
+    if not unique_ordered_product_ids or _fits_int32(unique_ordered_product_ids[0], unique_ordered_product_ids[-1]):
+        dtype = np.int32
+    product_ids_array = np.asarray(unique_ordered_product_ids, dtype=dtype)
+
+    offsets = np.zeros(count_recommendation_subsequences(count) + 1, dtype=np.int64)
+    values = np.empty(count * (1 << count) // 2, dtype=dtype)
+
+    position = 0
+    subsequence_index = 0
+    previous = np.arange(count, dtype=np.uint8 if count <= 255 else np.int64).reshape(count, 1)
     for sequence_length in range(1, count + 1):
-        sequences_iter = combinations(unique_ordered_product_ids, sequence_length)
-        subsequences.extend([list(sequence) for sequence in sequences_iter])
-    return unique_ordered_product_ids, subsequences
+        if sequence_length == 1:
+            current = previous
+        else:
+            current = np.empty((comb(count, sequence_length), sequence_length), dtype=previous.dtype)
+            # Row where the previous combinations starting with each index begin
+            starts = np.searchsorted(previous[:, 0], np.arange(count + 1), side="left")
+            row = 0
+            for first_index in range(count - sequence_length + 1):
+                suffix = previous[starts[first_index + 1] :]
+                current[row : row + len(suffix), 0] = first_index
+                current[row : row + len(suffix), 1:] = suffix
+                row += len(suffix)
+
+        np.take(product_ids_array, current.ravel(), out=values[position : position + current.size])
+        subsequences_count = len(current)
+        offsets[subsequence_index + 1 : subsequence_index + subsequences_count + 1] = np.arange(
+            position + sequence_length,
+            position + current.size + 1,
+            sequence_length,
+            dtype=np.int64,
+        )
+        position += current.size
+        subsequence_index += subsequences_count
+        previous = current
+
+    return unique_ordered_product_ids, CompactSubSequences(values=values, offsets=offsets)
+
+
+def generate_subsequences_with_engine(
+    product_ids: tuple[int, ...] | list[int],
+    engine: RecommendationEngine,
+) -> tuple[TProductIdsOrderedAndUnique, TRecommendationSubSequences | CompactSubSequences]:
+    """Generates the subsequences with the given engine implementation."""
+    if engine == RecommendationEngine.NUMPY:
+        return generate_recommendation_subsequences_compact(product_ids)
+    return generate_recommendation_subsequences(product_ids)
+
+
+def order_product_ids(product_ids: t.Iterable[int]) -> TProductIdsOrderedAndUnique:
+    """Sorts the product IDs in ascending order and drops the repeated ones."""
+    return sorted(set(product_ids))
+
+
+def iter_recommendation_subsequences(
+    unique_ordered_product_ids: TProductIdsOrderedAndUnique,
+) -> TRecommendationSubSequencesIterator:
+    """Lazily yields all non-repeated subsequences of product IDs.
+
+    The product_ids passed should be sorted and unique. Subsequences are
+    yielded in the same order as `generate_recommendation_subsequences`
+    returns them, one at a time, so the caller decides how many of them
+    are kept in memory.
+
+    Example:
+        >>> list(iter_recommendation_subsequences([1, 2]))
+        [[1], [2], [1, 2]]
+    """
+    for sequence_length in range(1, len(unique_ordered_product_ids) + 1):
+        for sequence in combinations(unique_ordered_product_ids, sequence_length):
+            yield list(sequence)
+
+
+def count_recommendation_subsequences(count: int, sequence_length: int | None = None) -> int:
+    """Counts the subsequences generated out of `count` unique product IDs.
+
+    That is 2^count - 1 for all of them or C(count, sequence_length) for the
+    ones of a single length.
+    """
+    if sequence_length is None:
+        return (1 << count) - 1
+    if sequence_length < 1:
+        return 0
+    return comb(count, sequence_length)
+
+
+def unrank_recommendation_subsequence(
+    unique_ordered_product_ids: TProductIdsOrderedAndUnique,
+    rank: int,
+) -> list[int]:
+    """Computes the subsequence at position `rank` without generating the preceding ones.
+
+    The product_ids passed should be sorted and unique. The position follows
+    the order of `generate_recommendation_subsequences` (by length, then
+    lexicographically), and is resolved with the combinatorial number system
+    in O(n) binomial coefficients.
+
+    Raises:
+        IndexError: If rank is out of the range of the subsequences.
+
+    Example:
+        >>> unrank_recommendation_subsequence([1, 2, 3], 4)
+        [1, 3]
+    """
+    count = len(unique_ordered_product_ids)
+    if rank < 0 or rank >= count_recommendation_subsequences(count):
+        raise IndexError(f"Subsequence rank {rank} out of range")
 
+    sequence_length = 1
+    while rank >= (length_total := comb(count, sequence_length)):
+        rank -= length_total
+        sequence_length += 1
 
-def generate_product_ids_fingerprint(product_ids: TProductIdsOrderedAndUnique) -> TProductIdsFingerPrint:
+    indices = _unrank_combination(count, sequence_length, rank)
+    return [unique_ordered_product_ids[index] for index in indices]
+
+
+def iter_recommendation_subsequences_from(
+    unique_ordered_product_ids: TProductIdsOrderedAndUnique,
+    rank: int,
+) -> TRecommendationSubSequencesIterator:
+    """Lazily yields the subsequences starting at position `rank`.
+
+    Same order as `iter_recommendation_subsequences`, but only the first
+    subsequence is unranked, the following ones are computed from their
+    predecessor in O(length).
+    """
+    count = len(unique_ordered_product_ids)
+    if rank >= count_recommendation_subsequences(count):
+        return
+
+    first = unrank_recommendation_subsequence(unique_ordered_product_ids, max(rank, 0))
+    positions = {product_id: index for index, product_id in enumerate(unique_ordered_product_ids)}
+    indices = [positions[product_id] for product_id in first]
+
+    for sequence_length in range(len(indices), count + 1):
+        if len(indices) != sequence_length:
+            indices = list(range(sequence_length))
+
+        while True:
+            yield [unique_ordered_product_ids[index] for index in indices]
+            if not _next_combination(indices, count):
+                break
+
+
+def _fits_int32(lowest: int, highest: int) -> bool:
+    limits = np.iinfo(np.int32)
+    return bool(limits.min <= lowest and highest <= limits.max)
+
+
+def _unrank_combination(count: int, sequence_length: int, rank: int) -> list[int]:
+    indices: list[int] = []
+    start = 0
+    for position in range(sequence_length):
+        remaining = sequence_length - position - 1
+        for index in range(start, count):
+            combinations_with_index = comb(count - index - 1, remaining)
+            if rank < combinations_with_index:
+                indices.append(index)
+                start = index + 1
+                break
+            rank -= combinations_with_index
+    return indices
+
+
+def _next_combination(indices: list[int], count: int) -> bool:
+    """Moves the indices to the next combination in lexicographic order, in place."""
+    sequence_length = len(indices)
+    for position in range(sequence_length - 1, -1, -1):
+        if indices[position] < count - sequence_length + position:
+            indices[position] += 1
+            for following in range(position + 1, sequence_length):
+                indices[following] = indices[following - 1] + 1
+            return True
+    return False
+
+
+def add_product_to_recommendation_subsequences(
+    unique_ordered_product_ids: TProductIdsOrderedAndUnique,
+    subsequences: TRecommendationSubSequences,
+    product_id: int,
+) -> tuple[TProductIdsOrderedAndUnique, TRecommendationSubSequences]:
+    """Derives the subsequences of the sequence plus `product_id` from the current ones.
+
+    The new subsequences are the current ones plus every current one
+    extended with `product_id` (and `product_id` alone). To keep the order
+    of `generate_recommendation_subsequences`, the extended subsequences of
+    length k-1 are merged with the current ones of length k, both already
+    sorted, so it costs O(2^n) appends instead of a full generation.
+
+    Example:
+        >>> add_product_to_recommendation_subsequences([1, 3], [[1], [3], [1, 3]], 2)
+        ([1, 2, 3], [[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]])
+    """
+    position = bisect_left(unique_ordered_product_ids, product_id)
+    if position < len(unique_ordered_product_ids) and unique_ordered_product_ids[position] == product_id:
+        return unique_ordered_product_ids, subsequences
+
+    count = len(unique_ordered_product_ids)
+    new_product_ids = [*unique_ordered_product_ids[:position], product_id, *unique_ordered_product_ids[position:]]
+
+    new_subsequences: TRecommendationSubSequences = []
+    previous_block: TRecommendationSubSequences = [[]]
+    start = 0
+    for sequence_length in range(1, count + 2):
+        stop = start + count_recommendation_subsequences(count, sequence_length)
+        block = subsequences[start:stop]
+        extended_block = [
+            [*subsequence[: (index := bisect_left(subsequence, product_id))], product_id, *subsequence[index:]]
+            for subsequence in previous_block
+        ]
+        new_subsequences.extend(heapq.merge(block, extended_block))
+        previous_block = block
+        start = stop
+    return new_product_ids, new_subsequences
+
+
+def remove_product_from_recommendation_subsequences(
+    unique_ordered_product_ids: TProductIdsOrderedAndUnique,
+    subsequences: TRecommendationSubSequences,
+    product_id: int,
+) -> tuple[TProductIdsOrderedAndUnique, TRecommendationSubSequences]:
+    """Derives the subsequences of the sequence minus `product_id` from the current ones.
+
+    Those are the current subsequences not containing `product_id`, in the
+    same order.
+
+    Example:
+        >>> remove_product_from_recommendation_subsequences([1, 2], [[1], [2], [1, 2]], 2)
+        ([1], [[1]])
+    """
+    if product_id not in unique_ordered_product_ids:
+        return unique_ordered_product_ids, subsequences
+
+    new_product_ids = [current for current in unique_ordered_product_ids if current != product_id]
+    new_subsequences = [subsequence for subsequence in subsequences if product_id not in subsequence]
+    return new_product_ids, new_subsequences
+
+
+def generate_product_ids_fingerprint(
+    product_ids: TProductIdsOrderedAndUnique,
+    scheme: FingerprintScheme = DEFAULT_FINGERPRINT_SCHEME,
+) -> TProductIdsFingerPrint:
     """Creates a unique hash for a sequence of product IDs.
 
-    The product_ids passed should be sorted and unique.
+    The product_ids passed should be sorted and unique. With `FingerprintScheme.V2`
+    the IDs are hashed as packed bytes, with no string encoding, and the digest
+    is returned as 16 raw bytes instead of a 40 characters hex string.
+
+    Raises:
+        struct.error: With `FingerprintScheme.V2`, if a product ID does not fit in a signed 64 bits integer.
     """
+    if scheme == FingerprintScheme.V2:
+        packed = struct.pack(f"<{len(product_ids)}q", *product_ids)
+        return hashlib.blake2b(packed, digest_size=FINGERPRINT_V2_DIGEST_SIZE).digest()
+
     product_ids_serialized = json.dumps(product_ids, separators=(",", ":"))
     return hashlib.sha1(product_ids_serialized.encode("utf-8")).hexdigest()
+
+
+def format_product_ids_fingerprint(fingerprint: TProductIdsFingerPrint) -> str:
+    """Returns the fingerprint as a string, binary fingerprints are hex encoded."""
+    if isinstance(fingerprint, bytes):
+        return fingerprint.hex()
+    return fingerprint
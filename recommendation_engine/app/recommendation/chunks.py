@@ -0,0 +1,143 @@
+import logging
+import typing as t
+from itertools import batched
+
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+
+from recommendation_engine.app.core.database.repository_base import RepositoryBase
+from recommendation_engine.app.recommendation.algorithm import count_recommendation_subsequences
+from recommendation_engine.app.recommendation.types import CompactSubSequences, TRecommendationSubSequences
+
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationChunksException(Exception):
+    pass
+
+
+def split_subsequences_in_chunks(
+    product_count: int,
+    subsequences: TRecommendationSubSequences | CompactSubSequences,
+    chunk_size: int,
+) -> t.Iterator[tuple[int, int, TRecommendationSubSequences]]:
+    """Splits subsequences ordered by length into blocks of at most `chunk_size` of the same length.
+
+    Blocks are sliced lazily, so a compact layout is only converted to lists one block at a time.
+
+    Yields:
+        (length, block, subsequences) tuples, block being the position of the chunk within its length.
+
+    Example:
+        >>> list(split_subsequences_in_chunks(3, [[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]], 2))
+        [(1, 0, [[1], [2]]), (1, 1, [[3]]), (2, 0, [[1, 2], [1, 3]]), (2, 1, [[2, 3]]), (3, 0, [[1, 2, 3]])]
+    """
+    start = 0
+    for sequence_length in range(1, product_count + 1):
+        stop = start + count_recommendation_subsequences(product_count, sequence_length)
+        for block, block_start in enumerate(range(start, stop, chunk_size)):
+            yield sequence_length, block, subsequences[block_start : min(block_start + chunk_size, stop)]
+        start = stop
+
+
+class RecommendationChunksRepository(RepositoryBase):
+    """Subsequences of the recommendations with chunked storage, split in many small documents.
+
+    Each chunk holds up to `chunk_size` subsequences of the same length,
+    `{"chunksId": ..., "length": k, "block": b, "subsequences": [...]}`. All
+    the chunks of a recommendation share the `chunksId` referenced by it,
+    so a new set of chunks can be written before switching to it.
+    """
+
+    COLLECTION_NAME: t.ClassVar[str] = "recommendation_chunks"
+    COLLECTION_INDEXES: t.ClassVar[list[dict[str, t.Any]]] = [
+        {"key": [("chunksId", ASCENDING), ("length", ASCENDING), ("block", ASCENDING)], "unique": True},
+    ]
+    COLLECTION_VALIDATOR: t.ClassVar[dict[str, t.Any]] = {
+        "$jsonSchema": {
+            "bsonType": "object",
+            "required": ["chunksId", "length", "block", "subsequences"],
+            "properties": {
+                "_id": {"bsonType": "objectId"},
+                "chunksId": {"bsonType": "objectId"},
+                "length": {"bsonType": "int", "minimum": 1},
+                "block": {"bsonType": "int", "minimum": 0},
+                "subsequences": {"bsonType": "array", "items": {"bsonType": "array", "items": {"bsonType": "int"}}},
+            },
+            "additionalProperties": False,
+        }
+    }
+    # Chunk documents are built and written about this many subsequences at a time
+    INSERT_BATCH_SUBSEQUENCES: t.ClassVar[int] = 65_536
+
+    async def insert(
+        self,
+        chunks: list[tuple[ObjectId, int, TRecommendationSubSequences | CompactSubSequences]],
+        chunk_size: int,
+    ) -> None:
+        """Writes the chunks of many recommendations with unordered `insert_many`, a bounded batch at a time.
+
+        The chunk documents are built lazily from the subsequences, so that
+        only one batch of them (and of the lists of a compact layout) is held
+        in memory, however large the baskets.
+
+        Args:
+            chunks: (chunksId, number of products, subsequences) of each recommendation.
+            chunk_size: Maximum number of subsequences per chunk.
+
+        Raises:
+            RecommendationChunksException: If the chunks could not be written.
+        """
+        documents = (
+            {"chunksId": chunks_id, "length": length, "block": block, "subsequences": subsequences}
+            for chunks_id, product_count, all_subsequences in chunks
+            for length, block, subsequences in split_subsequences_in_chunks(product_count, all_subsequences, chunk_size)
+        )
+
+        inserted = 0
+        try:
+            for batch in batched(documents, max(self.INSERT_BATCH_SUBSEQUENCES // chunk_size, 1)):
+                await self.collection.insert_many(list(batch), ordered=False)
+                inserted += len(batch)
+        except PyMongoError as error:
+            logger.error(f"Exception while inserting subsequences chunks after {inserted} of them, error: {error!r}")
+            raise RecommendationChunksException("PyMongoError while inserting subsequences chunks")
+
+    async def iter(self, chunks_id: ObjectId) -> t.AsyncIterator[TRecommendationSubSequences]:
+        """Streams the subsequences in order, one chunk at a time.
+
+        Raises:
+            RecommendationChunksException: If the chunks could not be read.
+        """
+        try:
+            cursor = self.collection.find({"chunksId": chunks_id}, projection={"_id": 0, "subsequences": 1}).sort(
+                [("length", ASCENDING), ("block", ASCENDING)]
+            )
+            async for chunk in cursor:
+                yield chunk["subsequences"]
+        except PyMongoError as error:
+            logger.error(f"Exception while reading subsequences chunks {chunks_id}, error: {error!r}")
+            raise RecommendationChunksException("PyMongoError while reading subsequences chunks")
+
+    async def read(self, chunks_id: ObjectId) -> TRecommendationSubSequences:
+        """Assembles the subsequences of all the chunks.
+
+        Raises:
+            RecommendationChunksException: If the chunks could not be read.
+        """
+        subsequences: TRecommendationSubSequences = []
+        async for chunk in self.iter(chunks_id):
+            subsequences.extend(chunk)
+        return subsequences
+
+    async def delete(self, chunks_ids: list[ObjectId]) -> None:
+        """Deletes every chunk of the chunk sets, failures are only logged since orphan chunks are never read."""
+        if not chunks_ids:
+            return
+
+        try:
+            await self.collection.delete_many({"chunksId": {"$in": chunks_ids}})
+        except PyMongoError as error:
+            logger.error(f"Exception while deleting subsequences chunks {chunks_ids}, error: {error!r}")
@@ -0,0 +1,79 @@
+import typing as t
+from itertools import chain
+
+import numpy as np
+
+from recommendation_engine.app.recommendation.types import (
+    CompactSubSequences,
+    TProductIdsOrderedAndUnique,
+    TRecommendationSubSequences,
+)
+
+
+MAX_BITMASK_PRODUCTS: t.Final[int] = 64
+
+
+def bitmask_width(product_count: int) -> int:
+    """Bytes of the bitmask of one subsequence of a sequence of `product_count` products."""
+    return (product_count + 7) // 8
+
+
+def encode_subsequences_bitmask(
+    product_ids: TProductIdsOrderedAndUnique,
+    subsequences: TRecommendationSubSequences | CompactSubSequences,
+) -> bytes:
+    r"""Encodes each subsequence as the bitmask of the positions of its products in `product_ids`.
+
+    Bit `i` of a bitmask is set when the subsequence contains `product_ids[i]`. Each
+    bitmask is written little-endian in `bitmask_width(len(product_ids))` bytes, one
+    after the other, so a sequence of up to 8 products costs a single byte per subsequence.
+
+    Example:
+        >>> encode_subsequences_bitmask([1, 2, 3], [[1], [2], [1, 3]])
+        b'\x01\x02\x05'
+
+    Raises:
+        ValueError: If the sequence has more than `MAX_BITMASK_PRODUCTS` products.
+    """
+    if len(product_ids) > MAX_BITMASK_PRODUCTS:
+        raise ValueError(f"Bitmask encoding supports up to {MAX_BITMASK_PRODUCTS} products, got {len(product_ids)}")
+
+    if isinstance(subsequences, CompactSubSequences):
+        values = np.asarray(subsequences.values, dtype=np.int64)
+        offsets = subsequences.offsets
+    else:
+        values = np.fromiter(chain.from_iterable(subsequences), dtype=np.int64)
+        offsets = np.zeros(len(subsequences) + 1, dtype=np.int64)
+        np.cumsum(
+            np.fromiter((len(subsequence) for subsequence in subsequences), dtype=np.int64, count=len(subsequences)),
+            out=offsets[1:],
+        )
+
+    width = bitmask_width(len(product_ids))
+    if len(offsets) == 1:
+        return b""
+
+    # The sequence is ordered, so the position of each product is found by binary search
+    positions = np.searchsorted(np.asarray(product_ids, dtype=np.int64), values).astype(np.uint64)
+    # The products of a subsequence are unique, so the sum of their bits is their union
+    masks = np.add.reduceat(np.left_shift(np.uint64(1), positions), offsets[:-1]).astype("<u8")
+    return masks.view(np.uint8).reshape(-1, 8)[:, :width].tobytes()
+
+
+def decode_subsequences_bitmask(product_ids: TProductIdsOrderedAndUnique, data: bytes) -> CompactSubSequences:
+    r"""Decodes the subsequences encoded with `encode_subsequences_bitmask`.
+
+    Example:
+        >>> decode_subsequences_bitmask([1, 2, 3], b'\x01\x02\x05').tolist()
+        [[1], [2], [1, 3]]
+    """
+    width = bitmask_width(len(product_ids))
+    padded = np.zeros((len(data) // width, 8), dtype=np.uint8)
+    padded[:, :width] = np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+    masks = padded.view("<u8").ravel()
+
+    bits = (masks[:, None] >> np.arange(len(product_ids), dtype=np.uint64)) & np.uint64(1)
+    rows, columns = np.nonzero(bits)
+    offsets = np.zeros(len(masks) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(masks)), out=offsets[1:])
+    return CompactSubSequences(values=np.asarray(product_ids, dtype=np.int64)[columns], offsets=offsets)
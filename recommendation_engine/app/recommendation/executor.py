@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from recommendation_engine.app.recommendation.algorithm import (
+    generate_recommendation_subsequences_compact,
+    generate_subsequences_with_engine,
+    order_product_ids,
+)
+from recommendation_engine.app.recommendation.types import (
+    CompactSubSequences,
+    RecommendationEngine,
+    TProductIdsOrderedAndUnique,
+    TRecommendationSubSequences,
+)
+from recommendation_engine.settings import Settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class SubsequencesExecutorException(Exception):
+    pass
+
+
+class SubsequencesExecutorBusy(SubsequencesExecutorException):
+    pass
+
+
+class SubsequencesExecutor:
+    """Runs the subsequences generation without blocking the event loop.
+
+    Small baskets are generated inline, it is cheaper than a round trip to
+    another process. Baskets with more than `inline_max_products` unique
+    products are sent to a process pool, which returns them as a compact
+    values + offsets buffer. At most `max_pending` generations are queued
+    or running on the pool, once full callers wait up to `queue_timeout`
+    seconds before being rejected with `SubsequencesExecutorBusy`.
+    """
+
+    def __init__(
+        self,
+        engine: RecommendationEngine,
+        inline_max_products: int,
+        max_workers: int,
+        max_pending: int,
+        queue_timeout: float,
+    ) -> None:
+        self.engine: RecommendationEngine = engine
+        self.inline_max_products: int = inline_max_products
+        self.max_workers: int = max_workers
+        self.queue_timeout: float = queue_timeout
+
+        self._pending: asyncio.Semaphore = asyncio.Semaphore(max_pending)
+        self._pool: ProcessPoolExecutor | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings | None = None) -> "SubsequencesExecutor":
+        settings = settings or Settings.get()
+        return cls(
+            engine=settings.app_recommendation_engine,
+            inline_max_products=settings.app_executor_inline_max_products,
+            max_workers=settings.app_executor_max_workers,
+            max_pending=settings.app_executor_max_pending,
+            queue_timeout=settings.app_executor_queue_timeout,
+        )
+
+    async def generate(
+        self,
+        product_ids: tuple[int, ...] | list[int],
+    ) -> tuple[TProductIdsOrderedAndUnique, TRecommendationSubSequences | CompactSubSequences]:
+        """Generates the subsequences inline or on the process pool, depending on the basket size.
+
+        Raises:
+            SubsequencesExecutorBusy: If the pool queue stays full for longer than `queue_timeout`.
+        """
+        unique_ordered_product_ids = order_product_ids(product_ids)
+        if len(unique_ordered_product_ids) <= self.inline_max_products:
+            return generate_subsequences_with_engine(unique_ordered_product_ids, self.engine)
+
+        try:
+            await asyncio.wait_for(self._pending.acquire(), timeout=self.queue_timeout)
+        except TimeoutError:
+            logger.warning(f"Subsequences executor busy, rejecting {len(unique_ordered_product_ids)} products")
+            raise SubsequencesExecutorBusy("Too many subsequences generations pending")
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_pool(),
+                _generate_compact,
+                unique_ordered_product_ids,
+            )
+        finally:
+            self._pending.release()
+
+    def shutdown(self) -> None:
+        if self._pool is None:
+            return
+
+        logger.info("Shutting down subsequences executor")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Forking a process that runs an event loop and the MongoDB client threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+
+def _generate_compact(
+    unique_ordered_product_ids: TProductIdsOrderedAndUnique,
+) -> tuple[TProductIdsOrderedAndUnique, CompactSubSequences]:
+    # Module level, so that it can be pickled to the pool workers
+    return generate_recommendation_subsequences_compact(unique_ordered_product_ids)
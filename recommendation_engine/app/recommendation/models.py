@@ -1,19 +1,78 @@
+import sys
+import typing as t
+from dataclasses import dataclass
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PlainSerializer
 
 from recommendation_engine.app.core.database.collections import PyObjectId
+from recommendation_engine.app.recommendation.algorithm import format_product_ids_fingerprint
 from recommendation_engine.app.recommendation.types import (
+    BatchItemStatus,
+    CompactSubSequences,
     TProductIdsFingerPrint,
     TProductIdsOrderedAndUnique,
     TRecommendationSubSequences,
 )
 
 
+# Binary fingerprints are kept as bytes in Python (stored as BSON Binary) and hex encoded in JSON
+type TFingerprintField = t.Annotated[
+    TProductIdsFingerPrint,
+    PlainSerializer(format_product_ids_fingerprint, return_type=str, when_used="json"),
+]
+
+
 class RecommendationModel(BaseModel):
     id: PyObjectId | None = Field(alias="_id", default=None)
 
-    fingerprint: TProductIdsFingerPrint = Field(..., description="SHA1 hash of the original sequence (unique)")
+    fingerprint: TFingerprintField = Field(..., description="Hash of the original sequence (unique)")
     sequence: TProductIdsOrderedAndUnique = Field(..., description="The original sequence of product_ids")
     subsequences: TRecommendationSubSequences = Field(..., description="All generated subsequences")
     createdAt: datetime = Field(..., description="Insertion timestamp in UTC")
+
+
+class RecommendationSummaryModel(BaseModel):
+    """A recommendation document without its subsequences."""
+
+    id: PyObjectId | None = Field(alias="_id", default=None)
+
+    fingerprint: TFingerprintField = Field(..., description="Hash of the original sequence (unique)")
+    sequence: TProductIdsOrderedAndUnique = Field(..., description="The original sequence of product_ids")
+    createdAt: datetime = Field(..., description="Insertion timestamp in UTC")
+
+
+@dataclass(frozen=True)
+class GeneratedRecommendation:
+    """The output of the generation of a basket, before it is persisted."""
+
+    fingerprint: TProductIdsFingerPrint
+    sequence: TProductIdsOrderedAndUnique
+    subsequences: TRecommendationSubSequences | CompactSubSequences
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the subsequences.
+
+        Exact for the compact layout. For lists, it counts every list header
+        and item pointer, the int objects are shared with the sequence.
+        """
+        if isinstance(self.subsequences, CompactSubSequences):
+            return self.subsequences.nbytes
+
+        count = len(self.sequence)
+        subsequences_count = len(self.subsequences)
+        values_count = count * (1 << count) // 2
+        pointer_size = 8
+        return sys.getsizeof([]) * (subsequences_count + 1) + (subsequences_count + values_count) * pointer_size
+
+
+@dataclass(frozen=True)
+class BatchCreateResult:
+    """The outcome of one basket of a batch create, in the position it was sent."""
+
+    status: BatchItemStatus
+    fingerprint: TProductIdsFingerPrint
+    sequence: TProductIdsOrderedAndUnique
+    document: RecommendationModel | None = None
+    detail: str | None = None
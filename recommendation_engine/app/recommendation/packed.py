@@ -0,0 +1,190 @@
+r"""Packed binary format of the recommendations, `application/vnd.recommendation+octet-stream`.
+
+A response is a list of records, one after the other. Every record starts
+with a fixed 40 bytes header, all integers little-endian:
+
+    offset  size  field
+         0     4  magic, b"RCMD"
+         4     1  version, 1
+         5     1  layout of the subsequences: 0 none, 1 bitmask, 2 offsets
+         6     2  length F of the fingerprint
+         8     4  size of the whole record in bytes, padding included
+        12    12  ID (ObjectId bytes, zeros when unknown)
+        24     8  creation date, milliseconds since the epoch (int64)
+        32     4  number N of products of the sequence (uint32)
+        36     4  number M of subsequences that follow (uint32)
+
+followed by:
+    - the hex fingerprint, F ASCII bytes, zero padded to a multiple of 8
+    - the sequence, N int64
+    - the subsequences, as positions in the sequence rather than product IDs:
+        - bitmask: M masks of `bitmask_width(N)` bytes, bit `i` set when the
+          subsequence contains `sequence[i]` (see `encode_subsequences_bitmask`)
+        - offsets: M + 1 int32 offsets then the int32 positions, the
+          subsequence `i` is `sequence[positions[offsets[i]:offsets[i + 1]]]`
+    - zero padding up to a multiple of 8 bytes
+
+Every array is aligned to the size of its items, so clients read them
+without copies (e.g. `numpy.frombuffer`). `unpack_recommendations` is the
+reference decoder.
+"""
+
+import struct
+import typing as t
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import IntEnum
+from itertools import chain
+
+import numpy as np
+from bson import ObjectId
+
+from recommendation_engine.app.recommendation.algorithm import format_product_ids_fingerprint
+from recommendation_engine.app.recommendation.encoding import (
+    MAX_BITMASK_PRODUCTS,
+    bitmask_width,
+    decode_subsequences_bitmask,
+    encode_subsequences_bitmask,
+)
+from recommendation_engine.app.recommendation.models import RecommendationModel, RecommendationSummaryModel
+from recommendation_engine.app.recommendation.pagination import EPOCH
+from recommendation_engine.app.recommendation.types import CompactSubSequences
+
+
+PACKED_MEDIA_TYPE: t.Final[str] = "application/vnd.recommendation+octet-stream"
+PACKED_MAGIC: t.Final[bytes] = b"RCMD"
+PACKED_VERSION: t.Final[int] = 1
+_HEADER: t.Final[struct.Struct] = struct.Struct("<4sBBHI12sqII")
+
+
+class PackedLayout(IntEnum):
+    NONE = 0
+    BITMASK = 1
+    OFFSETS = 2
+
+
+class PackedFormatException(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class PackedRecommendation:
+    """A decoded record, the subsequences stay in the compact layout."""
+
+    id: str | None
+    fingerprint: str
+    sequence: list[int]
+    createdAt: datetime
+    subsequences: CompactSubSequences | None
+
+
+def pack_recommendation(
+    document: RecommendationModel | RecommendationSummaryModel,
+    layout: PackedLayout = PackedLayout.BITMASK,
+) -> bytes:
+    """Encodes one record, summaries and `PackedLayout.NONE` without subsequences.
+
+    Bitmasks fall back to offsets for sequences of more than `MAX_BITMASK_PRODUCTS` products.
+    """
+    if not isinstance(document, RecommendationModel):
+        layout = PackedLayout.NONE
+    elif layout == PackedLayout.BITMASK and len(document.sequence) > MAX_BITMASK_PRODUCTS:
+        layout = PackedLayout.OFFSETS
+
+    fingerprint = format_product_ids_fingerprint(document.fingerprint).encode("ascii")
+    parts = [_pad(fingerprint), np.asarray(document.sequence, dtype="<i8").tobytes()]
+    subsequences_count = 0
+    if isinstance(document, RecommendationModel) and layout != PackedLayout.NONE:
+        subsequences_count = len(document.subsequences)
+        if layout == PackedLayout.BITMASK:
+            parts.append(_pad(encode_subsequences_bitmask(document.sequence, document.subsequences)))
+        else:
+            parts.append(_pad(_encode_offsets(document.sequence, document.subsequences)))
+
+    created_at = document.createdAt if document.createdAt.tzinfo else document.createdAt.replace(tzinfo=timezone.utc)
+    header = _HEADER.pack(
+        PACKED_MAGIC,
+        PACKED_VERSION,
+        layout,
+        len(fingerprint),
+        _HEADER.size + sum(len(part) for part in parts),
+        ObjectId(document.id).binary if document.id is not None else bytes(12),
+        (created_at - EPOCH) // timedelta(milliseconds=1),
+        len(document.sequence),
+        subsequences_count,
+    )
+    return b"".join((header, *parts))
+
+
+def pack_recommendations(
+    documents: t.Iterable[RecommendationModel | RecommendationSummaryModel],
+    layout: PackedLayout = PackedLayout.BITMASK,
+) -> bytes:
+    return b"".join(pack_recommendation(document, layout) for document in documents)
+
+
+def unpack_recommendations(data: bytes) -> list[PackedRecommendation]:
+    """Decodes the records of `pack_recommendations`.
+
+    Raises:
+        PackedFormatException: If the data is not a list of records of a known version.
+    """
+    view = memoryview(data)
+    records: list[PackedRecommendation] = []
+    offset = 0
+    while offset < len(view):
+        try:
+            magic, version, layout, fingerprint_length, size, object_id, created_at, count, subsequences_count = (
+                _HEADER.unpack_from(view, offset)
+            )
+        except struct.error as error:
+            raise PackedFormatException(f"Truncated record at byte {offset}") from error
+        if magic != PACKED_MAGIC or version != PACKED_VERSION or offset + size > len(view):
+            raise PackedFormatException(f"Invalid record at byte {offset}")
+
+        position = offset + _HEADER.size
+        fingerprint = bytes(view[position : position + fingerprint_length]).decode("ascii")
+        position += _padded_length(fingerprint_length)
+        sequence = np.frombuffer(view, dtype="<i8", count=count, offset=position)
+        position += sequence.nbytes
+
+        subsequences: CompactSubSequences | None = None
+        if layout == PackedLayout.BITMASK:
+            width = bitmask_width(count)
+            masks = bytes(view[position : position + subsequences_count * width])
+            subsequences = decode_subsequences_bitmask(sequence.tolist(), masks)
+        elif layout == PackedLayout.OFFSETS:
+            offsets = np.frombuffer(view, dtype="<i4", count=subsequences_count + 1, offset=position)
+            position += offsets.nbytes
+            positions = np.frombuffer(view, dtype="<i4", count=int(offsets[-1]), offset=position)
+            subsequences = CompactSubSequences(values=sequence[positions], offsets=offsets.astype(np.int64))
+
+        records.append(
+            PackedRecommendation(
+                id=str(ObjectId(object_id)) if any(object_id) else None,
+                fingerprint=fingerprint,
+                sequence=sequence.tolist(),
+                createdAt=EPOCH + timedelta(milliseconds=created_at),
+                subsequences=subsequences,
+            )
+        )
+        offset += size
+    return records
+
+
+def _encode_offsets(sequence: list[int], subsequences: list[list[int]]) -> bytes:
+    lengths = np.fromiter((len(subsequence) for subsequence in subsequences), dtype=np.int64, count=len(subsequences))
+    offsets = np.zeros(len(subsequences) + 1, dtype="<i4")
+    np.cumsum(lengths, out=offsets[1:])
+    values = np.fromiter(chain.from_iterable(subsequences), dtype=np.int64, count=int(offsets[-1]))
+    # The sequence is ordered, so the position of each product is found by binary search
+    positions = np.searchsorted(np.asarray(sequence, dtype=np.int64), values).astype("<i4")
+    return offsets.tobytes() + positions.tobytes()
+
+
+def _padded_length(length: int) -> int:
+    return (length + 7) // 8 * 8
+
+
+def _pad(data: bytes) -> bytes:
+    return data + bytes(_padded_length(len(data)) - len(data))
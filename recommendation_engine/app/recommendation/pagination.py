@@ -0,0 +1,54 @@
+import base64
+import binascii
+import struct
+import typing as t
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+
+EPOCH: t.Final[datetime] = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Milliseconds since the epoch (the precision of BSON dates) followed by the 12 bytes of the ObjectId
+_CURSOR_FORMAT: t.Final[struct.Struct] = struct.Struct(">q12s")
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    """Position of the last document of a page of documents sorted by (`createdAt`, `_id`), newest first.
+
+    Encoded as an opaque URL safe token, the next page is read with a range
+    query on the compound (`createdAt`, `_id`) index, so any page costs the
+    same as the first one.
+    """
+
+    created_at: datetime
+    id: ObjectId
+
+    def encode(self) -> str:
+        created_at = self.created_at if self.created_at.tzinfo else self.created_at.replace(tzinfo=timezone.utc)
+        milliseconds = (created_at - EPOCH) // timedelta(milliseconds=1)
+        return base64.urlsafe_b64encode(_CURSOR_FORMAT.pack(milliseconds, self.id.binary)).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> t.Self:
+        """Decodes a token made by `encode`.
+
+        Raises:
+            ValueError: If the token is not a valid cursor.
+        """
+        try:
+            data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            milliseconds, object_id = _CURSOR_FORMAT.unpack(data)
+            return cls(created_at=EPOCH + timedelta(milliseconds=milliseconds), id=ObjectId(object_id))
+        except (binascii.Error, struct.error, OverflowError) as error:
+            raise ValueError(f"Invalid cursor {token!r}") from error
+
+    def query(self) -> dict[str, t.Any]:
+        """Filter of the documents after the cursor."""
+        return {
+            "$or": [
+                {"createdAt": {"$lt": self.created_at}},
+                {"createdAt": self.created_at, "_id": {"$lt": self.id}},
+            ]
+        }
@@ -1,29 +1,73 @@
+import asyncio
 import json
 import logging
 import typing as t
 from datetime import datetime, timezone
 
+import bson
 from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
 from pymongo import ASCENDING, DESCENDING
-from pymongo.errors import DuplicateKeyError, PyMongoError, WriteError
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError, WriteError
 
+from recommendation_engine.app.core.bloom import BloomFilter
+from recommendation_engine.app.core.database.database_client_base import DatabaseClientBase
 from recommendation_engine.app.core.database.repository_base import RepositoryBase
-from recommendation_engine.app.recommendation.models import RecommendationModel
+from recommendation_engine.app.recommendation.algorithm import format_product_ids_fingerprint
+from recommendation_engine.app.recommendation.chunks import (
+    RecommendationChunksException,
+    RecommendationChunksRepository,
+)
+from recommendation_engine.app.recommendation.encoding import (
+    MAX_BITMASK_PRODUCTS,
+    decode_subsequences_bitmask,
+    encode_subsequences_bitmask,
+)
+from recommendation_engine.app.recommendation.models import (
+    GeneratedRecommendation,
+    RecommendationModel,
+    RecommendationSummaryModel,
+)
+from recommendation_engine.app.recommendation.pagination import PageCursor
+from recommendation_engine.app.recommendation.subsequences import DerivedSubsequences
 from recommendation_engine.app.recommendation.types import (
+    CompactSubSequences,
+    RecommendationStorage,
+    SearchMatch,
+    SubsequencesEncoding,
     TProductIdsFingerPrint,
     TProductIdsOrderedAndUnique,
     TRecommendationSubSequences,
 )
+from recommendation_engine.settings import Settings
 
 
 logger = logging.getLogger(__name__)
 
+DUPLICATE_KEY_ERROR_CODE = 11000
+# Fields of `RecommendationSummaryModel`, everything but the subsequences
+SUMMARY_PROJECTION: t.Final[dict[str, int]] = {"fingerprint": 1, "sequence": 1, "createdAt": 1}
+
 
 class RecommendationRepositoryException(Exception):
     pass
 
 
 class RecommendationDuplicate(RecommendationRepositoryException):
+    def __init__(
+        self,
+        message: str,
+        fingerprint: TProductIdsFingerPrint | None = None,
+        product_ids: TProductIdsOrderedAndUnique | None = None,
+        document: RecommendationModel | None = None,
+    ) -> None:
+        super().__init__(message)
+        self.fingerprint: TProductIdsFingerPrint | None = fingerprint
+        self.product_ids: TProductIdsOrderedAndUnique | None = product_ids
+        self.document: RecommendationModel | None = document
+
+
+class RecommendationUpdateConflict(RecommendationRepositoryException):
     pass
 
 
@@ -31,55 +75,210 @@ class RecommendationRepository(RepositoryBase):
     COLLECTION_NAME: t.ClassVar[str] = "recommendations"
     COLLECTION_INDEXES: t.ClassVar[list[dict[str, t.Any]]] = [
         {"key": "fingerprint", "unique": True, "order": ASCENDING},
-        {"key": "createdAt", "unique": False, "order": DESCENDING},
+        # Newest first listing, the `_id` breaks the ties of the page cursors
+        {"key": [("createdAt", DESCENDING), ("_id", DESCENDING)], "unique": False},
+        # Multikey, one entry per product ID of the sequence, then the order and cursors of the search pages
+        {"key": [("sequence", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)], "unique": False},
     ]
     COLLECTION_VALIDATOR: t.ClassVar[dict[str, t.Any]] = {
         "$jsonSchema": {
             "bsonType": "object",
-            "required": ["fingerprint", "sequence", "subsequences", "createdAt"],
+            "required": ["fingerprint", "sequence", "createdAt"],
             "properties": {
                 "_id": {"bsonType": "objectId"},
-                "fingerprint": {"bsonType": "string"},
+                "fingerprint": {"bsonType": ["string", "binData"]},
                 "sequence": {"bsonType": "array", "items": {"bsonType": "int"}, "minItems": 1},
-                "subsequences": {"bsonType": "array", "items": {"bsonType": "array", "items": {"bsonType": "int"}}},
+                # Either an array of arrays of product IDs, or the bitmasks of `SubsequencesEncoding.BITMASK`
+                "subsequences": {
+                    "bsonType": ["array", "binData"],
+                    "items": {"bsonType": "array", "items": {"bsonType": "int"}},
+                },
+                "storage": {"enum": [storage.value for storage in RecommendationStorage]},
+                "chunksId": {"bsonType": "objectId"},
                 "createdAt": {"bsonType": "date"},
             },
             "additionalProperties": False,
         }
     }
 
+    def __init__(
+        self,
+        database_client: DatabaseClientBase,
+        storage: RecommendationStorage | None = None,
+        fingerprint_filter: BloomFilter | None = None,
+        chunk_size: int | None = None,
+        encoding: SubsequencesEncoding | None = None,
+        inline_max_products: int | None = None,
+    ) -> None:
+        super().__init__(database_client)
+        self.storage: RecommendationStorage = storage or Settings.get().app_recommendation_storage
+        # Subsequences of the documents with chunked storage
+        self.chunks: RecommendationChunksRepository = RecommendationChunksRepository(database_client)
+        self.chunk_size: int = chunk_size or Settings.get().app_recommendation_chunk_size
+        # Encoding of the subsequences with inline storage, documents of either encoding are decoded on read
+        self.encoding: SubsequencesEncoding = encoding or Settings.get().app_subsequences_encoding
+        # Documents of baskets with more products than this are built and encoded on a thread, off the event loop
+        self.inline_max_products: int = (
+            inline_max_products if inline_max_products is not None else Settings.get().app_executor_inline_max_products
+        )
+        # Fingerprints of every document, skips the lookup of the fingerprints it does not contain once loaded
+        self.fingerprint_filter: BloomFilter | None = fingerprint_filter
+        self.fingerprint_filter_loaded: bool = False
+
     async def create(
         self,
         fingerprint: TProductIdsFingerPrint,
         product_ids: TProductIdsOrderedAndUnique,
-        recommendations: TRecommendationSubSequences,
+        recommendations: TRecommendationSubSequences | CompactSubSequences,
     ) -> RecommendationModel:
-        document_model = RecommendationModel(
-            fingerprint=fingerprint,
-            sequence=product_ids,
-            subsequences=recommendations,
-            createdAt=datetime.now(timezone.utc),
+        recommendation = GeneratedRecommendation(
+            fingerprint=fingerprint, sequence=product_ids, subsequences=recommendations
         )
-
-        document_serialized = document_model.model_dump(by_alias=True, exclude={"id", "_id"})
+        [(document_model, document_serialized)] = await self._build_documents([recommendation])
+        await self._insert_chunks(self._chunks_of([recommendation], [document_serialized]))
 
         try:
             result = await self.collection.insert_one(document_serialized)
         except DuplicateKeyError as error:
+            await self._delete_chunks([document_serialized])
             logger.debug(
-                f"Product_ids {product_ids} (fingerprint={fingerprint}) Already exists\nError: {error!r}",
+                f"Product_ids {product_ids} (fingerprint={format_product_ids_fingerprint(fingerprint)}) "
+                f"Already exists\nError: {error!r}",
             )
-            raise RecommendationDuplicate("Document already exists.")
+            raise RecommendationDuplicate("Document already exists.", fingerprint=fingerprint, product_ids=product_ids)
         except WriteError as error:
+            await self._delete_chunks([document_serialized])
             document_prettified = json.dumps(document_serialized, indent=4, default=str)
             logger.error(
                 f"Exception while inserting document: \n{document_prettified}\nError: {error!r}",
             )
             raise RecommendationRepositoryException("WriteError while inserting document")
 
+        self._add_to_fingerprint_filter(fingerprint)
         document_model.id = str(result.inserted_id)
         return document_model
 
+    async def create_many(
+        self,
+        recommendations: list[GeneratedRecommendation],
+    ) -> list[RecommendationModel | RecommendationRepositoryException]:
+        """Inserts many documents with a single unordered `insert_many`.
+
+        A failing document does not stop the others from being inserted. With chunked
+        storage, the chunks of every document are written first, in bounded `insert_many` batches.
+
+        Returns:
+            For each recommendation, in the same order, the created document or the
+            `RecommendationDuplicate` / `RecommendationRepositoryException` it failed with.
+
+        Raises:
+            RecommendationRepositoryException: If the insert failed as a whole.
+        """
+        if not recommendations:
+            return []
+
+        documents = await self._build_documents(recommendations)
+        documents_serialized = [document_serialized for _, document_serialized in documents]
+        await self._insert_chunks(self._chunks_of(recommendations, documents_serialized))
+
+        failed: dict[int, RecommendationRepositoryException] = {}
+        try:
+            await self.collection.insert_many(documents_serialized, ordered=False)
+        except BulkWriteError as error:
+            for write_error in error.details.get("writeErrors", []):
+                index = write_error["index"]
+                recommendation = recommendations[index]
+                if write_error["code"] == DUPLICATE_KEY_ERROR_CODE:
+                    failed[index] = RecommendationDuplicate(
+                        "Document already exists.",
+                        fingerprint=recommendation.fingerprint,
+                        product_ids=recommendation.sequence,
+                    )
+                else:
+                    logger.error(f"Exception while inserting document {index} of batch, error: {write_error!r}")
+                    failed[index] = RecommendationRepositoryException("WriteError while inserting document")
+        except PyMongoError as error:
+            await self._delete_chunks(documents_serialized)
+            logger.error(f"Exception while inserting batch of {len(documents)} documents, error: {error!r}")
+            raise RecommendationRepositoryException("PyMongoError while inserting documents")
+        await self._delete_chunks([documents_serialized[index] for index in failed])
+
+        results: list[RecommendationModel | RecommendationRepositoryException] = []
+        for index, (document_model, document_serialized) in enumerate(documents):
+            if index in failed:
+                results.append(failed[index])
+                continue
+            self._add_to_fingerprint_filter(document_model.fingerprint)
+            # insert_many sets the generated `_id` on each inserted document
+            document_model.id = str(document_serialized["_id"])
+            results.append(document_model)
+        return results
+
+    async def update(
+        self,
+        object_id: str,
+        current_fingerprint: TProductIdsFingerPrint,
+        fingerprint: TProductIdsFingerPrint,
+        product_ids: TProductIdsOrderedAndUnique,
+        recommendations: TRecommendationSubSequences | CompactSubSequences | None = None,
+    ) -> None:
+        """Replaces the sequence and subsequences of a document in place.
+
+        The update only applies while the document still has `current_fingerprint`,
+        so that concurrent updates of the same document do not overwrite each other.
+        When `recommendations` is not given and the storage is inline or chunked, they
+        are computed out of the sequence. With chunked storage, the new chunks are
+        written under a new `chunksId` before the document is switched to them, and
+        the previous chunks are deleted afterward.
+
+        Raises:
+            RecommendationDuplicate: If another document already has the new fingerprint.
+            RecommendationUpdateConflict: If the document does not exist or was updated in the meantime.
+            RecommendationRepositoryException: If the document could not be updated.
+        """
+        fields: dict[str, t.Any] = {"fingerprint": fingerprint, "sequence": product_ids, "storage": self.storage.value}
+        update: dict[str, t.Any] = {"$set": fields}
+
+        subsequences: TRecommendationSubSequences | CompactSubSequences = []
+        if self.storage != RecommendationStorage.DERIVED:
+            subsequences = await self._derive_subsequences(product_ids) if recommendations is None else recommendations
+
+        new_chunks: list[dict[str, t.Any]] = []
+        if self.storage == RecommendationStorage.INLINE:
+            fields["subsequences"] = self._encode_subsequences(product_ids, subsequences)
+            update["$unset"] = {"chunksId": ""}
+        elif self.storage == RecommendationStorage.DERIVED:
+            update["$unset"] = {"subsequences": "", "chunksId": ""}
+        else:
+            fields["chunksId"] = ObjectId()
+            update["$unset"] = {"subsequences": ""}
+            new_chunks.append(fields)
+            await self._insert_chunks([(fields["chunksId"], len(product_ids), subsequences)])
+
+        try:
+            previous = await self.collection.find_one_and_update(
+                {"_id": ObjectId(object_id), "fingerprint": current_fingerprint},
+                update,
+                projection={"_id": 0, "chunksId": 1},
+            )
+        except DuplicateKeyError as error:
+            await self._delete_chunks(new_chunks)
+            logger.debug(
+                f"Product_ids {product_ids} (fingerprint={format_product_ids_fingerprint(fingerprint)}) "
+                f"Already exists\nError: {error!r}",
+            )
+            raise RecommendationDuplicate("Document already exists.", fingerprint=fingerprint, product_ids=product_ids)
+        except PyMongoError as error:
+            await self._delete_chunks(new_chunks)
+            logger.error(f"Exception while updating document {object_id}, error: {error!r}")
+            raise RecommendationRepositoryException("PyMongoError while updating document")
+
+        if previous is None:
+            await self._delete_chunks(new_chunks)
+            raise RecommendationUpdateConflict(f"Document {object_id} was modified or deleted concurrently")
+        await self._delete_chunks([previous])
+        self._add_to_fingerprint_filter(fingerprint)
+
     async def get(self, object_id: str) -> RecommendationModel | None:
         try:
             document = await self.collection.find_one({"_id": ObjectId(object_id)})
@@ -89,8 +288,337 @@ class RecommendationRepository(RepositoryBase):
 
         if not document:
             return None
-        return RecommendationModel(**document)
+        return await self._load_model(document)
+
+    async def get_by_fingerprint(self, fingerprint: TProductIdsFingerPrint) -> RecommendationModel | None:
+        try:
+            document = await self.collection.find_one({"fingerprint": fingerprint})
+        except PyMongoError as error:
+            logger.error(
+                f"Exception while getting document {format_product_ids_fingerprint(fingerprint)}, error: {error!r}"
+            )
+            raise RecommendationRepositoryException("PyMongoError while getting document")
+
+        if not document:
+            return None
+        return await self._load_model(document)
+
+    async def exists(self, fingerprint: TProductIdsFingerPrint) -> bool:
+        """Checks whether a document has the fingerprint, reading only the `fingerprint` index."""
+        return bool(await self.find_existing_fingerprints([fingerprint]))
+
+    async def find_existing_fingerprints(
+        self,
+        fingerprints: list[TProductIdsFingerPrint],
+    ) -> set[TProductIdsFingerPrint]:
+        """Returns which of the fingerprints already have a document.
+
+        Only the `fingerprint` field is projected, so the query is covered by
+        the unique index and no document is fetched. With a loaded fingerprint
+        filter, the fingerprints it does not contain are not looked up, so
+        new baskets usually need no query at all.
+        """
+        if self.fingerprint_filter is not None and self.fingerprint_filter_loaded:
+            fingerprints = [fingerprint for fingerprint in fingerprints if fingerprint in self.fingerprint_filter]
+        if not fingerprints:
+            return set()
+
+        try:
+            cursor = self.collection.find(
+                {"fingerprint": {"$in": fingerprints}},
+                projection={"_id": 0, "fingerprint": 1},
+            )
+            documents = await cursor.to_list()
+        except PyMongoError as error:
+            logger.error(f"Exception while looking up {len(fingerprints)} fingerprints, error: {error!r}")
+            raise RecommendationRepositoryException("PyMongoError while looking up fingerprints")
+        return {document["fingerprint"] for document in documents}
+
+    async def load_fingerprint_filter(self, batch_size: int = 10_000) -> None:
+        """Adds the fingerprint of every document to the fingerprint filter.
+
+        The fingerprints are streamed from the `fingerprint` index only. Until
+        it completes the filter is not used to skip lookups. Documents inserted
+        by other processes are not added afterward, those are still rejected
+        by the unique index on insert.
+
+        Raises:
+            RecommendationRepositoryException: If the fingerprints could not be read.
+        """
+        if self.fingerprint_filter is None:
+            return
+
+        try:
+            cursor = self.collection.find(
+                {},
+                projection={"_id": 0, "fingerprint": 1},
+                batch_size=batch_size,
+            ).hint([("fingerprint", ASCENDING)])
+            async for document in cursor:
+                self.fingerprint_filter.add(document["fingerprint"])
+        except PyMongoError as error:
+            logger.error(f"Exception while loading the fingerprint filter, error: {error!r}")
+            raise RecommendationRepositoryException("PyMongoError while loading the fingerprint filter")
+
+        self.fingerprint_filter_loaded = True
+        logger.info(f"Fingerprint filter loaded: {self.fingerprint_filter.stats()}")
+
+    def _add_to_fingerprint_filter(self, fingerprint: TProductIdsFingerPrint) -> None:
+        if self.fingerprint_filter is not None:
+            self.fingerprint_filter.add(fingerprint)
+
+    async def _insert_chunks(
+        self,
+        chunks: list[tuple[ObjectId, int, TRecommendationSubSequences | CompactSubSequences]],
+    ) -> None:
+        if not chunks:
+            return
+
+        try:
+            await self.chunks.insert(chunks, self.chunk_size)
+        except RecommendationChunksException:
+            # Some of the chunks may have been written
+            await self.chunks.delete([chunks_id for chunks_id, _, _ in chunks])
+            raise RecommendationRepositoryException("Error while inserting subsequences chunks")
+
+    async def _delete_chunks(self, documents: t.Sequence[t.Mapping[str, t.Any]]) -> None:
+        await self.chunks.delete([document["chunksId"] for document in documents if document.get("chunksId")])
+
+    @staticmethod
+    def _chunks_of(
+        recommendations: list[GeneratedRecommendation],
+        documents: list[t.Mapping[str, t.Any]],
+    ) -> list[tuple[ObjectId, int, TRecommendationSubSequences | CompactSubSequences]]:
+        # From the generator output rather than the model, so that a compact layout is converted a chunk at a time
+        return [
+            (document_serialized["chunksId"], len(recommendation.sequence), recommendation.subsequences)
+            for recommendation, document_serialized in zip(recommendations, documents, strict=True)
+            if "chunksId" in document_serialized
+        ]
+
+    async def get_summary(self, object_id: str) -> RecommendationSummaryModel | None:
+        """Gets a document without fetching its subsequences."""
+        try:
+            document = await self.collection.find_one({"_id": ObjectId(object_id)}, projection={"subsequences": 0})
+        except PyMongoError as error:
+            logger.error(f"Exception while getting document summary {object_id}, error: {error!r}")
+            raise RecommendationRepositoryException("PyMongoError while getting document summary")
+
+        if not document:
+            return None
+        return RecommendationSummaryModel(**document)
+
+    async def search(
+        self,
+        product_ids: list[int],
+        match: SearchMatch,
+        limit: int,
+        after: PageCursor | None = None,
+    ) -> list[RecommendationSummaryModel]:
+        """Finds the documents whose sequence contains all (or any) of the product IDs.
+
+        The lookup goes through the multikey (`sequence`, `createdAt`, `_id`)
+        index and the subsequences are not fetched. Documents are returned
+        newest first and paged like `paginate`, `after` being the cursor of the
+        last document of the previous page.
+
+        Raises:
+            RecommendationRepositoryException: If the documents could not be read.
+        """
+        operator = "$all" if match == SearchMatch.ALL else "$in"
+        query: dict[str, t.Any] = {"sequence": {operator: product_ids}}
+        if after is not None:
+            query |= after.query()
+
+        try:
+            cursor = (
+                self.collection.find(query, projection=SUMMARY_PROJECTION)
+                .sort([("createdAt", DESCENDING), ("_id", DESCENDING)])
+                .limit(limit)
+            )
+            documents = await cursor.to_list()
+        except PyMongoError as error:
+            logger.error(f"Exception while searching documents containing {product_ids}, error: {error!r}")
+            raise RecommendationRepositoryException("PyMongoError while searching documents")
+        return [RecommendationSummaryModel(**document) for document in documents]
+
+    async def export(
+        self,
+        since: datetime | None = None,
+        with_subsequences: bool = True,
+        batch_size: int = 1000,
+    ) -> t.AsyncIterator[RecommendationModel | RecommendationSummaryModel]:
+        """Streams every document, oldest first, optionally only those created at or after `since`.
+
+        Documents are fetched from the server `batch_size` at a time and yielded
+        one by one, so memory does not grow with the collection. Without
+        subsequences, only the summary fields are fetched.
+
+        Raises:
+            RecommendationRepositoryException: If the documents could not be read.
+        """
+        query = {"createdAt": {"$gte": since}} if since is not None else {}
+        projection = None if with_subsequences else SUMMARY_PROJECTION
+        try:
+            cursor = self.collection.find(query, projection=projection, batch_size=batch_size).sort(
+                [("createdAt", ASCENDING), ("_id", ASCENDING)]
+            )
+            async for document in cursor:
+                if with_subsequences:
+                    yield await self._load_model(document)
+                else:
+                    yield RecommendationSummaryModel(**document)
+        except PyMongoError as error:
+            logger.error(f"Exception while exporting documents, error: {error!r}")
+            raise RecommendationRepositoryException("PyMongoError while exporting documents")
+
+    async def paginate(self, limit: int, after: PageCursor | None = None) -> list[RecommendationModel]:
+        """Lists the newest documents, or the ones following the `after` cursor."""
+        query = after.query() if after is not None else {}
+        docs = await (self.collection.find(query).sort([("createdAt", -1), ("_id", -1)]).limit(limit)).to_list()
+        return [await self._load_model(d) for d in docs]
+
+    async def paginate_summaries(
+        self,
+        limit: int,
+        after: PageCursor | None = None,
+    ) -> list[RecommendationSummaryModel]:
+        """Lists the newest documents like `paginate`, without fetching their subsequences.
+
+        Raises:
+            RecommendationRepositoryException: If the documents could not be read.
+        """
+        query = after.query() if after is not None else {}
+        try:
+            cursor = (
+                self.collection.find(query, projection=SUMMARY_PROJECTION)
+                .sort([("createdAt", -1), ("_id", -1)])
+                .limit(limit)
+            )
+            documents = await cursor.to_list()
+        except PyMongoError as error:
+            logger.error(f"Exception while listing document summaries, error: {error!r}")
+            raise RecommendationRepositoryException("PyMongoError while listing document summaries")
+        return [RecommendationSummaryModel(**document) for document in documents]
+
+    async def _build_documents(
+        self,
+        recommendations: list[GeneratedRecommendation],
+    ) -> list[tuple[RecommendationModel, t.Mapping[str, t.Any]]]:
+        """Builds the model and the stored document of each generated recommendation.
+
+        When a basket has more than `inline_max_products` products, the documents are
+        built on a thread and already encoded to BSON there, so that neither the lists
+        of the subsequences nor the encoding of the insert hold the event loop.
+        """
+        if all(len(recommendation.sequence) <= self.inline_max_products for recommendation in recommendations):
+            return [
+                self._build_document(recommendation.fingerprint, recommendation.sequence, recommendation.subsequences)
+                for recommendation in recommendations
+            ]
+        return await asyncio.to_thread(self._build_raw_documents, recommendations)
+
+    def _build_raw_documents(
+        self,
+        recommendations: list[GeneratedRecommendation],
+    ) -> list[tuple[RecommendationModel, t.Mapping[str, t.Any]]]:
+        documents: list[tuple[RecommendationModel, t.Mapping[str, t.Any]]] = []
+        for recommendation in recommendations:
+            document_model, document_serialized = self._build_document(
+                recommendation.fingerprint, recommendation.sequence, recommendation.subsequences
+            )
+            # Raw documents are inserted as they are, the driver does not generate their `_id`
+            document_serialized.setdefault("_id", ObjectId())
+            documents.append((document_model, RawBSONDocument(bson.encode(document_serialized))))
+        return documents
+
+    def _build_document(
+        self,
+        fingerprint: TProductIdsFingerPrint,
+        product_ids: TProductIdsOrderedAndUnique,
+        recommendations: TRecommendationSubSequences | CompactSubSequences,
+    ) -> tuple[RecommendationModel, dict[str, t.Any]]:
+        """Builds the model and the stored document of a generated recommendation.
+
+        The generator output is trusted, so neither of them validates the
+        subsequences again: the model shares the lists of the stored
+        document, and the response is later encoded straight from it.
+        """
+        subsequences = recommendations.tolist() if isinstance(recommendations, CompactSubSequences) else recommendations
+        created_at = datetime.now(timezone.utc)
+        document_model = RecommendationModel.model_construct(
+            fingerprint=fingerprint,
+            sequence=product_ids,
+            subsequences=subsequences,
+            createdAt=created_at,
+        )
+
+        # Subsequences are fully determined by the sequence (derived), kept in the chunks collection (chunked)
+        # or encoded apart (inline)
+        document_serialized: dict[str, t.Any] = {
+            "fingerprint": fingerprint,
+            "sequence": product_ids,
+            "createdAt": created_at,
+            "storage": self.storage.value,
+        }
+        if self.storage == RecommendationStorage.INLINE:
+            # Bitmasks are encoded from the compact layout when there is one, arrays are the lists of the model
+            document_serialized["subsequences"] = self._encode_subsequences(
+                product_ids,
+                recommendations if self.encoding == SubsequencesEncoding.BITMASK else subsequences,
+            )
+        if self.storage == RecommendationStorage.CHUNKED:
+            # The chunks of a new document are keyed by its own `_id`
+            document_serialized["_id"] = document_serialized["chunksId"] = ObjectId()
+        return document_model, document_serialized
+
+    def _encode_subsequences(
+        self,
+        product_ids: TProductIdsOrderedAndUnique,
+        subsequences: TRecommendationSubSequences | CompactSubSequences,
+    ) -> TRecommendationSubSequences | bytes:
+        if self.encoding == SubsequencesEncoding.BITMASK and len(product_ids) <= MAX_BITMASK_PRODUCTS:
+            return encode_subsequences_bitmask(product_ids, subsequences)
+        if isinstance(subsequences, CompactSubSequences):
+            return subsequences.tolist()
+        return subsequences
+
+    async def _load_model(self, document: dict[str, t.Any]) -> RecommendationModel:
+        """Builds the model of a stored document, reading its chunks if any.
+
+        When the basket has more than `inline_max_products` products, the
+        subsequences are derived or decoded on a thread, so that their lists
+        are not built on the event loop.
+        """
+        if document.get("storage") == RecommendationStorage.CHUNKED:
+            try:
+                document["subsequences"] = await self.chunks.read(document["chunksId"])
+            except RecommendationChunksException:
+                raise RecommendationRepositoryException("Error while reading subsequences chunks")
+        if len(document["sequence"]) <= self.inline_max_products:
+            return self._to_model(document)
+        return await asyncio.to_thread(self._to_model, document)
+
+    async def _derive_subsequences(self, product_ids: TProductIdsOrderedAndUnique) -> TRecommendationSubSequences:
+        if len(product_ids) <= self.inline_max_products:
+            return list(DerivedSubsequences(product_ids))
+        return await asyncio.to_thread(list, DerivedSubsequences(product_ids))
+
+    @staticmethod
+    def _to_model(document: dict[str, t.Any]) -> RecommendationModel:
+        """Builds the model of a stored document without validating it again.
 
-    async def paginate(self, limit: int) -> list[RecommendationModel]:
-        docs = await (self.collection.find().sort([("createdAt", -1), ("_id", -1)]).limit(limit)).to_list()
-        return [RecommendationModel(**d) for d in docs]
+        Documents are checked by the collection validator when written, so
+        their (possibly millions of) product IDs are not validated once more.
+        """
+        storage = document.pop("storage", RecommendationStorage.INLINE)
+        document.pop("chunksId", None)
+        if storage == RecommendationStorage.DERIVED:
+            document["subsequences"] = list(DerivedSubsequences(document["sequence"]))
+        elif isinstance(document.get("subsequences"), bytes):
+            document["subsequences"] = decode_subsequences_bitmask(
+                document["sequence"], document["subsequences"]
+            ).tolist()
+        if "_id" in document:
+            document["id"] = str(document.pop("_id"))
+        return RecommendationModel.model_construct(**document)
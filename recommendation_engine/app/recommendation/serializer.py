@@ -0,0 +1,107 @@
+import json
+import logging
+import typing as t
+from itertools import batched
+
+import pydantic_core
+
+from recommendation_engine.app.recommendation.models import RecommendationModel, RecommendationSummaryModel
+from recommendation_engine.app.recommendation.repository import RecommendationRepositoryException
+from recommendation_engine.app.recommendation.types import CompactSubSequences, TRecommendationSubSequence
+
+
+NDJSON_MEDIA_TYPE: t.Final[str] = "application/x-ndjson"
+# Last line of a stream of documents interrupted by a database error
+NDJSON_ERROR_LINE: t.Final[bytes] = b'{"error":"Unexpected error, please try again later..."}\n'
+
+logger = logging.getLogger(__name__)
+
+
+def iter_recommendation_ndjson(
+    document: RecommendationModel | RecommendationSummaryModel,
+    subsequences: t.Iterable[TRecommendationSubSequence] | CompactSubSequences,
+    chunk_size: int,
+) -> t.Iterator[bytes]:
+    """Serializes a recommendation as newline delimited JSON, chunk by chunk.
+
+    The first line holds the document without its subsequences, every
+    following line holds a single subsequence. Lines are grouped in chunks
+    of `chunk_size` subsequences, so at most one chunk is held in memory
+    at a time.
+
+    Example:
+        {"_id":"68b...","fingerprint":"9ef...","sequence":[1,2],"createdAt":"2025-..."}
+        [1]
+        [2]
+        [1,2]
+    """
+    header = document.model_dump(mode="json", by_alias=True, exclude={"subsequences"})
+    yield _dumps(header) + b"\n"
+
+    for chunk in _iter_chunks(subsequences, chunk_size):
+        # Encodes the whole chunk at once, then splits the outer array into lines
+        yield _dumps(list(chunk))[1:-1].replace(b"],[", b"]\n[") + b"\n"
+
+
+def iter_recommendation_json(
+    document: RecommendationModel | RecommendationSummaryModel,
+    subsequences: t.Iterable[TRecommendationSubSequence] | CompactSubSequences,
+    chunk_size: int,
+) -> t.Iterator[bytes]:
+    """Serializes a recommendation as the JSON of `RecommendationModel`, chunk by chunk.
+
+    The output is the same as `model_dump_json(by_alias=True)`, but the
+    subsequences are encoded `chunk_size` at a time out of `subsequences`,
+    e.g. the compact output of the generator, so their lists are never all
+    built at once.
+    """
+    header = document.model_dump(mode="json", by_alias=True, exclude={"subsequences"})
+    created_at = header.pop("createdAt")
+    yield pydantic_core.to_json(header)[:-1] + b',"subsequences":['
+
+    for index, chunk in enumerate(_iter_chunks(subsequences, chunk_size)):
+        yield (b"," if index else b"") + pydantic_core.to_json(list(chunk))[1:-1]
+    yield b'],"createdAt":' + pydantic_core.to_json(created_at) + b"}"
+
+
+async def iter_recommendations_ndjson(
+    documents: t.AsyncIterable[RecommendationModel | RecommendationSummaryModel],
+    batch_size: int,
+    max_bytes: int,
+) -> t.AsyncIterator[bytes]:
+    """Serializes many recommendations as newline delimited JSON, one document per line.
+
+    Lines are grouped in chunks of `batch_size` documents or of at least
+    `max_bytes` bytes, whichever comes first, so at most one chunk is held
+    in memory at a time. The status of the response is already sent when
+    the documents fail to be read, so the lines written so far are followed
+    by `NDJSON_ERROR_LINE` instead, and the stream ends there.
+    """
+    lines: list[bytes] = []
+    size = 0
+    try:
+        async for document in documents:
+            line = document.model_dump_json(by_alias=True).encode("utf-8")
+            lines.append(line)
+            size += len(line) + 1
+            if len(lines) >= batch_size or size >= max_bytes:
+                yield b"\n".join(lines) + b"\n"
+                lines, size = [], 0
+    except RecommendationRepositoryException as error:
+        logger.error(f"Export interrupted, error: {error!r}")
+        lines.append(NDJSON_ERROR_LINE[:-1])
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def _iter_chunks(
+    subsequences: t.Iterable[TRecommendationSubSequence] | CompactSubSequences,
+    chunk_size: int,
+) -> t.Iterable[t.Sequence[TRecommendationSubSequence]]:
+    if isinstance(subsequences, CompactSubSequences):
+        return subsequences.iter_chunks(chunk_size)
+    return batched(subsequences, chunk_size)
+
+
+def _dumps(value: t.Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,399 @@
+import asyncio
+import logging
+import typing as t
+from collections import Counter
+
+from recommendation_engine.app.cooccurrence.algorithm import (
+    TCooccurrencePair,
+    count_cooccurrence_pairs,
+    diff_cooccurrence_pairs,
+)
+from recommendation_engine.app.cooccurrence.repository import CooccurrenceRepository, CooccurrenceRepositoryException
+from recommendation_engine.app.core.cache import ByteBudgetLRUCache
+from recommendation_engine.app.core.single_flight import SingleFlight
+from recommendation_engine.app.recommendation.algorithm import (
+    add_product_to_recommendation_subsequences,
+    count_recommendation_subsequences,
+    generate_product_ids_fingerprint,
+    order_product_ids,
+    remove_product_from_recommendation_subsequences,
+)
+from recommendation_engine.app.recommendation.executor import SubsequencesExecutor, SubsequencesExecutorBusy
+from recommendation_engine.app.recommendation.models import (
+    BatchCreateResult,
+    GeneratedRecommendation,
+    RecommendationModel,
+    RecommendationSummaryModel,
+)
+from recommendation_engine.app.recommendation.repository import (
+    RecommendationDuplicate,
+    RecommendationRepository,
+    RecommendationRepositoryException,
+)
+from recommendation_engine.app.recommendation.subsequences import DerivedSubsequences
+from recommendation_engine.app.recommendation.types import (
+    BatchItemStatus,
+    RecommendationStorage,
+    TProductIdsFingerPrint,
+    TProductIdsOrderedAndUnique,
+    TRecommendationSubSequences,
+)
+from recommendation_engine.settings import Settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationServiceException(Exception):
+    pass
+
+
+class RecommendationSequenceEmpty(RecommendationServiceException):
+    def __init__(self) -> None:
+        super().__init__("A recommendation needs at least one product")
+
+
+type TSubsequencesCache = ByteBudgetLRUCache[TProductIdsFingerPrint, GeneratedRecommendation]
+type TCreateFlights = SingleFlight[TProductIdsFingerPrint, tuple[RecommendationModel, GeneratedRecommendation]]
+
+
+class RecommendationService:
+    def __init__(
+        self,
+        repository: RecommendationRepository,
+        executor: SubsequencesExecutor,
+        subsequences_cache: TSubsequencesCache,
+        cooccurrence_repository: CooccurrenceRepository,
+    ):
+        self.repository: RecommendationRepository = repository
+        self.cooccurrence_repository: CooccurrenceRepository = cooccurrence_repository
+        self.executor: SubsequencesExecutor = executor
+        self.subsequences_cache: TSubsequencesCache = subsequences_cache
+        self.create_flights: TCreateFlights = SingleFlight()
+        self.settings: Settings = Settings.get()
+
+    async def generate(self, product_ids: tuple[int, ...] | list[int]) -> GeneratedRecommendation:
+        """Generates the subsequences of a basket, memoized by its fingerprint.
+
+        The fingerprint only needs the sorted unique product IDs, so it is
+        computed first and used to look up a previous generation of the
+        same basket before running the exponential one.
+
+        Raises:
+            SubsequencesExecutorBusy: If the basket is large and the executor queue is full.
+        """
+        unique_ordered_product_ids = order_product_ids(product_ids)
+        fingerprint = generate_product_ids_fingerprint(unique_ordered_product_ids, self.settings.app_fingerprint_scheme)
+
+        generated = self.subsequences_cache.get(fingerprint)
+        if generated is not None:
+            return generated
+
+        _, subsequences = await self.executor.generate(unique_ordered_product_ids)
+        generated = GeneratedRecommendation(
+            fingerprint=fingerprint,
+            sequence=unique_ordered_product_ids,
+            subsequences=subsequences,
+        )
+        self.subsequences_cache.put(fingerprint, generated)
+        return generated
+
+    async def create(
+        self, product_ids: tuple[int, ...] | list[int]
+    ) -> tuple[RecommendationModel, GeneratedRecommendation]:
+        """Generates and persists the subsequences of a basket.
+
+        The fingerprint is looked up before generating anything, so a basket
+        that already exists costs an index lookup instead of the exponential
+        generation. Concurrent creates of the same basket are coalesced: the
+        first one generates and inserts it, the others get its outcome. The
+        unique index still rejects the baskets created concurrently by other
+        processes.
+
+        Raises:
+            SubsequencesExecutorBusy: If the basket is large and the executor queue is full.
+            RecommendationDuplicate: If the basket already exists. When `app_create_return_existing`
+                is set, it carries the existing document.
+            RecommendationRepositoryException: If the document could not be persisted.
+        """
+        unique_ordered_product_ids = order_product_ids(product_ids)
+        fingerprint = generate_product_ids_fingerprint(unique_ordered_product_ids, self.settings.app_fingerprint_scheme)
+        return await self.create_flights.do(
+            fingerprint,
+            lambda: self._create(fingerprint, unique_ordered_product_ids),
+        )
+
+    async def _create(
+        self,
+        fingerprint: TProductIdsFingerPrint,
+        unique_ordered_product_ids: TProductIdsOrderedAndUnique,
+    ) -> tuple[RecommendationModel, GeneratedRecommendation]:
+        if await self.repository.exists(fingerprint):
+            raise await self._duplicate(fingerprint, unique_ordered_product_ids)
+
+        generated = await self.generate(unique_ordered_product_ids)
+        try:
+            document = await self.repository.create(generated.fingerprint, generated.sequence, generated.subsequences)
+        except RecommendationDuplicate:
+            raise await self._duplicate(fingerprint, unique_ordered_product_ids)
+
+        await self._count_cooccurrences(count_cooccurrence_pairs([generated.sequence]))
+        return document, generated
+
+    async def _count_cooccurrences(self, pairs: Counter[TCooccurrencePair]) -> None:
+        # The counts are derived data: the recommendation is already persisted, so a failure is not propagated
+        try:
+            await self.cooccurrence_repository.increment(pairs)
+        except CooccurrenceRepositoryException as error:
+            logger.error(f"Co-occurrence counts not updated for {len(pairs)} pairs, error: {error!r}")
+
+    async def _duplicate(
+        self,
+        fingerprint: TProductIdsFingerPrint,
+        unique_ordered_product_ids: TProductIdsOrderedAndUnique,
+    ) -> RecommendationDuplicate:
+        document = None
+        if self.settings.app_create_return_existing:
+            document = await self.repository.get_by_fingerprint(fingerprint)
+        return RecommendationDuplicate(
+            "Document already exists.",
+            fingerprint=fingerprint,
+            product_ids=unique_ordered_product_ids,
+            document=document,
+        )
+
+    async def create_many(self, product_ids_batch: list[list[int]]) -> list[BatchCreateResult]:
+        """Generates and persists many baskets at once.
+
+        Baskets that already exist, or with the same products as a previous
+        one of the batch, are reported as duplicates without being generated.
+        The others are processed in slices of at most
+        `app_batch_slice_max_subsequences` subsequences, so that a batch of
+        large baskets is never held in memory at once. The baskets of a slice
+        are generated concurrently, the large ones in parallel on the executor
+        pool, and inserted with a single unordered write. A basket that could
+        not be generated or inserted is reported as an error, the others are
+        still created.
+
+        Returns:
+            One result per basket, in the same order.
+
+        Raises:
+            RecommendationRepositoryException: If the existing baskets could not be looked up.
+        """
+        sequences = [order_product_ids(product_ids) for product_ids in product_ids_batch]
+        fingerprints = [
+            generate_product_ids_fingerprint(sequence, self.settings.app_fingerprint_scheme) for sequence in sequences
+        ]
+
+        results: list[BatchCreateResult | None] = []
+        first_seen: dict[TProductIdsFingerPrint, int] = {}
+        unique_indexes: list[int] = []
+        existing = await self.repository.find_existing_fingerprints(list(set(fingerprints)))
+        for index, (sequence, fingerprint) in enumerate(zip(sequences, fingerprints, strict=True)):
+            if fingerprint in existing:
+                results.append(
+                    BatchCreateResult(
+                        status=BatchItemStatus.DUPLICATE,
+                        fingerprint=fingerprint,
+                        sequence=sequence,
+                        detail="Document already exists.",
+                    )
+                )
+                continue
+            if fingerprint in first_seen:
+                results.append(
+                    BatchCreateResult(
+                        status=BatchItemStatus.DUPLICATE,
+                        fingerprint=fingerprint,
+                        sequence=sequence,
+                        detail=f"Same products as basket {first_seen[fingerprint]} of the batch",
+                    )
+                )
+                continue
+
+            first_seen[fingerprint] = index
+            unique_indexes.append(index)
+            results.append(None)
+
+        for indexes in self._batch_slices(unique_indexes, sequences):
+            await self._create_slice(indexes, sequences, fingerprints, results)
+        return [result for result in results if result is not None]
+
+    def _batch_slices(
+        self,
+        indexes: list[int],
+        sequences: list[TProductIdsOrderedAndUnique],
+    ) -> t.Iterator[list[int]]:
+        # A basket larger than the budget is a slice of its own
+        budget = self.settings.app_batch_slice_max_subsequences
+        batch_slice: list[int] = []
+        size = 0
+        for index in indexes:
+            count = count_recommendation_subsequences(len(sequences[index]))
+            if batch_slice and size + count > budget:
+                yield batch_slice
+                batch_slice, size = [], 0
+            batch_slice.append(index)
+            size += count
+        if batch_slice:
+            yield batch_slice
+
+    async def _create_slice(
+        self,
+        indexes: list[int],
+        sequences: list[TProductIdsOrderedAndUnique],
+        fingerprints: list[TProductIdsFingerPrint],
+        results: list[BatchCreateResult | None],
+    ) -> None:
+        generations = await asyncio.gather(
+            *(self.generate(sequences[index]) for index in indexes),
+            return_exceptions=True,
+        )
+
+        generated: list[GeneratedRecommendation] = []
+        generated_indexes: list[int] = []
+        for index, generation in zip(indexes, generations, strict=True):
+            if isinstance(generation, SubsequencesExecutorBusy):
+                results[index] = BatchCreateResult(
+                    status=BatchItemStatus.ERROR,
+                    fingerprint=fingerprints[index],
+                    sequence=sequences[index],
+                    detail="Too many recommendations being generated, please try again later...",
+                )
+            elif isinstance(generation, Exception):
+                logger.error(f"Exception while generating basket {index} of batch, error: {generation!r}")
+                results[index] = BatchCreateResult(
+                    status=BatchItemStatus.ERROR,
+                    fingerprint=fingerprints[index],
+                    sequence=sequences[index],
+                    detail="Unexpected error, please try again later...",
+                )
+            elif isinstance(generation, BaseException):
+                # Cancellation and interpreter exit are not failures of the basket
+                raise generation
+            else:
+                generated.append(generation)
+                generated_indexes.append(index)
+        if not generated:
+            return
+
+        created: list[RecommendationModel | RecommendationRepositoryException]
+        try:
+            created = await self.repository.create_many(generated)
+        except RecommendationRepositoryException as error:
+            created = [error] * len(generated)
+
+        for index, generation, document in zip(generated_indexes, generated, created, strict=True):
+            if isinstance(document, RecommendationModel):
+                results[index] = BatchCreateResult(
+                    status=BatchItemStatus.CREATED,
+                    fingerprint=generation.fingerprint,
+                    sequence=generation.sequence,
+                    document=document,
+                )
+            else:
+                results[index] = BatchCreateResult(
+                    status=(
+                        BatchItemStatus.DUPLICATE
+                        if isinstance(document, RecommendationDuplicate)
+                        else BatchItemStatus.ERROR
+                    ),
+                    fingerprint=generation.fingerprint,
+                    sequence=generation.sequence,
+                    detail=str(document),
+                )
+
+        await self._count_cooccurrences(
+            count_cooccurrence_pairs(
+                generation.sequence
+                for generation, document in zip(generated, created, strict=True)
+                if isinstance(document, RecommendationModel)
+            )
+        )
+
+    async def update(
+        self,
+        object_id: str,
+        add_product_ids: list[int],
+        remove_product_ids: list[int],
+    ) -> RecommendationModel | None:
+        """Adds and removes products of an existing recommendation, in place.
+
+        Removals are applied first. The new subsequences are derived from the
+        stored ones instead of being generated again: removing a product
+        filters out the subsequences containing it, adding one merges in the
+        current subsequences extended with it. With derived storage only the
+        sequence changes. For baskets of more products than are generated
+        inline, the subsequences are derived on a thread, off the event loop.
+
+        Returns:
+            The updated document, or None if it does not exist.
+
+        Raises:
+            RecommendationSequenceEmpty: If every product of the recommendation would be removed.
+            RecommendationDuplicate: If another recommendation already has the resulting products.
+            RecommendationUpdateConflict: If the document was modified or deleted concurrently.
+            RecommendationRepositoryException: If the document could not be read or updated.
+        """
+        current: RecommendationModel | RecommendationSummaryModel | None
+        if self.repository.storage == RecommendationStorage.DERIVED:
+            current = await self.repository.get_summary(object_id)
+        else:
+            current = await self.repository.get(object_id)
+        if current is None:
+            return None
+
+        removed = set(remove_product_ids)
+        sequence = order_product_ids(
+            [*(product_id for product_id in current.sequence if product_id not in removed), *add_product_ids]
+        )
+        if not sequence:
+            raise RecommendationSequenceEmpty()
+
+        inline = max(len(current.sequence), len(sequence)) <= self.settings.app_executor_inline_max_products
+        subsequences: TRecommendationSubSequences | None = None
+        if isinstance(current, RecommendationModel):
+            changes = (current.sequence, current.subsequences, add_product_ids, remove_product_ids)
+            if inline:
+                sequence, subsequences = self._derive_subsequences(*changes)
+            else:
+                sequence, subsequences = await asyncio.to_thread(self._derive_subsequences, *changes)
+
+        fingerprint = current.fingerprint
+        if sequence != current.sequence:
+            fingerprint = generate_product_ids_fingerprint(sequence, self.settings.app_fingerprint_scheme)
+            await self.repository.update(object_id, current.fingerprint, fingerprint, sequence, subsequences)
+            await self._count_cooccurrences(diff_cooccurrence_pairs(current.sequence, sequence))
+
+        if subsequences is None:
+            if inline:
+                subsequences = list(DerivedSubsequences(sequence))
+            else:
+                subsequences = await asyncio.to_thread(list, DerivedSubsequences(sequence))
+        self.subsequences_cache.put(
+            fingerprint,
+            GeneratedRecommendation(fingerprint=fingerprint, sequence=sequence, subsequences=subsequences),
+        )
+        # Derived from the stored document, not validated again
+        return RecommendationModel.model_construct(
+            id=object_id,
+            fingerprint=fingerprint,
+            sequence=sequence,
+            subsequences=subsequences,
+            createdAt=current.createdAt,
+        )
+
+    @staticmethod
+    def _derive_subsequences(
+        sequence: TProductIdsOrderedAndUnique,
+        subsequences: TRecommendationSubSequences,
+        add_product_ids: list[int],
+        remove_product_ids: list[int],
+    ) -> tuple[TProductIdsOrderedAndUnique, TRecommendationSubSequences]:
+        """Applies the removals then the additions to the subsequences, without generating them again."""
+        for product_id in order_product_ids(remove_product_ids):
+            sequence, subsequences = remove_product_from_recommendation_subsequences(sequence, subsequences, product_id)
+        for product_id in order_product_ids(add_product_ids):
+            sequence, subsequences = add_product_to_recommendation_subsequences(sequence, subsequences, product_id)
+        return sequence, subsequences
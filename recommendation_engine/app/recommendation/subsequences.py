@@ -0,0 +1,82 @@
+import typing as t
+from collections.abc import Sequence
+from itertools import islice
+
+from recommendation_engine.app.recommendation.algorithm import (
+    count_recommendation_subsequences,
+    iter_recommendation_subsequences,
+    iter_recommendation_subsequences_from,
+    unrank_recommendation_subsequence,
+)
+from recommendation_engine.app.recommendation.types import (
+    TProductIdsOrderedAndUnique,
+    TRecommendationSubSequence,
+    TRecommendationSubSequencesIterator,
+)
+
+
+class DerivedSubsequences(Sequence[TRecommendationSubSequence]):
+    """Read-only view over the subsequences of a sequence of product IDs.
+
+    Nothing is stored but the sequence: every subsequence is computed on
+    demand, in the same order as `generate_recommendation_subsequences`.
+    When `sequence_length` is given, the view only spans the subsequences
+    of that length.
+
+    Example:
+        >>> subsequences = DerivedSubsequences([1, 2, 3])
+        >>> len(subsequences), subsequences[4], subsequences[5:]
+        (7, [1, 3], [[2, 3], [1, 2, 3]])
+        >>> DerivedSubsequences([1, 2, 3], sequence_length=2)[1:]
+        [[1, 3], [2, 3]]
+    """
+
+    __slots__ = ("_count", "_sequence", "_start")
+
+    def __init__(
+        self,
+        unique_ordered_product_ids: TProductIdsOrderedAndUnique,
+        sequence_length: int | None = None,
+    ) -> None:
+        self._sequence: TProductIdsOrderedAndUnique = unique_ordered_product_ids
+
+        product_ids_count = len(unique_ordered_product_ids)
+        self._count: int = count_recommendation_subsequences(product_ids_count, sequence_length)
+        self._start: int = 0
+        if sequence_length is not None:
+            # Global rank of the first subsequence of this length
+            self._start = sum(
+                count_recommendation_subsequences(product_ids_count, shorter_length)
+                for shorter_length in range(1, min(sequence_length, product_ids_count + 1))
+            )
+
+    def __len__(self) -> int:
+        return self._count
+
+    @t.overload
+    def __getitem__(self, index: int) -> TRecommendationSubSequence: ...
+
+    @t.overload
+    def __getitem__(self, index: slice) -> list[TRecommendationSubSequence]: ...
+
+    def __getitem__(self, index: int | slice) -> TRecommendationSubSequence | list[TRecommendationSubSequence]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[position] for position in range(start, stop, step)]
+            subsequences = iter_recommendation_subsequences_from(self._sequence, self._start + start)
+            return list(islice(subsequences, max(stop - start, 0)))
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Subsequence index {index} out of range")
+        return unrank_recommendation_subsequence(self._sequence, self._start + index)
+
+    def __iter__(self) -> TRecommendationSubSequencesIterator:
+        if self._start == 0 and len(self) == count_recommendation_subsequences(len(self._sequence)):
+            return iter_recommendation_subsequences(self._sequence)
+        return islice(iter_recommendation_subsequences_from(self._sequence, self._start), len(self))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._sequence!r})"
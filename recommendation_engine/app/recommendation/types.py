@@ -1,3 +1,128 @@
+import typing as t
+from dataclasses import dataclass
+from enum import StrEnum
+from itertools import chain, pairwise
+
+import numpy as np
+import numpy.typing as npt
+
+
 type TProductIdsOrderedAndUnique = list[int]
-type TRecommendationSubSequences = list[list[int]]
-type TProductIdsFingerPrint = str
+type TRecommendationSubSequence = list[int]
+type TRecommendationSubSequences = list[TRecommendationSubSequence]
+type TRecommendationSubSequencesIterator = t.Iterator[TRecommendationSubSequence]
+type TProductIdsFingerPrint = str | bytes
+type TCompactValues = npt.NDArray[np.int32] | npt.NDArray[np.int64]
+type TCompactOffsets = npt.NDArray[np.int64]
+
+
+class FingerprintScheme(StrEnum):
+    """How the fingerprint of a sequence of product IDs is computed."""
+
+    V1 = "v1"  # SHA1 hex digest of the JSON encoded IDs, stored as a string
+    V2 = "v2"  # 128 bits BLAKE2b digest of the IDs packed as little-endian int64, stored as binary
+
+
+# Existing documents are only found by the scheme they were created with, 'v2' once they have been migrated
+DEFAULT_FINGERPRINT_SCHEME: t.Final[FingerprintScheme] = FingerprintScheme.V1
+
+
+class BatchItemStatus(StrEnum):
+    """Outcome of one basket of a batch create."""
+
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    ERROR = "error"
+
+
+class SearchMatch(StrEnum):
+    """Which of the searched product IDs a sequence must contain."""
+
+    ALL = "all"
+    ANY = "any"
+
+
+class ListView(StrEnum):
+    """Which fields of the recommendations are listed."""
+
+    FULL = "full"  # Sequence and subsequences
+    SUMMARY = "summary"  # Everything but the subsequences, which are only counted
+
+
+class RecommendationStorage(StrEnum):
+    """How the subsequences of a recommendation document are persisted."""
+
+    INLINE = "inline"  # As an array of arrays of product IDs
+    DERIVED = "derived"  # Not persisted, computed out of the sequence when read
+    CHUNKED = "chunked"  # In a companion collection, split in chunks of subsequences of the same length
+
+
+class SubsequencesEncoding(StrEnum):
+    """How the subsequences stored in a recommendation document are encoded."""
+
+    ARRAY = "array"  # BSON array of arrays of int
+    BITMASK = "bitmask"  # BSON binary, one little-endian bitmask over the positions in the sequence per subsequence
+
+
+class RecommendationEngine(StrEnum):
+    """Which implementation generates the subsequences."""
+
+    PYTHON = "python"  # itertools, one list per subsequence
+    NUMPY = "numpy"  # Vectorized, flat values + offsets arrays
+
+
+@dataclass(frozen=True, slots=True)
+class CompactSubSequences:
+    """Subsequences stored as two flat arrays (CSR layout).
+
+    The product IDs of the subsequence `i` are `values[offsets[i]:offsets[i + 1]]`,
+    so the whole set costs two heap objects instead of one list per subsequence.
+    """
+
+    values: TCompactValues
+    offsets: TCompactOffsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @t.overload
+    def __getitem__(self, index: int) -> TRecommendationSubSequence: ...
+
+    @t.overload
+    def __getitem__(self, index: slice) -> TRecommendationSubSequences: ...
+
+    def __getitem__(self, index: int | slice) -> TRecommendationSubSequence | TRecommendationSubSequences:
+        if isinstance(index, slice):
+            # Contiguous slices only, converted to lists like a slice of a list of lists would be
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("Only contiguous slices of subsequences are supported")
+            return self._slice(start, max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Subsequence index {index} out of range")
+        return self.values[self.offsets[index] : self.offsets[index + 1]].tolist()  # type: ignore[no-any-return]
+
+    def __iter__(self) -> TRecommendationSubSequencesIterator:
+        for chunk in self.iter_chunks(4096):
+            yield from chunk
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.offsets.nbytes)
+
+    def iter_chunks(self, chunk_size: int) -> t.Iterator[TRecommendationSubSequences]:
+        """Converts the subsequences to lists, `chunk_size` subsequences at a time."""
+        for start in range(0, len(self), chunk_size):
+            yield self._slice(start, min(start + chunk_size, len(self)))
+
+    def tolist(self) -> TRecommendationSubSequences:
+        # Chunk by chunk, a single conversion of every value would hold the GIL for as long
+        return list(chain.from_iterable(self.iter_chunks(65536)))
+
+    def _slice(self, start: int, stop: int) -> TRecommendationSubSequences:
+        offsets: list[int] = self.offsets[start : stop + 1].tolist()
+        first = offsets[0]
+        values: list[int] = self.values[first : offsets[-1]].tolist()
+        return [values[begin - first : end - first] for begin, end in pairwise(offsets)]
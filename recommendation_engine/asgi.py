@@ -7,8 +7,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from recommendation_engine.app.api import router
+from recommendation_engine.app.api.controllers.recommendation import NEXT_CURSOR_HEADER
+from recommendation_engine.app.cooccurrence.repository import CooccurrenceRepository
+from recommendation_engine.app.core.compression import CompressionMiddleware, ResponseEncoder
+from recommendation_engine.app.core.responses import FastJSONResponse
 from recommendation_engine.app.core.setup_logger import setup_logger
-from recommendation_engine.app.providers import get_database
+from recommendation_engine.app.providers import get_database, recommendation_repository, subsequences_executor
+from recommendation_engine.app.recommendation.chunks import RecommendationChunksRepository
 from recommendation_engine.app.recommendation.repository import RecommendationRepository
 from recommendation_engine.settings import Settings
 
@@ -25,11 +30,20 @@ async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("Initializing database")
 
     database = get_database()
-    await database.init_db(repositories=(RecommendationRepository,))
+    await database.init_db(
+        repositories=(RecommendationRepository, RecommendationChunksRepository, CooccurrenceRepository),
+    )
+
+    # Same keyword as the FastAPI dependency, so that the requests share this cached repository and its loaded filter
+    repository = recommendation_repository(database_client=database)
+    if repository.fingerprint_filter is not None:
+        logger.info("Loading fingerprint filter")
+        await repository.load_fingerprint_filter()
 
     yield
 
     logger.info("Application shutdown, cleaning up resources")
+    subsequences_executor().shutdown()
     await database.close()
     logger.info("Application shutdown")
 
@@ -37,13 +51,27 @@ async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
 def create_app() -> FastAPI:
     settings = setup()
 
-    app = FastAPI(title=settings.app_name, lifespan=lifespan)
+    app = FastAPI(title=settings.app_name, lifespan=lifespan, default_response_class=FastJSONResponse)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.app_api_cors_allowed_domains,
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
+    )
+    app.add_middleware(
+        CompressionMiddleware,
+        encoders=ResponseEncoder.available(
+            settings.app_compression_encodings,
+            levels={
+                "zstd": settings.app_compression_zstd_level,
+                "br": settings.app_compression_brotli_level,
+                "gzip": settings.app_compression_gzip_level,
+            },
+        ),
+        minimum_size=settings.app_compression_minimum_size,
+        thread_minimum_size=settings.app_compression_thread_minimum_size,
     )
 
     root_router = router.get_router()
@@ -1,12 +1,30 @@
 import os
 import typing as t
 from dataclasses import dataclass, field
+from importlib.util import find_spec
 
 from recommendation_engine.app.auth.exceptions import (
     AuthCertificateLoadException,
     AuthPasswordInvalid,
     AuthUsernameInvalid,
 )
+from recommendation_engine.app.recommendation.types import (
+    DEFAULT_FINGERPRINT_SCHEME,
+    FingerprintScheme,
+    RecommendationEngine,
+    RecommendationStorage,
+    SubsequencesEncoding,
+)
+
+
+# Compression of the messages exchanged with MongoDB, in order of preference
+MONGO_WIRE_COMPRESSORS: t.Final[tuple[str, ...]] = ("zstd", "snappy", "zlib")
+# Modules pymongo needs for each wire compressor, which it silently skips when missing
+MONGO_WIRE_COMPRESSOR_MODULES: t.Final[dict[str, str]] = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+# Compression of the collections data on disk by WiredTiger
+MONGO_BLOCK_COMPRESSORS: t.Final[tuple[str, ...]] = ("none", "snappy", "zlib", "zstd")
+# Content codings of the HTTP responses, in order of preference
+RESPONSE_COMPRESSION_ENCODINGS: t.Final[tuple[str, ...]] = ("zstd", "br", "gzip")
 
 
 class SettingsLoadException(Exception):
@@ -32,6 +50,32 @@ class Settings:
     app_version: str
     app_api_cors_allowed_domains: tuple[str, ...]
     app_jwt_expiration_hours: int
+    app_stream_chunk_size: int
+    app_stream_chunk_max_bytes: int
+    app_recommendation_storage: RecommendationStorage
+    app_recommendation_chunk_size: int
+    app_subsequences_encoding: SubsequencesEncoding
+    app_recommendation_engine: RecommendationEngine
+    app_executor_inline_max_products: int
+    app_executor_max_workers: int
+    app_executor_max_pending: int
+    app_executor_queue_timeout: float
+    app_subsequences_cache_max_bytes: int
+    app_response_cache_max_bytes: int
+    app_compression_encodings: tuple[str, ...]
+    app_compression_minimum_size: int
+    app_compression_thread_minimum_size: int
+    app_compression_zstd_level: int
+    app_compression_brotli_level: int
+    app_compression_gzip_level: int
+    app_fingerprint_scheme: FingerprintScheme
+    app_batch_max_size: int
+    app_batch_slice_max_subsequences: int
+    app_create_return_existing: bool
+    app_fingerprint_filter_enabled: bool
+    app_fingerprint_filter_capacity: int
+    app_fingerprint_filter_error_rate: float
+    app_fingerprint_filter_max_bytes: int
 
     app_admin_username: str
     app_admin_password_hash: str
@@ -47,6 +91,8 @@ class Settings:
 
     db_mongo_min_pool_size: int
     db_mongo_max_pool_size: int
+    db_mongo_compressors: tuple[str, ...]
+    db_mongo_block_compressor: str
 
     # Auth
     cert_private_file_name: str | None = field(repr=False)
@@ -74,6 +120,18 @@ class Settings:
 
         db_mongo_min_pool_size = int(os.getenv("DB_MONGO_MIN_POOL_SIZE", 0))
         db_mongo_max_pool_size = int(os.getenv("DB_MONGO_MAX_POOL_SIZE", 20))
+        db_mongo_compressors = tuple(
+            compressor.strip()
+            for compressor in os.getenv("DB_MONGO_COMPRESSORS", "zlib").split(",")
+            if compressor.strip()
+        )
+        if not set(db_mongo_compressors) <= set(MONGO_WIRE_COMPRESSORS):
+            raise SettingsLoadException(f"Invalid MongoDB compressors: {db_mongo_compressors}")
+        if missing := [c for c in db_mongo_compressors if find_spec(MONGO_WIRE_COMPRESSOR_MODULES[c]) is None]:
+            raise SettingsLoadException(f"MongoDB compressors not installed: {missing}, install the compression extra")
+        db_mongo_block_compressor = os.getenv("DB_MONGO_BLOCK_COMPRESSOR", "zstd")
+        if db_mongo_block_compressor and db_mongo_block_compressor not in MONGO_BLOCK_COMPRESSORS:
+            raise SettingsLoadException(f"Invalid MongoDB block compressor: {db_mongo_block_compressor}")
 
         cert_private_file_name = os.getenv("APP_CERT_PRIVATE_FILE_NAME", None)
         cert_public_file_name = os.getenv("APP_CERT_PUBLIC_FILE_NAME", None)
@@ -83,6 +141,58 @@ class Settings:
         cert_private, cert_public = cls._load_certificates(cert_private_file_name, cert_public_file_name)
         app_jwt_expiration_hours = min(int(os.getenv("APP_JWT_EXPIRATION_HOURS", 4)), 1)
 
+        app_stream_chunk_size = max(int(os.getenv("APP_STREAM_CHUNK_SIZE", 1000)), 1)
+        app_stream_chunk_max_bytes = max(int(os.getenv("APP_STREAM_CHUNK_MAX_BYTES", 1024**2)), 1)
+        try:
+            app_recommendation_storage = RecommendationStorage(os.getenv("APP_RECOMMENDATION_STORAGE", "inline"))
+        except ValueError as error:
+            raise SettingsLoadException(f"Invalid recommendation storage: {error}") from error
+        app_recommendation_chunk_size = max(int(os.getenv("APP_RECOMMENDATION_CHUNK_SIZE", 10_000)), 1)
+        try:
+            app_subsequences_encoding = SubsequencesEncoding(os.getenv("APP_SUBSEQUENCES_ENCODING", "array"))
+        except ValueError as error:
+            raise SettingsLoadException(f"Invalid subsequences encoding: {error}") from error
+        try:
+            app_recommendation_engine = RecommendationEngine(os.getenv("APP_RECOMMENDATION_ENGINE", "numpy"))
+        except ValueError as error:
+            raise SettingsLoadException(f"Invalid recommendation engine: {error}") from error
+
+        app_executor_inline_max_products = int(os.getenv("APP_EXECUTOR_INLINE_MAX_PRODUCTS", 14))
+        app_executor_max_workers = max(int(os.getenv("APP_EXECUTOR_MAX_WORKERS", min(os.cpu_count() or 1, 4))), 1)
+        app_executor_max_pending = max(int(os.getenv("APP_EXECUTOR_MAX_PENDING", 8)), 1)
+        app_executor_queue_timeout = float(os.getenv("APP_EXECUTOR_QUEUE_TIMEOUT", 5.0))
+        app_subsequences_cache_max_bytes = max(int(os.getenv("APP_SUBSEQUENCES_CACHE_MAX_BYTES", 64 * 1024**2)), 0)
+        app_response_cache_max_bytes = max(int(os.getenv("APP_RESPONSE_CACHE_MAX_BYTES", 64 * 1024**2)), 0)
+
+        app_compression_encodings = tuple(
+            encoding.strip()
+            for encoding in os.getenv("APP_COMPRESSION_ENCODINGS", ",".join(RESPONSE_COMPRESSION_ENCODINGS)).split(",")
+            if encoding.strip()
+        )
+        if not set(app_compression_encodings) <= set(RESPONSE_COMPRESSION_ENCODINGS):
+            raise SettingsLoadException(f"Invalid response compression encodings: {app_compression_encodings}")
+        app_compression_minimum_size = max(int(os.getenv("APP_COMPRESSION_MINIMUM_SIZE", 1024)), 0)
+        app_compression_thread_minimum_size = max(int(os.getenv("APP_COMPRESSION_THREAD_MINIMUM_SIZE", 256 * 1024)), 0)
+        app_compression_zstd_level = int(os.getenv("APP_COMPRESSION_ZSTD_LEVEL", 3))
+        app_compression_brotli_level = int(os.getenv("APP_COMPRESSION_BROTLI_LEVEL", 4))
+        app_compression_gzip_level = int(os.getenv("APP_COMPRESSION_GZIP_LEVEL", 5))
+        if not 0 <= app_compression_gzip_level <= 9:
+            raise SettingsLoadException(f"Invalid gzip compression level: {app_compression_gzip_level}")
+
+        try:
+            app_fingerprint_scheme = FingerprintScheme(os.getenv("APP_FINGERPRINT_SCHEME", DEFAULT_FINGERPRINT_SCHEME))
+        except ValueError as error:
+            raise SettingsLoadException(f"Invalid fingerprint scheme: {error}") from error
+
+        app_batch_max_size = max(int(os.getenv("APP_BATCH_MAX_SIZE", 1000)), 1)
+        app_batch_slice_max_subsequences = max(int(os.getenv("APP_BATCH_SLICE_MAX_SUBSEQUENCES", 1024**2)), 1)
+
+        app_fingerprint_filter_capacity = max(int(os.getenv("APP_FINGERPRINT_FILTER_CAPACITY", 1_000_000)), 1)
+        app_fingerprint_filter_error_rate = float(os.getenv("APP_FINGERPRINT_FILTER_ERROR_RATE", 0.01))
+        if not 0 < app_fingerprint_filter_error_rate < 1:
+            raise SettingsLoadException(f"Invalid fingerprint filter error rate: {app_fingerprint_filter_error_rate}")
+        app_fingerprint_filter_max_bytes = max(int(os.getenv("APP_FINGERPRINT_FILTER_MAX_BYTES", 16 * 1024**2)), 1)
+
         app_admin_username = os.getenv("APP_ADMIN_USERNAME", "admin")
         app_admin_password_hash = os.getenv("APP_ADMIN_PASS_HASH", "admin")
 
@@ -98,6 +208,32 @@ class Settings:
             app_version=os.getenv("APP_VERSION", "undefined"),
             app_api_cors_allowed_domains=tuple(os.environ.get("APP_API_CORS_ALLOWED_DOMAINS", "").split(",")),
             app_jwt_expiration_hours=app_jwt_expiration_hours,
+            app_stream_chunk_size=app_stream_chunk_size,
+            app_stream_chunk_max_bytes=app_stream_chunk_max_bytes,
+            app_recommendation_storage=app_recommendation_storage,
+            app_recommendation_chunk_size=app_recommendation_chunk_size,
+            app_subsequences_encoding=app_subsequences_encoding,
+            app_recommendation_engine=app_recommendation_engine,
+            app_executor_inline_max_products=app_executor_inline_max_products,
+            app_executor_max_workers=app_executor_max_workers,
+            app_executor_max_pending=app_executor_max_pending,
+            app_executor_queue_timeout=app_executor_queue_timeout,
+            app_subsequences_cache_max_bytes=app_subsequences_cache_max_bytes,
+            app_response_cache_max_bytes=app_response_cache_max_bytes,
+            app_compression_encodings=app_compression_encodings,
+            app_compression_minimum_size=app_compression_minimum_size,
+            app_compression_thread_minimum_size=app_compression_thread_minimum_size,
+            app_compression_zstd_level=app_compression_zstd_level,
+            app_compression_brotli_level=app_compression_brotli_level,
+            app_compression_gzip_level=app_compression_gzip_level,
+            app_fingerprint_scheme=app_fingerprint_scheme,
+            app_batch_max_size=app_batch_max_size,
+            app_batch_slice_max_subsequences=app_batch_slice_max_subsequences,
+            app_create_return_existing=cls.parse_bool_env("APP_CREATE_RETURN_EXISTING"),
+            app_fingerprint_filter_enabled=cls.parse_bool_env("APP_FINGERPRINT_FILTER_ENABLED"),
+            app_fingerprint_filter_capacity=app_fingerprint_filter_capacity,
+            app_fingerprint_filter_error_rate=app_fingerprint_filter_error_rate,
+            app_fingerprint_filter_max_bytes=app_fingerprint_filter_max_bytes,
             db_mongo_host=db_mongo_host,
             db_mongo_port=db_mongo_port,
             db_mongo_username=db_mongo_username,
@@ -105,6 +241,8 @@ class Settings:
             db_mongo_db_name=db_mongo_db_name,
             db_mongo_min_pool_size=db_mongo_min_pool_size,
             db_mongo_max_pool_size=db_mongo_max_pool_size,
+            db_mongo_compressors=db_mongo_compressors,
+            db_mongo_block_compressor=db_mongo_block_compressor,
             app_admin_username=app_admin_username,
             app_admin_password_hash=app_admin_password_hash,
             cert_private_file_name=cert_private_file_name,
@@ -0,0 +1,110 @@
+import asyncio
+import importlib.util
+import time
+import typing as t
+from urllib.parse import quote_plus
+
+from dotenv import find_dotenv, load_dotenv
+from pymongo import AsyncMongoClient
+
+from recommendation_engine.app.recommendation.algorithm import generate_recommendation_subsequences
+from recommendation_engine.settings import (
+    MONGO_BLOCK_COMPRESSORS,
+    MONGO_WIRE_COMPRESSOR_MODULES,
+    MONGO_WIRE_COMPRESSORS,
+    Settings,
+)
+
+
+COLLECTION_NAME = "benchmark_compression"
+
+
+def build_documents(count: int, product_count: int) -> list[dict[str, t.Any]]:
+    documents = []
+    for start in range(count):
+        product_ids, subsequences = generate_recommendation_subsequences(list(range(start, start + product_count)))
+        documents.append({"sequence": product_ids, "subsequences": subsequences})
+    return documents
+
+
+def client(settings: Settings, compressor: str | None = None) -> AsyncMongoClient[dict[str, t.Any]]:
+    """A client without the strict Stable API of the application, which rejects `serverStatus` and `collStats`."""
+    uri = "mongodb://%s:%s@%s" % (
+        quote_plus(settings.db_mongo_username),
+        quote_plus(settings.db_mongo_password),
+        f"{settings.db_mongo_host}:{settings.db_mongo_port}",
+    )
+    return AsyncMongoClient(uri, compressors=compressor)
+
+
+async def network_bytes(mongo_client: AsyncMongoClient[dict[str, t.Any]]) -> tuple[int, int]:
+    """Bytes received and sent by the server so far, as (logical, physical) i.e. before and after compression."""
+    network = (await mongo_client.admin.command("serverStatus"))["network"]
+    return network["bytesIn"] + network["bytesOut"], network["physicalBytesIn"] + network["physicalBytesOut"]
+
+
+async def benchmark_wire(settings: Settings, documents: list[dict[str, t.Any]]) -> None:
+    print(f"{'wire':>8} | {'seconds':>8} | {'logical MB':>10} | {'wire MB':>8}")
+    for compressor in (None, *MONGO_WIRE_COMPRESSORS):
+        if compressor and importlib.util.find_spec(MONGO_WIRE_COMPRESSOR_MODULES[compressor]) is None:
+            print(f"{compressor:>8} | not installed")
+            continue
+
+        mongo_client = client(settings, compressor)
+        collection = mongo_client[settings.db_mongo_db_name][COLLECTION_NAME]
+        await collection.drop()
+
+        logical_before, physical_before = await network_bytes(mongo_client)
+        start = time.perf_counter()
+        await collection.insert_many([dict(document) for document in documents])
+        await collection.find().to_list()
+        seconds = time.perf_counter() - start
+        logical_after, physical_after = await network_bytes(mongo_client)
+
+        logical, physical = (logical_after - logical_before) / 1024**2, (physical_after - physical_before) / 1024**2
+        print(f"{compressor or 'none':>8} | {seconds:>8.2f} | {logical:>10.1f} | {physical:>8.1f}")
+        await collection.drop()
+        await mongo_client.close()
+
+
+async def benchmark_block(settings: Settings, documents: list[dict[str, t.Any]]) -> None:
+    print(f"{'block':>8} | {'seconds':>8} | {'data MB':>8} | {'disk MB':>8}")
+    mongo_client = client(settings)
+    database = mongo_client[settings.db_mongo_db_name]
+    for compressor in MONGO_BLOCK_COMPRESSORS:
+        await database.drop_collection(COLLECTION_NAME)
+        collection = await database.create_collection(
+            COLLECTION_NAME,
+            storageEngine={"wiredTiger": {"configString": f"block_compressor={compressor}"}},
+        )
+
+        start = time.perf_counter()
+        await collection.insert_many([dict(document) for document in documents])
+        seconds = time.perf_counter() - start
+        # Flushes to disk, so that the storage size accounts for every document
+        await mongo_client.admin.command("fsync")
+        stats = await database.command("collStats", COLLECTION_NAME)
+
+        data, disk = stats["size"] / 1024**2, stats["storageSize"] / 1024**2
+        print(f"{compressor:>8} | {seconds:>8.2f} | {data:>8.1f} | {disk:>8.1f}")
+    await database.drop_collection(COLLECTION_NAME)
+    await mongo_client.close()
+
+
+async def benchmark(count: int = 50, product_count: int = 14) -> None:
+    """Compares the wire and block compressors writing and reading large recommendations on a local mongod."""
+    settings = Settings.get()
+    documents = build_documents(count, product_count)
+    print(f"{count} documents of {product_count} products\n")
+    await benchmark_wire(settings, documents)
+    print()
+    await benchmark_block(settings, documents)
+
+
+def main() -> None:
+    load_dotenv(find_dotenv(), override=False)
+    asyncio.run(benchmark())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import random
+import timeit
+
+import bson
+
+from recommendation_engine.app.recommendation.algorithm import generate_product_ids_fingerprint
+from recommendation_engine.app.recommendation.types import FingerprintScheme
+
+
+def main() -> None:
+    """Compares the cost and the stored size of the fingerprint schemes."""
+    print(f"{'products':>8} | {'scheme':>6} | {'µs/call':>8} | {'key bytes':>9}")
+    for count in (3, 10, 20, 100, 1000):
+        product_ids = sorted(random.sample(range(1, 10_000_000), count))
+        for scheme in FingerprintScheme:
+            number = 20_000 if count <= 100 else 2_000
+            seconds = timeit.timeit(lambda: generate_product_ids_fingerprint(product_ids, scheme), number=number)
+            fingerprint = generate_product_ids_fingerprint(product_ids, scheme)
+            # Size of the value as encoded in BSON, which is what the unique index stores as key
+            key_size = len(bson.encode({"": fingerprint})) - len(bson.encode({}))
+            print(f"{count:>8} | {scheme.value:>6} | {seconds / number * 1e6:>8.2f} | {key_size:>9}")
+
+
+if __name__ == "__main__":
+    main()
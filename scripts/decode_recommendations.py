@@ -0,0 +1,59 @@
+import json
+import time
+import typing as t
+
+import httpx
+import msgpack
+
+from recommendation_engine.app.core.msgpack import MSGPACK_MEDIA_TYPE
+from recommendation_engine.app.recommendation.packed import PACKED_MEDIA_TYPE, unpack_recommendations
+
+
+PRODUCT_IDS = list(range(1, 17))
+FORMATS: dict[str, tuple[str, t.Callable[[bytes], t.Any]]] = {
+    "json": ("application/json", json.loads),
+    "packed bitmask": (PACKED_MEDIA_TYPE, unpack_recommendations),
+    "packed offsets": (f"{PACKED_MEDIA_TYPE}; layout=offsets", unpack_recommendations),
+    "msgpack": (MSGPACK_MEDIA_TYPE, msgpack.unpackb),
+}
+
+
+def main() -> None:
+    """Fetches one large recommendation in every format and compares the payload size and the decoding time.
+
+    `unpack_recommendations` (`recommendation_engine/app/recommendation/packed.py`)
+    is the reference decoder of the packed format, its module documents the
+    layout of the records. It only needs numpy, e.g.:
+
+        records = unpack_recommendations(response.content)
+        records[0].sequence, records[0].subsequences.values, records[0].subsequences.offsets
+
+    MessagePack is decoded with the `msgpack` package, the one that encodes it.
+    """
+    host = "http://127.0.0.1:8000"
+
+    with httpx.Client(timeout=60) as client:
+        response = client.post(f"{host}/api/v1/auth/login", json={"username": "admin", "password": "admin"}).json()
+        headers = {"Authorization": f"Bearer {response['access_token']}"}
+
+        endpoint = f"{host}/api/v1/recommendations/"
+        response = client.post(endpoint, headers=headers, json={"product_ids": PRODUCT_IDS})
+        if response.status_code == httpx.codes.CONFLICT:
+            params = {"contains": ",".join(map(str, PRODUCT_IDS))}
+            items = client.get(f"{endpoint}search", headers=headers, params=params).json()
+            recommendation_id = next(item["_id"] for item in items if item["sequence"] == PRODUCT_IDS)
+        else:
+            recommendation_id = response.json()["_id"]
+        print(f"Recommendation {recommendation_id} of {len(PRODUCT_IDS)} products\n")
+
+        print(f"{'format':>14} | {'KB':>8} | {'decode ms':>9}")
+        for name, (accept, decode) in FORMATS.items():
+            content = client.get(f"{endpoint}{recommendation_id}", headers=headers | {"Accept": accept}).content
+            start = time.perf_counter()
+            decode(content)
+            milliseconds = (time.perf_counter() - start) * 1000
+            print(f"{name:>14} | {len(content) / 1024:>8.1f} | {milliseconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
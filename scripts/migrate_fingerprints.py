@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+import typing as t
+
+from dotenv import find_dotenv, load_dotenv
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from recommendation_engine.app.core.database.mongo_database import MongoDatabase
+from recommendation_engine.app.recommendation.algorithm import generate_product_ids_fingerprint
+from recommendation_engine.app.recommendation.repository import DUPLICATE_KEY_ERROR_CODE, RecommendationRepository
+from recommendation_engine.app.recommendation.types import FingerprintScheme
+
+
+async def migrate(batch_size: int, dry_run: bool) -> None:
+    """Rewrites the 'v1' (hex string) fingerprints of every document with the 'v2' (binary) scheme.
+
+    Creates must be stopped while it runs, and started again with the 'v2' scheme:
+    under 'v1', a migrated basket is no longer found by the existence checks and
+    the unique index does not match its other fingerprint, so it would be inserted
+    twice. Documents are updated only while they still have the fingerprint that
+    was read, so concurrent updates are not overwritten. A document whose basket was
+    already created again with the 'v2' scheme cannot be migrated (duplicate
+    fingerprint) and is reported.
+    """
+    database = MongoDatabase()
+    repository = RecommendationRepository(database)
+    # Makes sure the collection validator accepts binary fingerprints
+    await database.init_db((repository,))
+
+    migrated = 0
+    duplicates: list[t.Any] = []
+    cursor = repository.collection.find(
+        {"fingerprint": {"$type": "string"}}, projection={"fingerprint": 1, "sequence": 1}
+    )
+    batch: list[dict[str, t.Any]] = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            migrated += await _write(repository, batch, duplicates, dry_run)
+            batch = []
+    if batch:
+        migrated += await _write(repository, batch, duplicates, dry_run)
+
+    print(f"Migrated {migrated} documents{' (dry run)' if dry_run else ''}")
+    for _id in duplicates:
+        print(f"Document {_id} not migrated, its sequence already exists with a 'v2' fingerprint")
+    await database.close()
+
+
+async def _write(
+    repository: RecommendationRepository,
+    batch: list[dict[str, t.Any]],
+    duplicates: list[t.Any],
+    dry_run: bool,
+) -> int:
+    if dry_run:
+        return len(batch)
+
+    updates = [
+        UpdateOne(
+            {"_id": document["_id"], "fingerprint": document["fingerprint"]},
+            {"$set": {"fingerprint": generate_product_ids_fingerprint(document["sequence"], FingerprintScheme.V2)}},
+        )
+        for document in batch
+    ]
+    try:
+        result = await repository.collection.bulk_write(updates, ordered=False)
+    except BulkWriteError as error:
+        for write_error in error.details["writeErrors"]:
+            if write_error["code"] != DUPLICATE_KEY_ERROR_CODE:
+                raise
+            duplicates.append(batch[write_error["index"]]["_id"])
+        return int(error.details["nModified"])
+    return result.modified_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Migrates recommendation fingerprints to the 'v2' binary scheme, creates must be stopped meanwhile"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the documents to migrate")
+    arguments = parser.parse_args()
+
+    load_dotenv(find_dotenv(), override=False)
+    asyncio.run(migrate(arguments.batch_size, arguments.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import asyncio
+
+from dotenv import find_dotenv, load_dotenv
+from pymongo import InsertOne
+
+from recommendation_engine.app.cooccurrence.algorithm import count_cooccurrence_pairs
+from recommendation_engine.app.cooccurrence.repository import CooccurrenceRepository
+from recommendation_engine.app.core.database.mongo_database import MongoDatabase
+from recommendation_engine.app.recommendation.repository import RecommendationRepository
+
+
+async def rebuild(batch_size: int = 10_000) -> None:
+    """Recomputes the co-occurrence counts from the sequences of every recommendation.
+
+    Meant for recommendations created before the counts were maintained, or to
+    fix a drift. The counts are replaced, so creates should be paused meanwhile.
+    """
+    database = MongoDatabase()
+    recommendation_repository = RecommendationRepository(database)
+    cooccurrence_repository = CooccurrenceRepository(database)
+    await database.init_db((recommendation_repository, cooccurrence_repository))
+
+    cursor = recommendation_repository.collection.find({}, projection={"_id": 0, "sequence": 1})
+    pairs = count_cooccurrence_pairs([document["sequence"] async for document in cursor])
+
+    await cooccurrence_repository.collection.delete_many({})
+    inserts = [
+        InsertOne({"product": product, "other": other, "count": count}) for (product, other), count in pairs.items()
+    ]
+    for start in range(0, len(inserts), batch_size):
+        await cooccurrence_repository.collection.bulk_write(inserts[start : start + batch_size], ordered=False)
+
+    print(f"Rebuilt {len(pairs)} co-occurrence counts")
+    await database.close()
+
+
+def main() -> None:
+    load_dotenv(find_dotenv(), override=False)
+    asyncio.run(rebuild())
+
+
+if __name__ == "__main__":
+    main()
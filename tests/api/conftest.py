@@ -8,8 +8,16 @@ from fastapi.testclient import TestClient
 
 from recommendation_engine.app.auth.models import AccessToken
 from recommendation_engine.app.auth.secure import LoggedIn
-from recommendation_engine.app.providers import get_database, recommendation_repository
+from recommendation_engine.app.cooccurrence.repository import CooccurrenceRepository
+from recommendation_engine.app.providers import (
+    cooccurrence_repository,
+    get_database,
+    recommendation_repository,
+    response_body_cache,
+    subsequences_cache,
+)
 from recommendation_engine.app.recommendation.repository import RecommendationRepository
+from recommendation_engine.app.recommendation.types import RecommendationStorage
 from recommendation_engine.asgi import create_app
 
 
@@ -25,8 +33,26 @@ def mock_db_client() -> t.Any:
 def mock_recommendation_repository() -> Mock:
     repo = Mock(spec=RecommendationRepository)
     repo.get = AsyncMock()
+    repo.get_summary = AsyncMock()
     repo.create = AsyncMock()
+    repo.create_many = AsyncMock()
+    repo.get_by_fingerprint = AsyncMock()
+    repo.exists = AsyncMock(return_value=False)
+    repo.find_existing_fingerprints = AsyncMock(return_value=set())
     repo.paginate = AsyncMock()
+    repo.paginate_summaries = AsyncMock()
+    repo.search = AsyncMock()
+    repo.update = AsyncMock()
+    repo.storage = RecommendationStorage.INLINE
+    repo.fingerprint_filter = None
+    return repo
+
+
+@pytest.fixture()
+def mock_cooccurrence_repository() -> Mock:
+    repo = Mock(spec=CooccurrenceRepository)
+    repo.increment = AsyncMock()
+    repo.related = AsyncMock()
     return repo
 
 
@@ -37,12 +63,31 @@ def clear_get_database_cache():
     get_database.cache_clear()
 
 
+@pytest.fixture(autouse=True)
+def clear_subsequences_cache():
+    subsequences_cache.cache_clear()
+    yield
+    subsequences_cache.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_response_body_cache():
+    response_body_cache.cache_clear()
+    yield
+    response_body_cache.cache_clear()
+
+
 @pytest.fixture(scope="function")
-def app(mock_db_client, mock_recommendation_repository) -> t.Generator[FastAPI, None, None]:
+def app(
+    mock_db_client,
+    mock_recommendation_repository,
+    mock_cooccurrence_repository,
+) -> t.Generator[FastAPI, None, None]:
     app = create_app()
 
     getattr(app, "dependency_overrides", {})[get_database] = lambda: mock_db_client
     getattr(app, "dependency_overrides", {})[recommendation_repository] = lambda: mock_recommendation_repository
+    getattr(app, "dependency_overrides", {})[cooccurrence_repository] = lambda: mock_cooccurrence_repository
 
     # Bypass auth: override the *callable returned by* restrict()
     # Return anything truthy (the value is unused by the endpoints)
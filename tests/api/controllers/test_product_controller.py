@@ -0,0 +1,43 @@
+from unittest.mock import Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from recommendation_engine.app.cooccurrence.models import RelatedProductModel
+from recommendation_engine.app.cooccurrence.repository import CooccurrenceRepositoryException
+
+
+@pytest.mark.unit
+class TestUnitProductController:
+    web_client: TestClient
+    mock_cooccurrence_repository: Mock
+
+    @pytest.fixture(autouse=True)
+    async def setup_class(self, web_client, mock_cooccurrence_repository):
+        self.web_client = web_client
+        self.mock_cooccurrence_repository = mock_cooccurrence_repository
+        yield
+
+    def test_related_returns_top_products(self):
+        self.mock_cooccurrence_repository.related.return_value = [
+            RelatedProductModel(product_id=2, count=5),
+            RelatedProductModel(product_id=3, count=1),
+        ]
+
+        r = self.web_client.get("/api/v1/products/1/related?k=2")
+        assert r.status_code == 200
+        assert r.json() == {
+            "product_id": 1,
+            "related": [{"product_id": 2, "count": 5}, {"product_id": 3, "count": 1}],
+        }
+        self.mock_cooccurrence_repository.related.assert_awaited_once_with(1, limit=2)
+
+    def test_related_invalid_k_returns_422(self):
+        r = self.web_client.get("/api/v1/products/1/related?k=0")
+        assert r.status_code == 422
+
+    def test_related_repo_exception_returns_500(self):
+        self.mock_cooccurrence_repository.related.side_effect = CooccurrenceRepositoryException("boom")
+
+        r = self.web_client.get("/api/v1/products/1/related")
+        assert r.status_code == 500
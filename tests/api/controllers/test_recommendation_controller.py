@@ -1,16 +1,28 @@
+import dataclasses
+import json
 import uuid
 from datetime import datetime, timezone
 from types import SimpleNamespace
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 from bson import ObjectId
 from fastapi.testclient import TestClient
 
+from recommendation_engine.app.api.controllers.recommendation import NEXT_CURSOR_HEADER
+from recommendation_engine.app.core.msgpack import MSGPACK_MEDIA_TYPE, packb
+from recommendation_engine.app.providers import subsequences_executor
+from recommendation_engine.app.recommendation.executor import SubsequencesExecutorBusy
+from recommendation_engine.app.recommendation.models import RecommendationModel, RecommendationSummaryModel
+from recommendation_engine.app.recommendation.packed import PACKED_MEDIA_TYPE, PackedLayout, unpack_recommendations
+from recommendation_engine.app.recommendation.pagination import PageCursor
 from recommendation_engine.app.recommendation.repository import (
     RecommendationDuplicate,
     RecommendationRepositoryException,
+    RecommendationUpdateConflict,
 )
+from recommendation_engine.app.recommendation.types import SearchMatch
+from recommendation_engine.settings import Settings
 
 
 @pytest.mark.unit
@@ -19,7 +31,8 @@ class TestUnitRecommendationResponse:
     mock_recommendation_repository: Mock
 
     @pytest.fixture(autouse=True)
-    async def setup_class(self, web_client, mock_recommendation_repository):
+    async def setup_class(self, app, web_client, mock_recommendation_repository):
+        self.app = app
         self.web_client = web_client
         self.mock_recommendation_repository = mock_recommendation_repository
         yield
@@ -57,15 +70,234 @@ class TestUnitRecommendationResponse:
             "subsequences": [[1], [2], [1, 2]],
             "createdAt": datetime.now(timezone.utc).isoformat(),
         }
-        self.mock_recommendation_repository.get.return_value = doc
+        self.mock_recommendation_repository.get.return_value = RecommendationModel(**doc)
 
         r = self.web_client.get(f"/api/v1/recommendations/{_id}")
         assert r.status_code == 200
+        assert r.headers["content-type"] == "application/json"
         body = r.json()
+        assert body["_id"] == _id
         assert body["fingerprint"] == "abc123"
         assert body["sequence"] == [1, 2]
         assert body["subsequences"] == [[1], [2], [1, 2]]
 
+    def test_show_serves_the_cached_body_of_the_document(self):
+        _id = str(ObjectId())
+        self.mock_recommendation_repository.get.return_value = RecommendationModel(
+            _id=_id, fingerprint="abc123", sequence=[1, 2], subsequences=[[1], [2], [1, 2]], createdAt=datetime.now()
+        )
+
+        first = self.web_client.get(f"/api/v1/recommendations/{_id}")
+        second = self.web_client.get(f"/api/v1/recommendations/{_id.upper()}")
+        assert first.status_code == second.status_code == 200
+        assert second.content == first.content
+        assert second.headers["content-type"] == "application/json"
+        # A single read per show, the cached body only saves the encoding
+        assert self.mock_recommendation_repository.get.await_count == 2
+
+        stats = self.web_client.get("/api/v1/recommendations/stats").json()["response_body_cache"]
+        assert stats["hits"] == 1
+        assert stats["entries"] == 1
+        assert stats["nbytes"] == len(first.content)
+
+    def test_show_ndjson_streams_subsequences_from_sequence(self):
+        _id = str(ObjectId())
+        self.mock_recommendation_repository.get_summary.return_value = RecommendationSummaryModel(
+            _id=_id,
+            fingerprint="abc123",
+            sequence=[1, 2, 3],
+            createdAt=datetime.now(timezone.utc),
+        )
+
+        r = self.web_client.get(f"/api/v1/recommendations/{_id}", headers={"Accept": "application/x-ndjson"})
+        lines = [json.loads(line) for line in r.text.splitlines()]
+
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "application/x-ndjson"
+        assert lines[0]["_id"] == _id
+        assert lines[0]["sequence"] == [1, 2, 3]
+        assert "subsequences" not in lines[0]
+        assert lines[1:] == [[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]]
+        self.mock_recommendation_repository.get_summary.assert_awaited_once_with(_id)
+        self.mock_recommendation_repository.get.assert_not_awaited()
+
+    def test_show_packed_binary(self):
+        _id = str(ObjectId())
+        self.mock_recommendation_repository.get.return_value = RecommendationModel(
+            _id=_id, fingerprint="abc123", sequence=[1, 2], subsequences=[[1], [2], [1, 2]], createdAt=datetime.now()
+        )
+
+        r = self.web_client.get(f"/api/v1/recommendations/{_id}", headers={"Accept": PACKED_MEDIA_TYPE})
+        (record,) = unpack_recommendations(r.content)
+
+        assert r.status_code == 200
+        assert r.headers["content-type"] == PACKED_MEDIA_TYPE
+        assert r.content[5] == PackedLayout.BITMASK
+        assert record.id == _id
+        assert record.subsequences is not None
+        assert record.subsequences.tolist() == [[1], [2], [1, 2]]
+
+    def test_show_packed_offsets_layout(self):
+        self.mock_recommendation_repository.get.return_value = RecommendationModel(
+            fingerprint="abc123", sequence=[1, 2], subsequences=[[1], [2], [1, 2]], createdAt=datetime.now()
+        )
+
+        r = self.web_client.get(
+            f"/api/v1/recommendations/{ObjectId()}", headers={"Accept": f"{PACKED_MEDIA_TYPE}; layout=offsets"}
+        )
+
+        assert r.content[5] == PackedLayout.OFFSETS
+        assert unpack_recommendations(r.content)[0].sequence == [1, 2]
+
+    def test_show_msgpack(self):
+        document = RecommendationModel(
+            _id=str(ObjectId()),
+            fingerprint="abc123",
+            sequence=[1, 2],
+            subsequences=[[1], [2], [1, 2]],
+            createdAt=datetime.now(),
+        )
+        self.mock_recommendation_repository.get.return_value = document
+
+        r = self.web_client.get(f"/api/v1/recommendations/{document.id}", headers={"Accept": MSGPACK_MEDIA_TYPE})
+
+        assert r.status_code == 200
+        assert r.headers["content-type"] == MSGPACK_MEDIA_TYPE
+        assert r.content == packb(document.model_dump(mode="json", by_alias=True))
+
+    @pytest.mark.parametrize(
+        "accept, content_type",
+        [
+            ("application/json, application/msgpack;q=0", "application/json"),
+            ("application/msgpack;q=0", "application/json"),
+            ("application/json;q=0.5, application/msgpack", MSGPACK_MEDIA_TYPE),
+            ("application/json, application/msgpack", "application/json"),
+            ("*/*;q=0.1, APPLICATION/MSGPACK", MSGPACK_MEDIA_TYPE),
+            ("text/html, */*;q=0.8", "application/json"),
+            (f"{PACKED_MEDIA_TYPE};q=0.2, application/msgpack;q=0.9", MSGPACK_MEDIA_TYPE),
+        ],
+    )
+    def test_show_negotiates_the_media_type_by_quality(self, accept: str, content_type: str):
+        self.mock_recommendation_repository.get.return_value = RecommendationModel(
+            _id=str(ObjectId()), fingerprint="abc123", sequence=[1], subsequences=[[1]], createdAt=datetime.now()
+        )
+
+        r = self.web_client.get(f"/api/v1/recommendations/{ObjectId()}", headers={"Accept": accept})
+
+        assert r.status_code == 200
+        assert r.headers["content-type"] == content_type
+
+    def test_show_ndjson_not_found_returns_404(self):
+        self.mock_recommendation_repository.get_summary.return_value = None
+
+        r = self.web_client.get(
+            f"/api/v1/recommendations/{ObjectId()}",
+            headers={"Accept": "application/x-ndjson"},
+        )
+        assert r.status_code == 404
+
+    def _mock_summary(self, sequence: list[int]) -> str:
+        _id = str(ObjectId())
+        self.mock_recommendation_repository.get_summary.return_value = RecommendationSummaryModel(
+            _id=_id,
+            fingerprint="abc123",
+            sequence=sequence,
+            createdAt=datetime.now(timezone.utc),
+        )
+        return _id
+
+    def test_search_returns_summaries_and_next_cursor(self):
+        documents = [
+            RecommendationSummaryModel(
+                _id=str(ObjectId()), fingerprint="abc123", sequence=[1, 2, 3], createdAt=datetime.now(timezone.utc)
+            )
+            for _ in range(2)
+        ]
+        self.mock_recommendation_repository.search.return_value = documents
+
+        r = self.web_client.get("/api/v1/recommendations/search?contains=3,1&limit=2")
+        assert r.status_code == 200
+        body = r.json()
+        assert [item["sequence"] for item in body] == [[1, 2, 3], [1, 2, 3]]
+        assert body[0]["_id"] == documents[0].id
+        assert "subsequences" not in body[0]
+        cursor = PageCursor.decode(r.headers[NEXT_CURSOR_HEADER])
+        assert cursor.id == ObjectId(documents[-1].id)
+        self.mock_recommendation_repository.search.assert_awaited_once_with(
+            [1, 3], SearchMatch.ALL, limit=2, after=None
+        )
+
+    def test_search_last_page_has_no_cursor(self):
+        self.mock_recommendation_repository.search.return_value = []
+        after = PageCursor(created_at=datetime(2025, 1, 1, tzinfo=timezone.utc), id=ObjectId())
+
+        r = self.web_client.get(f"/api/v1/recommendations/search?contains=1&match=any&after={after.encode()}")
+        assert r.status_code == 200
+        assert r.json() == []
+        assert NEXT_CURSOR_HEADER not in r.headers
+        assert self.mock_recommendation_repository.search.await_args.args[1] == SearchMatch.ANY
+        assert self.mock_recommendation_repository.search.await_args.kwargs["after"] == after
+
+    @pytest.mark.parametrize("query", ["contains=1,a", "contains=", "contains=1&after=!"])
+    def test_search_invalid_query_returns_400(self, query: str):
+        r = self.web_client.get(f"/api/v1/recommendations/search?{query}")
+        assert r.status_code == 400
+
+    def test_subsequences_page_by_global_rank(self):
+        _id = self._mock_summary([1, 2, 3])
+
+        r = self.web_client.get(f"/api/v1/recommendations/{_id}/subsequences", params={"offset": 2, "limit": 3})
+        body = r.json()
+
+        assert r.status_code == 200
+        assert body == {"total": 7, "offset": 2, "limit": 3, "length": None, "subsequences": [[3], [1, 2], [1, 3]]}
+        self.mock_recommendation_repository.get_summary.assert_awaited_once_with(_id)
+        self.mock_recommendation_repository.get.assert_not_awaited()
+
+    def test_subsequences_page_by_length(self):
+        _id = self._mock_summary([1, 2, 3, 4])
+
+        r = self.web_client.get(
+            f"/api/v1/recommendations/{_id}/subsequences",
+            params={"length": 2, "offset": 4, "limit": 10},
+        )
+        body = r.json()
+
+        assert r.status_code == 200
+        assert body["total"] == 6
+        assert body["subsequences"] == [[2, 4], [3, 4]]
+
+    def test_subsequences_page_of_large_basket(self):
+        _id = self._mock_summary(list(range(1, 41)))
+
+        r = self.web_client.get(
+            f"/api/v1/recommendations/{_id}/subsequences",
+            params={"offset": 2**40 - 2, "limit": 5},
+        )
+        body = r.json()
+
+        assert r.status_code == 200
+        assert body["total"] == 2**40 - 1
+        assert body["subsequences"] == [list(range(1, 41))]
+
+    def test_subsequences_page_out_of_range_is_empty(self):
+        _id = self._mock_summary([1, 2])
+
+        r = self.web_client.get(f"/api/v1/recommendations/{_id}/subsequences", params={"offset": 10})
+
+        assert r.status_code == 200
+        assert r.json()["subsequences"] == []
+
+    def test_subsequences_invalid_id_returns_400(self):
+        r = self.web_client.get("/api/v1/recommendations/not-a-valid-object-id/subsequences")
+        assert r.status_code == 400
+
+    def test_subsequences_not_found_returns_404(self):
+        self.mock_recommendation_repository.get_summary.return_value = None
+
+        r = self.web_client.get(f"/api/v1/recommendations/{ObjectId()}/subsequences")
+        assert r.status_code == 404
+
     def test_create_conflict_returns_409(self):
         self.mock_recommendation_repository.create.side_effect = RecommendationDuplicate("exists!")
 
@@ -73,6 +305,45 @@ class TestUnitRecommendationResponse:
         assert r.status_code == 409
         assert "already exists" in r.json()["detail"].lower()
 
+    def test_create_repeated_basket_is_not_generated_again(self):
+        self.mock_recommendation_repository.create.side_effect = RecommendationDuplicate("exists!")
+
+        self.web_client.post("/api/v1/recommendations", json={"product_ids": [3, 1, 2]})
+        self.web_client.post("/api/v1/recommendations", json={"product_ids": [1, 2, 3, 3]})
+        first_args = self.mock_recommendation_repository.create.await_args_list[0].args
+        second_args = self.mock_recommendation_repository.create.await_args_list[1].args
+
+        assert second_args[2] is first_args[2]
+
+        r = self.web_client.get("/api/v1/recommendations/stats")
+        assert r.status_code == 200
+        assert r.json()["subsequences_cache"]["hits"] == 1
+        assert r.json()["subsequences_cache"]["misses"] == 1
+
+    def test_create_existing_basket_returns_409_without_generating(self):
+        self.mock_recommendation_repository.exists.return_value = True
+
+        r = self.web_client.post("/api/v1/recommendations", json={"product_ids": [1, 2, 3]})
+        assert r.status_code == 409
+        self.mock_recommendation_repository.create.assert_not_awaited()
+
+    def test_create_existing_basket_returns_existing_document(self, monkeypatch):
+        settings = dataclasses.replace(Settings.get(), app_create_return_existing=True)
+        monkeypatch.setattr(Settings, "_singleton", settings)
+        self.mock_recommendation_repository.exists.return_value = True
+        self.mock_recommendation_repository.get_by_fingerprint.return_value = RecommendationModel(
+            _id=str(ObjectId()),
+            fingerprint="abc123",
+            sequence=[1, 2],
+            subsequences=[[1], [2], [1, 2]],
+            createdAt=datetime.now(timezone.utc),
+        )
+
+        r = self.web_client.post("/api/v1/recommendations", json={"product_ids": [2, 1]})
+        assert r.status_code == 200
+        assert r.json()["subsequences"] == [[1], [2], [1, 2]]
+        self.mock_recommendation_repository.create.assert_not_awaited()
+
     def test_create_repo_exception_returns_500(self):
         self.mock_recommendation_repository.create.side_effect = RecommendationRepositoryException("db down")
 
@@ -87,7 +358,7 @@ class TestUnitRecommendationResponse:
             "subsequences": [[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]],
             "createdAt": datetime.now(timezone.utc).isoformat(),
         }
-        self.mock_recommendation_repository.create.return_value = doc
+        self.mock_recommendation_repository.create.return_value = RecommendationModel(**doc)
 
         r = self.web_client.post("/api/v1/recommendations", json={"product_ids": [3, 1, 2, 2]})
         args, _ = self.mock_recommendation_repository.create.await_args
@@ -99,6 +370,218 @@ class TestUnitRecommendationResponse:
         assert args[1] == [1, 2, 3]
         assert len(args[2]) == 7
 
+    def test_create_body_is_byte_for_byte_the_response_model(self):
+        document = RecommendationModel.model_construct(
+            id=str(ObjectId()),
+            fingerprint=b"\x01\xff",
+            sequence=[1, 2, 3],
+            subsequences=[[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]],
+            createdAt=datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc),
+        )
+        self.mock_recommendation_repository.create.return_value = document
+
+        r = self.web_client.post("/api/v1/recommendations", json={"product_ids": [3, 1, 2]})
+
+        # What FastAPI made of the validated response model before: its JSON dump, compact, non ASCII as is
+        validated = RecommendationModel.model_validate(document.model_dump(by_alias=True))
+        expected = json.dumps(
+            validated.model_dump(mode="json", by_alias=True), separators=(",", ":"), ensure_ascii=False
+        ).encode()
+        assert r.status_code == 201
+        assert r.headers["content-type"] == "application/json"
+        assert r.content == expected
+
+    def test_create_large_basket_streams_the_same_body(self, monkeypatch):
+        settings = dataclasses.replace(Settings.get(), app_executor_inline_max_products=2, app_stream_chunk_size=2)
+        monkeypatch.setattr(Settings, "_singleton", settings)
+        document = RecommendationModel.model_construct(
+            id=str(ObjectId()),
+            fingerprint=b"\x01\xff",
+            sequence=[1, 2, 3],
+            subsequences=[[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]],
+            createdAt=datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc),
+        )
+        self.mock_recommendation_repository.create.return_value = document
+
+        r = self.web_client.post("/api/v1/recommendations", json={"product_ids": [3, 1, 2]})
+
+        assert r.status_code == 201
+        assert r.headers["content-type"] == "application/json"
+        assert "content-length" not in r.headers
+        assert r.content == document.model_dump_json(by_alias=True).encode()
+
+    @pytest.mark.parametrize("response_cache_max_bytes", [0, 1024])
+    def test_show_large_basket_sends_the_same_body(self, monkeypatch, response_cache_max_bytes):
+        settings = dataclasses.replace(
+            Settings.get(),
+            app_executor_inline_max_products=2,
+            app_stream_chunk_size=2,
+            app_response_cache_max_bytes=response_cache_max_bytes,
+        )
+        monkeypatch.setattr(Settings, "_singleton", settings)
+        document = RecommendationModel.model_construct(
+            id=str(ObjectId()),
+            fingerprint="abc123",
+            sequence=[1, 2, 3],
+            subsequences=[[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]],
+            createdAt=datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc),
+        )
+        self.mock_recommendation_repository.get.return_value = document
+
+        r = self.web_client.get(f"/api/v1/recommendations/{document.id}")
+
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "application/json"
+        assert r.content == document.model_dump_json(by_alias=True).encode()
+
+    def test_create_executor_busy_returns_503(self):
+        executor = Mock()
+        executor.generate = AsyncMock(side_effect=SubsequencesExecutorBusy("busy"))
+        self.app.dependency_overrides[subsequences_executor] = lambda: executor
+
+        r = self.web_client.post("/api/v1/recommendations", json={"product_ids": list(range(30))})
+
+        assert r.status_code == 503
+        self.mock_recommendation_repository.create.assert_not_awaited()
+
+    def test_create_ndjson_streams_subsequences(self):
+        self.mock_recommendation_repository.create.return_value = RecommendationModel(
+            _id=str(ObjectId()),
+            fingerprint="abc123",
+            sequence=[1, 2],
+            subsequences=[[1], [2], [1, 2]],
+            createdAt=datetime.now(timezone.utc),
+        )
+
+        r = self.web_client.post(
+            "/api/v1/recommendations",
+            json={"product_ids": [2, 1]},
+            headers={"Accept": "application/x-ndjson"},
+        )
+        lines = [json.loads(line) for line in r.text.splitlines()]
+
+        assert r.status_code == 201
+        assert r.headers["content-type"] == "application/x-ndjson"
+        assert lines[0]["sequence"] == [1, 2]
+        assert lines[1:] == [[1], [2], [1, 2]]
+
+    def test_create_batch_reports_each_basket(self):
+        async def create_many(recommendations):
+            return [
+                RecommendationModel(
+                    _id=str(ObjectId()),
+                    fingerprint=recommendation.fingerprint,
+                    sequence=recommendation.sequence,
+                    subsequences=[],
+                    createdAt=datetime.now(timezone.utc),
+                )
+                if recommendation.sequence != [3]
+                else RecommendationRepositoryException("WriteError while inserting document")
+                for recommendation in recommendations
+            ]
+
+        self.mock_recommendation_repository.create_many.side_effect = create_many
+
+        r = self.web_client.post("/api/v1/recommendations/batch", json={"baskets": [[2, 1], [3], [1, 2]]})
+        assert r.status_code == 200
+        body = r.json()
+        assert (body["created"], body["duplicates"], body["errors"]) == (1, 1, 1)
+        assert [item["status"] for item in body["items"]] == ["created", "error", "duplicate"]
+        assert body["items"][0]["id"] is not None
+        assert body["items"][2]["fingerprint"] == body["items"][0]["fingerprint"]
+        assert isinstance(body["items"][0]["fingerprint"], str)
+
+    def test_create_batch_too_large_returns_413(self):
+        baskets = [[count] for count in range(Settings.get().app_batch_max_size + 1)]
+
+        r = self.web_client.post("/api/v1/recommendations/batch", json={"baskets": baskets})
+        assert r.status_code == 413
+
+    def test_create_batch_empty_returns_422(self):
+        r = self.web_client.post("/api/v1/recommendations/batch", json={"baskets": []})
+        assert r.status_code == 422
+
+    def test_update_adds_and_removes_products(self):
+        _id = str(ObjectId())
+        self.mock_recommendation_repository.get.return_value = RecommendationModel(
+            _id=_id,
+            fingerprint="abc123",
+            sequence=[1, 2],
+            subsequences=[[1], [2], [1, 2]],
+            createdAt=datetime.now(timezone.utc),
+        )
+
+        r = self.web_client.patch(f"/api/v1/recommendations/{_id}", json={"add": [3], "remove": [1]})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["sequence"] == [2, 3]
+        assert body["subsequences"] == [[2], [3], [2, 3]]
+        self.mock_recommendation_repository.update.assert_awaited_once()
+
+    def test_show_does_not_serve_the_cached_body_of_an_updated_document(self):
+        _id = str(ObjectId())
+        self.mock_recommendation_repository.get.return_value = RecommendationModel(
+            _id=_id, fingerprint="abc123", sequence=[1, 2], subsequences=[[1], [2], [1, 2]], createdAt=datetime.now()
+        )
+        self.web_client.get(f"/api/v1/recommendations/{_id}")
+
+        # Updated through another worker, whose cache is not this one
+        self.mock_recommendation_repository.get.return_value = RecommendationModel(
+            _id=_id, fingerprint="def456", sequence=[1, 2, 3], subsequences=[[1], [2], [3]], createdAt=datetime.now()
+        )
+
+        r = self.web_client.get(f"/api/v1/recommendations/{_id}")
+        assert r.json()["sequence"] == [1, 2, 3]
+        assert self.mock_recommendation_repository.get.await_count == 2
+
+    def test_show_without_response_cache_does_not_cache_the_body(self, monkeypatch):
+        monkeypatch.setattr(Settings, "_singleton", dataclasses.replace(Settings.get(), app_response_cache_max_bytes=0))
+        _id = str(ObjectId())
+        self.mock_recommendation_repository.get.return_value = RecommendationModel(
+            _id=_id, fingerprint="abc123", sequence=[1, 2], subsequences=[[1], [2], [1, 2]], createdAt=datetime.now()
+        )
+
+        assert self.web_client.get(f"/api/v1/recommendations/{_id}").status_code == 200
+        stats = self.web_client.get("/api/v1/recommendations/stats").json()["response_body_cache"]
+        assert stats["entries"] == 0
+
+    def test_update_without_products_returns_422(self):
+        r = self.web_client.patch(f"/api/v1/recommendations/{ObjectId()}", json={})
+        assert r.status_code == 422
+
+    def test_update_invalid_id_returns_400(self):
+        r = self.web_client.patch("/api/v1/recommendations/not-a-valid-object-id", json={"add": [1]})
+        assert r.status_code == 400
+
+    def test_update_not_found_returns_404(self):
+        self.mock_recommendation_repository.get.return_value = None
+
+        r = self.web_client.patch(f"/api/v1/recommendations/{ObjectId()}", json={"add": [1]})
+        assert r.status_code == 404
+
+    def test_update_removing_every_product_returns_422(self):
+        _id = str(ObjectId())
+        self.mock_recommendation_repository.get.return_value = RecommendationModel(
+            _id=_id, fingerprint="abc123", sequence=[1], subsequences=[[1]], createdAt=datetime.now(timezone.utc)
+        )
+
+        r = self.web_client.patch(f"/api/v1/recommendations/{_id}", json={"remove": [1]})
+        assert r.status_code == 422
+        assert "at least one product" in r.json()["detail"].lower()
+
+    @pytest.mark.parametrize(
+        "error", [RecommendationDuplicate("exists!"), RecommendationUpdateConflict("modified concurrently")]
+    )
+    def test_update_conflict_returns_409(self, error: Exception):
+        _id = str(ObjectId())
+        self.mock_recommendation_repository.get.return_value = RecommendationModel(
+            _id=_id, fingerprint="abc123", sequence=[1], subsequences=[[1]], createdAt=datetime.now(timezone.utc)
+        )
+        self.mock_recommendation_repository.update.side_effect = error
+
+        r = self.web_client.patch(f"/api/v1/recommendations/{_id}", json={"add": [2]})
+        assert r.status_code == 409
+
     def test_list_success_returns_only_sequence_and_subsequences(self):
         docs = [
             SimpleNamespace(sequence=[1, 2], subsequences=[[1], [2], [1, 2]]),
@@ -113,7 +596,164 @@ class TestUnitRecommendationResponse:
         assert isinstance(body, list)
         assert body[0] == {"sequence": [1, 2], "subsequences": [[1], [2], [1, 2]]}
         assert body[1] == {"sequence": [2, 3], "subsequences": [[2], [3], [2, 3]]}
-        self.mock_recommendation_repository.paginate.assert_awaited_once_with(limit=10)
+        self.mock_recommendation_repository.paginate.assert_awaited_once_with(limit=10, after=None)
+
+    def test_list_summary_does_not_read_subsequences(self):
+        created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        docs = [SimpleNamespace(id="a", fingerprint="f", sequence=[1, 2, 3], createdAt=created_at)]
+        self.mock_recommendation_repository.paginate_summaries.return_value = docs
+
+        r = self.web_client.get("/api/v1/recommendations", params={"view": "summary"})
+
+        assert r.status_code == 200
+        assert r.json() == [
+            {"fingerprint": "f", "sequence": [1, 2, 3], "subsequences_count": 7, "createdAt": "2025-01-01T00:00:00Z"}
+        ]
+        self.mock_recommendation_repository.paginate_summaries.assert_awaited_once_with(limit=10, after=None)
+        self.mock_recommendation_repository.paginate.assert_not_awaited()
+
+    def test_list_fields(self):
+        docs = [SimpleNamespace(id="a", fingerprint=b"\x01\xab", sequence=[1, 2], subsequences=[[1], [2], [1, 2]])]
+        self.mock_recommendation_repository.paginate.return_value = docs
+
+        r = self.web_client.get("/api/v1/recommendations", params={"fields": "id,fingerprint,subsequences"})
+
+        assert r.status_code == 200
+        assert r.json() == [{"id": "a", "fingerprint": "01ab", "subsequences": [[1], [2], [1, 2]]}]
+        self.mock_recommendation_repository.paginate.assert_awaited_once_with(limit=10, after=None)
+
+    def test_list_msgpack(self):
+        docs = [SimpleNamespace(id="a", fingerprint=b"\x01\xab", sequence=[1, 2], subsequences=[[1], [2], [1, 2]])]
+        self.mock_recommendation_repository.paginate.return_value = docs
+
+        r = self.web_client.get(
+            "/api/v1/recommendations",
+            params={"fields": "id,fingerprint,subsequences"},
+            headers={"Accept": "application/msgpack"},
+        )
+
+        assert r.status_code == 200
+        assert r.headers["content-type"] == MSGPACK_MEDIA_TYPE
+        assert r.content == packb([{"id": "a", "fingerprint": "01ab", "subsequences": [[1], [2], [1, 2]]}])
+
+    def test_list_packed_summaries_with_next_cursor(self):
+        docs = [
+            RecommendationSummaryModel(
+                _id=str(ObjectId()), fingerprint="abc", sequence=[index], createdAt=datetime.now()
+            )
+            for index in range(2)
+        ]
+        self.mock_recommendation_repository.paginate_summaries.return_value = docs
+
+        r = self.web_client.get(
+            "/api/v1/recommendations", params={"view": "summary", "limit": 2}, headers={"Accept": PACKED_MEDIA_TYPE}
+        )
+        records = unpack_recommendations(r.content)
+
+        assert r.status_code == 200
+        assert NEXT_CURSOR_HEADER in r.headers
+        assert [record.id for record in records] == [doc.id for doc in docs]
+        assert [record.subsequences for record in records] == [None, None]
+
+    @pytest.mark.parametrize("fields", ["", "sequence,nope"])
+    def test_list_invalid_fields_returns_400(self, fields):
+        r = self.web_client.get("/api/v1/recommendations", params={"fields": fields})
+
+        assert r.status_code == 400
+        self.mock_recommendation_repository.paginate.assert_not_awaited()
+
+    def test_list_next_cursor_continues_after_the_last_document(self):
+        last_id = ObjectId()
+        created_at = datetime(2025, 1, 1, 12, 30, 15, 123000, tzinfo=timezone.utc)
+        docs = [
+            SimpleNamespace(id=str(ObjectId()), sequence=[1], createdAt=created_at),
+            SimpleNamespace(id=str(last_id), sequence=[2], createdAt=created_at),
+        ]
+        self.mock_recommendation_repository.paginate_summaries.return_value = docs
+
+        r = self.web_client.get("/api/v1/recommendations", params={"fields": "sequence", "limit": 2})
+        next_cursor = r.headers["X-Next-Cursor"]
+        self.web_client.get("/api/v1/recommendations", params={"fields": "sequence", "limit": 2, "after": next_cursor})
+
+        assert r.status_code == 200
+        after = self.mock_recommendation_repository.paginate_summaries.await_args.kwargs["after"]
+        assert after == PageCursor(created_at=created_at, id=last_id)
+
+    def test_list_last_page_has_no_next_cursor(self):
+        self.mock_recommendation_repository.paginate.return_value = [SimpleNamespace(sequence=[1], subsequences=[[1]])]
+
+        r = self.web_client.get("/api/v1/recommendations", params={"limit": 2})
+
+        assert r.status_code == 200
+        assert "X-Next-Cursor" not in r.headers
+
+    @pytest.mark.parametrize("params", [{"after": "not-a-cursor"}, {"limit": 0}, {"limit": 101}])
+    def test_list_invalid_page_returns_4xx(self, params):
+        r = self.web_client.get("/api/v1/recommendations", params=params)
+
+        assert r.status_code in (400, 422)
+        self.mock_recommendation_repository.paginate.assert_not_awaited()
+
+    def test_export_streams_one_document_per_line(self):
+        created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        ids = [str(ObjectId()) for _ in range(3)]
+
+        async def export(**_):
+            for count, _id in enumerate(ids, start=1):
+                yield RecommendationSummaryModel(
+                    _id=_id, fingerprint=f"f{count}", sequence=list(range(1, count + 1)), createdAt=created_at
+                )
+
+        self.mock_recommendation_repository.export = Mock(side_effect=export)
+
+        r = self.web_client.get(
+            "/api/v1/recommendations/export",
+            params={"view": "summary", "since": "2025-01-01T00:00:00Z", "batch_size": 2},
+        )
+        lines = r.content.splitlines()
+
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "application/x-ndjson"
+        assert [json.loads(line)["_id"] for line in lines] == ids
+        assert json.loads(lines[2]) == {
+            "_id": ids[2],
+            "fingerprint": "f3",
+            "sequence": [1, 2, 3],
+            "createdAt": "2025-01-01T00:00:00Z",
+        }
+        self.mock_recommendation_repository.export.assert_called_once_with(
+            since=created_at, with_subsequences=False, batch_size=2
+        )
+
+    def test_export_full_by_default(self):
+        async def export(**_):
+            yield RecommendationModel(
+                fingerprint="f", sequence=[1, 2], subsequences=[[1], [2], [1, 2]], createdAt=datetime.now(timezone.utc)
+            )
+
+        self.mock_recommendation_repository.export = Mock(side_effect=export)
+
+        r = self.web_client.get("/api/v1/recommendations/export")
+
+        assert r.status_code == 200
+        assert json.loads(r.content)["subsequences"] == [[1], [2], [1, 2]]
+        assert self.mock_recommendation_repository.export.call_args.kwargs["with_subsequences"] is True
+
+    def test_export_repo_exception_ends_with_an_error_line(self):
+        async def export(**_):
+            yield RecommendationModel(
+                fingerprint="f", sequence=[1], subsequences=[[1]], createdAt=datetime.now(timezone.utc)
+            )
+            raise RecommendationRepositoryException("nope")
+
+        self.mock_recommendation_repository.export = Mock(side_effect=export)
+
+        r = self.web_client.get("/api/v1/recommendations/export")
+        lines = r.content.splitlines()
+
+        assert r.status_code == 200
+        assert json.loads(lines[0])["fingerprint"] == "f"
+        assert "unexpected error" in json.loads(lines[1])["error"].lower()
 
     def test_list_repo_exception_returns_500(self):
         self.mock_recommendation_repository.paginate.side_effect = RecommendationRepositoryException("nope")
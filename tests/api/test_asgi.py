@@ -0,0 +1,50 @@
+import dataclasses
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from recommendation_engine.app.providers import (
+    RecommendationRepositorySingleton,
+    fingerprint_filter,
+    recommendation_repository,
+)
+from recommendation_engine.app.recommendation.repository import RecommendationRepository
+from recommendation_engine.asgi import create_app
+from recommendation_engine.settings import Settings
+
+
+@pytest.mark.unit
+class TestUnitLifespan:
+    @pytest.fixture(autouse=True)
+    def clear_providers(self):
+        fingerprint_filter.cache_clear()
+        recommendation_repository.cache_clear()
+        yield
+        fingerprint_filter.cache_clear()
+        recommendation_repository.cache_clear()
+
+    @pytest.fixture
+    def collection(self, monkeypatch) -> MagicMock:
+        cursor = MagicMock()
+        cursor.hint = MagicMock(return_value=cursor)
+        cursor.__aiter__.return_value = [{"fingerprint": "a"}, {"fingerprint": b"\x01"}]
+        collection = MagicMock()
+        collection.find = MagicMock(return_value=cursor)
+        monkeypatch.setattr(RecommendationRepository, "collection", property(lambda _: collection))
+        return collection
+
+    def test_requests_use_the_repository_whose_fingerprint_filter_was_loaded(self, monkeypatch, collection):
+        settings = dataclasses.replace(Settings.get(), app_fingerprint_filter_enabled=True)
+        monkeypatch.setattr(Settings, "_singleton", settings)
+        app = create_app()
+
+        @app.get("/fingerprint-filter")
+        async def loaded(repository: RecommendationRepositorySingleton) -> dict[str, bool | int]:
+            return {"loaded": repository.fingerprint_filter_loaded, "entries": len(repository.fingerprint_filter)}
+
+        with TestClient(app) as client:
+            r = client.get("/fingerprint-filter")
+
+        assert r.json() == {"loaded": True, "entries": 2}
+        assert collection.find.call_count == 1
@@ -0,0 +1,26 @@
+from collections import Counter
+
+import pytest
+
+from recommendation_engine.app.cooccurrence.algorithm import count_cooccurrence_pairs, diff_cooccurrence_pairs
+
+
+@pytest.mark.unit
+class TestUnitCooccurrenceAlgorithm:
+    def test_count_cooccurrence_pairs(self):
+        pairs = count_cooccurrence_pairs([[1, 2], [1, 2, 3], [4]])
+
+        assert pairs == Counter({(1, 2): 2, (2, 1): 2, (1, 3): 1, (3, 1): 1, (2, 3): 1, (3, 2): 1})
+
+    def test_count_cooccurrence_pairs_empty(self):
+        assert count_cooccurrence_pairs([]) == Counter()
+
+    def test_diff_cooccurrence_pairs(self):
+        added = diff_cooccurrence_pairs([2, 3], [2, 3, 4])
+        removed = diff_cooccurrence_pairs([1, 2, 3], [2, 3])
+
+        assert added == Counter({(2, 4): 1, (4, 2): 1, (3, 4): 1, (4, 3): 1})
+        assert removed == Counter({(1, 2): -1, (2, 1): -1, (1, 3): -1, (3, 1): -1})
+
+    def test_diff_cooccurrence_pairs_unchanged(self):
+        assert diff_cooccurrence_pairs([1, 2], [1, 2]) == Counter()
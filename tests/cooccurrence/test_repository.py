@@ -0,0 +1,61 @@
+from collections import Counter
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pymongo.errors import PyMongoError
+
+from recommendation_engine.app.cooccurrence.models import RelatedProductModel
+from recommendation_engine.app.cooccurrence.repository import CooccurrenceRepository, CooccurrenceRepositoryException
+
+
+@pytest.mark.unit
+class TestUnitCooccurrenceRepository:
+    @pytest.fixture
+    def collection(self):
+        collection = MagicMock()
+        collection.bulk_write = AsyncMock()
+        return collection
+
+    @pytest.fixture
+    def repository(self, collection):
+        return CooccurrenceRepository(SimpleNamespace(db={CooccurrenceRepository.COLLECTION_NAME: collection}))
+
+    async def test_increment_upserts_every_pair(self, repository, collection):
+        await repository.increment(Counter({(1, 2): 1, (2, 1): 1, (1, 3): -1, (3, 1): 0}))
+
+        (updates,) = collection.bulk_write.await_args.args
+        assert collection.bulk_write.await_args.kwargs == {"ordered": False}
+        assert [(update._filter, update._doc, update._upsert) for update in updates] == [
+            ({"product": 1, "other": 2}, {"$inc": {"count": 1}}, True),
+            ({"product": 2, "other": 1}, {"$inc": {"count": 1}}, True),
+            ({"product": 1, "other": 3}, {"$inc": {"count": -1}}, True),
+        ]
+
+    async def test_increment_nothing(self, repository, collection):
+        await repository.increment(Counter())
+
+        collection.bulk_write.assert_not_awaited()
+
+    async def test_increment_error(self, repository, collection):
+        collection.bulk_write.side_effect = PyMongoError("boom")
+
+        with pytest.raises(CooccurrenceRepositoryException):
+            await repository.increment(Counter({(1, 2): 1}))
+
+    async def test_related_reads_the_top_counts(self, repository, collection):
+        cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        cursor.limit.return_value = cursor
+        cursor.to_list = AsyncMock(return_value=[{"other": 2, "count": 5}, {"other": 3, "count": 1}])
+        collection.find = MagicMock(return_value=cursor)
+
+        related = await repository.related(1, limit=2)
+
+        assert related == [RelatedProductModel(product_id=2, count=5), RelatedProductModel(product_id=3, count=1)]
+        assert collection.find.call_args.args[0] == {"product": 1, "count": {"$gt": 0}}
+        cursor.sort.assert_called_once_with("count", -1)
+        cursor.limit.assert_called_once_with(2)
+
+    def test_related_query_is_indexed(self):
+        assert {"key": [("product", 1), ("count", -1)], "unique": False} in CooccurrenceRepository.COLLECTION_INDEXES
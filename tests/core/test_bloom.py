@@ -0,0 +1,53 @@
+import pytest
+
+from recommendation_engine.app.core.bloom import BloomFilter
+
+
+@pytest.mark.unit
+class TestUnitBloomFilter:
+    def test_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f"key-{index}".encode() for index in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        assert all(key in bloom for key in keys)
+        assert len(bloom) == 1000
+
+    def test_false_positive_rate_is_bounded(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for index in range(1000):
+            bloom.add(f"key-{index}")
+
+        false_positives = sum(f"other-{index}" in bloom for index in range(10_000))
+
+        assert false_positives / 10_000 < 0.03
+        assert bloom.false_positive_rate() == pytest.approx(0.01, rel=0.1)
+
+    def test_sizing(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+
+        assert bloom.bits == 9586
+        assert bloom.hashes == 7
+        assert bloom.nbytes == 1199
+
+    def test_max_bytes_caps_the_size(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01, max_bytes=100)
+
+        assert bloom.nbytes == 100
+        assert bloom.bits == 800
+
+    def test_stats(self):
+        bloom = BloomFilter(capacity=100, error_rate=0.01)
+        bloom.add(b"a")
+
+        assert b"a" in bloom
+        assert b"b" not in bloom
+        stats = bloom.stats()
+        assert (stats.entries, stats.lookups, stats.negatives) == (1, 2, 1)
+        assert stats.nbytes == bloom.nbytes
+
+    @pytest.mark.parametrize("capacity, error_rate", [(0, 0.01), (10, 0), (10, 1)])
+    def test_invalid_arguments(self, capacity: int, error_rate: float):
+        with pytest.raises(ValueError):
+            BloomFilter(capacity=capacity, error_rate=error_rate)
@@ -0,0 +1,71 @@
+import pytest
+
+from recommendation_engine.app.core.cache import ByteBudgetLRUCache, CacheStats
+
+
+@pytest.mark.unit
+class TestUnitByteBudgetLRUCache:
+    @pytest.fixture
+    def cache(self) -> ByteBudgetLRUCache[str, bytes]:
+        return ByteBudgetLRUCache(max_bytes=10, sizeof=len)
+
+    def test_get_counts_hits_and_misses(self, cache):
+        cache.put("a", b"123")
+
+        assert cache.get("a") == b"123"
+        assert cache.get("b") is None
+        assert cache.stats() == CacheStats(hits=1, misses=1, evictions=0, entries=1, nbytes=3, max_bytes=10)
+
+    def test_evicts_least_recently_used_by_bytes(self, cache):
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        cache.get("a")
+        cache.put("c", b"1234")
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.stats().evictions == 1
+        assert cache.stats().nbytes == 8
+
+    def test_single_large_entry_evicts_many_small_ones(self, cache):
+        for key in "abcde":
+            cache.put(key, b"1")
+        cache.put("large", b"123456789")
+
+        assert len(cache) == 2
+        assert "e" in cache
+        assert cache.stats().evictions == 4
+
+    def test_values_larger_than_budget_are_not_cached(self, cache):
+        cache.put("a", b"1")
+        cache.put("huge", b"12345678901")
+
+        assert "huge" not in cache
+        assert "a" in cache
+        assert cache.stats().evictions == 0
+
+    def test_put_replaces_existing_entry(self, cache):
+        cache.put("a", b"123")
+        cache.put("a", b"12345")
+
+        assert cache.get("a") == b"12345"
+        assert cache.stats().nbytes == 5
+
+    def test_pop_and_clear(self, cache):
+        cache.put("a", b"123")
+        cache.put("b", b"45")
+
+        assert cache.pop("a") == b"123"
+        assert cache.pop("a") is None
+        assert cache.stats().nbytes == 2
+
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.stats().nbytes == 0
+
+    def test_zero_budget_disables_the_cache(self):
+        cache: ByteBudgetLRUCache[str, bytes] = ByteBudgetLRUCache(max_bytes=0, sizeof=len)
+        cache.put("a", b"1")
+
+        assert cache.get("a") is None
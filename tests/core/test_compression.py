@@ -0,0 +1,148 @@
+import asyncio
+import gzip
+import importlib.util
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from recommendation_engine.app.core.compression import CompressionMiddleware, ResponseEncoder, negotiate_encoding
+
+
+BODY = b"[1,2,3]" * 1000
+
+
+@pytest.mark.unit
+class TestUnitNegotiateEncoding:
+    @pytest.mark.parametrize(
+        "accept_encoding, expected",
+        [
+            ("gzip, deflate, br, zstd", "zstd"),
+            ("gzip, br", "br"),
+            ("GZIP", "gzip"),
+            ("zstd;q=0, br;q=0.0, gzip;q=0.1", "gzip"),
+            ("*", "zstd"),
+            ("*, zstd;q=0", "br"),
+            ("identity", None),
+            ("", None),
+        ],
+    )
+    def test_preferred_accepted_encoding(self, accept_encoding, expected):
+        assert negotiate_encoding(accept_encoding, ("zstd", "br", "gzip")) == expected
+
+
+@pytest.mark.unit
+class TestUnitResponseEncoder:
+    def test_missing_packages_are_skipped(self, monkeypatch):
+        find_spec = importlib.util.find_spec
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name: None if name == "zstandard" else find_spec(name))
+
+        encoders = ResponseEncoder.available(["zstd", "gzip"], {"zstd": 3, "gzip": 5})
+
+        assert encoders == [ResponseEncoder(encoding="gzip", level=5)]
+
+    def test_gzip_stream(self):
+        stream = ResponseEncoder(encoding="gzip", level=5).stream()
+
+        assert gzip.decompress(stream.compress(BODY[:100]) + stream.compress(BODY[100:]) + stream.finish()) == BODY
+
+    @pytest.mark.parametrize("encoding", ["zstd", "br", "gzip"])
+    def test_flushed_chunks_can_be_decompressed_as_received(self, encoding):
+        decompressor = _decompressor(encoding)
+        stream = ResponseEncoder(encoding=encoding, level=3).stream()
+
+        assert decompressor(stream.compress(BODY[:100]) + stream.flush()) == BODY[:100]
+        assert decompressor(stream.compress(BODY[100:]) + stream.finish()) == BODY[100:]
+
+
+@pytest.mark.unit
+class TestUnitCompressionMiddleware:
+    @pytest.fixture
+    def app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/large")
+        async def large() -> Response:
+            return Response(BODY, media_type="application/json")
+
+        @app.get("/small")
+        async def small() -> Response:
+            return Response(b"[1]", media_type="application/json")
+
+        @app.get("/encoded")
+        async def encoded() -> Response:
+            return Response(gzip.compress(BODY), headers={"Content-Encoding": "gzip"})
+
+        @app.get("/stream")
+        async def stream() -> StreamingResponse:
+            return StreamingResponse((BODY[start : start + 1000] for start in range(0, len(BODY), 1000)))
+
+        app.add_middleware(
+            CompressionMiddleware,
+            encoders=[ResponseEncoder(encoding="gzip", level=5)],
+            minimum_size=1024,
+            thread_minimum_size=4096,
+        )
+        return app
+
+    @pytest.fixture
+    def client(self, app) -> TestClient:
+        return TestClient(app, headers={"Accept-Encoding": "gzip"})
+
+    def test_large_body_is_compressed(self, client):
+        r = client.get("/large")
+
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.headers["vary"] == "Accept-Encoding"
+        assert int(r.headers["content-length"]) < len(BODY) // 10
+        assert r.content == BODY
+
+    def test_small_body_is_sent_as_is(self, client):
+        r = client.get("/small")
+
+        assert "content-encoding" not in r.headers
+        assert r.content == b"[1]"
+
+    def test_body_is_not_compressed_for_clients_without_the_encoding(self, client):
+        r = client.get("/large", headers={"Accept-Encoding": "br"})
+
+        assert "content-encoding" not in r.headers
+        assert r.content == BODY
+
+    def test_encoded_body_is_not_compressed_again(self, client):
+        r = client.get("/encoded")
+
+        assert r.content == BODY
+
+    def test_streamed_body_is_compressed_chunk_by_chunk(self, client):
+        r = client.get("/stream")
+
+        assert r.headers["content-encoding"] == "gzip"
+        assert "content-length" not in r.headers
+        assert r.content == BODY
+
+    def test_large_body_is_compressed_off_the_event_loop(self, client, monkeypatch):
+        to_thread = asyncio.to_thread
+        calls = []
+
+        async def spy(function, *args, **kwargs):
+            calls.append(function)
+            return await to_thread(function, *args, **kwargs)
+
+        monkeypatch.setattr(asyncio, "to_thread", spy)
+
+        assert client.get("/large").content == BODY
+        assert len(calls) == 1
+        assert client.get("/stream").content == BODY
+        assert len(calls) == 1
+
+
+def _decompressor(encoding):
+    """Incremental decompression of the chunks of a stream, with the optional package of the encoding."""
+    if encoding == "zstd":
+        return pytest.importorskip("zstandard").ZstdDecompressor().decompressobj().decompress
+    if encoding == "br":
+        return pytest.importorskip("brotli").Decompressor().process
+    return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
@@ -0,0 +1,22 @@
+import msgpack
+import pytest
+
+from recommendation_engine.app.core.msgpack import packb
+
+
+@pytest.mark.unit
+class TestUnitPackb:
+    @pytest.mark.parametrize(
+        "value",
+        [None, True, 0, 2**64 - 1, -(2**63), 1.5, "abc", b"\x01\x02", [], [1, [2, 3]], {"a": None}],
+    )
+    def test_round_trips(self, value):
+        assert msgpack.unpackb(packb(value)) == value
+
+    def test_encodes_like_the_spec(self):
+        assert packb({"a": [1, True], "b": b"\x01"}) == b"\x82\xa1a\x92\x01\xc3\xa1b\xc4\x01\x01"
+
+    @pytest.mark.parametrize("value, error", [(2**64, OverflowError), (object(), TypeError)])
+    def test_unsupported_values_raise(self, value, error):
+        with pytest.raises(error):
+            packb(value)
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from recommendation_engine.app.core.responses import FastJSONResponse, ResponseBodyCache
+
+
+@pytest.mark.unit
+class TestUnitFastJSONResponse:
+    @pytest.mark.parametrize(
+        "content",
+        [
+            {"sequence": [1, 2], "subsequences": [[1], [2], [1, 2]], "fingerprint": "abc123"},
+            [{"name": "ünïcödé", "price": 1.5, "active": True, "parent": None}],
+            "plain",
+        ],
+    )
+    def test_renders_like_json_response(self, content):
+        assert FastJSONResponse(content).body == JSONResponse(content).body
+
+    def test_renders_datetimes(self):
+        content = {"createdAt": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)}
+
+        assert FastJSONResponse(content).body == b'{"createdAt":"2025-01-02T03:04:05Z"}'
+
+
+@pytest.mark.unit
+class TestUnitResponseBodyCache:
+    @pytest.fixture
+    def cache(self) -> ResponseBodyCache:
+        return ResponseBodyCache(max_bytes=1024)
+
+    def test_put_and_get(self, cache):
+        cache.put(("a", "v1"), b'{"a":1}')
+
+        assert cache.get(("a", "v1")) == b'{"a":1}'
+        assert cache.get(("b", "v1")) is None
+        assert cache.stats().entries == 1
+        assert cache.stats().nbytes == 7
+
+    def test_body_of_another_version_is_not_served(self, cache):
+        cache.put(("a", "v1"), b'{"a":"stale"}')
+
+        assert cache.get(("a", "v2")) is None
+
+    def test_disabled_with_no_budget(self):
+        cache = ResponseBodyCache(max_bytes=0)
+        cache.put(("a", "v1"), b'{"a":1}')
+
+        assert not cache.enabled
+        assert cache.get(("a", "v1")) is None
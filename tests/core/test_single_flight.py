@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from recommendation_engine.app.core.single_flight import SingleFlight, SingleFlightStats
+
+
+@pytest.mark.unit
+class TestUnitSingleFlight:
+    async def test_coalesces_concurrent_calls_with_the_same_key(self):
+        flights: SingleFlight[str, int] = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def function() -> int:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return calls
+
+        tasks = [asyncio.create_task(flights.do("a", function)) for _ in range(5)]
+        other = asyncio.create_task(flights.do("b", function))
+        await asyncio.sleep(0)
+        assert flights.stats().in_flight == 2
+        release.set()
+
+        assert await asyncio.gather(*tasks) in ([1] * 5, [2] * 5)
+        assert await other in (1, 2)
+        assert calls == 2
+        assert flights.stats() == SingleFlightStats(calls=6, coalesced=4, in_flight=0)
+
+    async def test_shares_the_exception(self):
+        flights: SingleFlight[str, int] = SingleFlight()
+        release = asyncio.Event()
+
+        async def function() -> int:
+            await release.wait()
+            raise ValueError("boom")
+
+        tasks = [asyncio.create_task(flights.do("a", function)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+    async def test_runs_again_once_completed(self):
+        flights: SingleFlight[str, int] = SingleFlight()
+
+        async def function() -> int:
+            return 1
+
+        assert await flights.do("a", function) == 1
+        assert await flights.do("a", function) == 1
+        assert flights.stats().coalesced == 0
+
+    async def test_follower_cancellation_does_not_cancel_the_call(self):
+        flights: SingleFlight[str, int] = SingleFlight()
+        release = asyncio.Event()
+
+        async def function() -> int:
+            await release.wait()
+            return 1
+
+        leader = asyncio.create_task(flights.do("a", function))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("a", function))
+        await asyncio.sleep(0)
+        follower.cancel()
+        release.set()
+
+        assert await leader == 1
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+
+    async def test_leader_cancellation_does_not_cancel_the_call(self):
+        flights: SingleFlight[str, int] = SingleFlight()
+        release = asyncio.Event()
+
+        async def function() -> int:
+            await release.wait()
+            return 1
+
+        leader = asyncio.create_task(flights.do("a", function))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("a", function))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await follower == 1
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert flights.stats() == SingleFlightStats(calls=2, coalesced=1, in_flight=0)
+
+    async def test_call_completes_when_every_caller_is_cancelled(self):
+        flights: SingleFlight[str, int] = SingleFlight()
+        release = asyncio.Event()
+        completed = asyncio.Event()
+
+        async def function() -> int:
+            await release.wait()
+            completed.set()
+            raise ValueError("boom")
+
+        leader = asyncio.create_task(flights.do("a", function))
+        await asyncio.sleep(0)
+        leader.cancel()
+        release.set()
+
+        await asyncio.wait_for(completed.wait(), timeout=1)
+        await asyncio.sleep(0)
+        assert flights.stats().in_flight == 0
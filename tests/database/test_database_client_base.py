@@ -1,10 +1,13 @@
-from unittest.mock import patch
+import dataclasses
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 
 import pytest
 from pymongo.errors import ConnectionFailure
 
+from recommendation_engine import settings as settings_module
 from recommendation_engine.app.core.database.mongo_database import MongoDatabase, MongoDatabaseInitDBException
-from recommendation_engine.settings import Settings
+from recommendation_engine.app.recommendation.repository import RecommendationRepository
+from recommendation_engine.settings import Settings, SettingsLoadException
 
 
 @pytest.mark.asyncio
@@ -36,3 +39,61 @@ class TestIntegrationMongoDatabase:
             pytest.raises(MongoDatabaseInitDBException),
         ):
             await self.db.ping()
+
+
+@pytest.mark.unit
+class TestUnitMongoDatabaseCompression:
+    async def test_init_db_creates_collections_with_the_block_compressor(self):
+        settings = dataclasses.replace(Settings.build_settings(), db_mongo_block_compressor="zstd")
+        database = MongoDatabase(settings=settings)
+        db = MagicMock()
+        db.create_collection = AsyncMock()
+        db.__getitem__.return_value.create_index = AsyncMock()
+
+        with (
+            patch.object(MongoDatabase, "ping", AsyncMock(return_value=True)),
+            patch.object(MongoDatabase, "db", new_callable=PropertyMock, return_value=db),
+        ):
+            await database.init_db((RecommendationRepository,))
+
+        kwargs = db.create_collection.await_args.kwargs
+        assert kwargs["storageEngine"] == {"wiredTiger": {"configString": "block_compressor=zstd"}}
+        await database.close()
+
+    async def test_init_db_keeps_the_server_default_block_compressor(self):
+        settings = dataclasses.replace(Settings.build_settings(), db_mongo_block_compressor="")
+        database = MongoDatabase(settings=settings)
+        db = MagicMock()
+        db.create_collection = AsyncMock()
+        db.__getitem__.return_value.create_index = AsyncMock()
+
+        with (
+            patch.object(MongoDatabase, "ping", AsyncMock(return_value=True)),
+            patch.object(MongoDatabase, "db", new_callable=PropertyMock, return_value=db),
+        ):
+            await database.init_db((RecommendationRepository,))
+
+        assert "storageEngine" not in db.create_collection.await_args.kwargs
+        await database.close()
+
+    @pytest.mark.parametrize(
+        ("variable", "value"),
+        [("DB_MONGO_COMPRESSORS", "zstd,lz4"), ("DB_MONGO_BLOCK_COMPRESSOR", "lz4")],
+    )
+    def test_invalid_compressor(self, monkeypatch, variable, value):
+        monkeypatch.setenv(variable, value)
+
+        with pytest.raises(SettingsLoadException):
+            Settings.build_settings()
+
+    def test_compressors_are_read_in_order(self, monkeypatch):
+        monkeypatch.setenv("DB_MONGO_COMPRESSORS", "zstd, zlib")
+
+        assert Settings.build_settings().db_mongo_compressors == ("zstd", "zlib")
+
+    def test_compressor_without_its_package_is_rejected(self, monkeypatch):
+        monkeypatch.setenv("DB_MONGO_COMPRESSORS", "snappy,zlib")
+        monkeypatch.setattr(settings_module, "find_spec", lambda name: None if name == "snappy" else object())
+
+        with pytest.raises(SettingsLoadException, match="snappy"):
+            Settings.build_settings()
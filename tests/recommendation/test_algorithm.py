@@ -1,9 +1,20 @@
+import numpy as np
 import pytest
 
 from recommendation_engine.app.recommendation.algorithm import (
+    add_product_to_recommendation_subsequences,
+    count_recommendation_subsequences,
+    format_product_ids_fingerprint,
     generate_product_ids_fingerprint,
     generate_recommendation_subsequences,
+    generate_recommendation_subsequences_compact,
+    generate_subsequences_with_engine,
+    iter_recommendation_subsequences,
+    iter_recommendation_subsequences_from,
+    remove_product_from_recommendation_subsequences,
+    unrank_recommendation_subsequence,
 )
+from recommendation_engine.app.recommendation.types import CompactSubSequences, FingerprintScheme, RecommendationEngine
 from tests.data.recommendation_sequences_samples import RECOMMENDATIONS_SEQUENCES_SAMPLES
 
 
@@ -77,8 +88,162 @@ class TestUnitRecommendationAlgorithms:
         assert unique_ordered_product_ids == []
         assert recommendations == []
 
+    @pytest.mark.parametrize("input_ids, expected", RECOMMENDATIONS_SEQUENCES_SAMPLES)
+    def test_iter_recommendation_subsequences(self, input_ids: tuple[int, ...], expected: list[list[int]]):
+        subsequences = iter_recommendation_subsequences(sorted(input_ids))
+
+        assert not isinstance(subsequences, list)
+        assert list(subsequences) == expected
+
+    def test_iter_recommendation_subsequences_empty(self):
+        assert list(iter_recommendation_subsequences([])) == []
+
+    @pytest.mark.parametrize("input_ids, expected", RECOMMENDATIONS_SEQUENCES_SAMPLES)
+    def test_unrank_recommendation_subsequence(self, input_ids: tuple[int, ...], expected: list[list[int]]):
+        sequence = sorted(input_ids)
+
+        assert count_recommendation_subsequences(len(sequence)) == len(expected)
+        assert [unrank_recommendation_subsequence(sequence, rank) for rank in range(len(expected))] == expected
+
+    @pytest.mark.parametrize("rank", [-1, 7, 100])
+    def test_unrank_recommendation_subsequence_out_of_range(self, rank: int):
+        with pytest.raises(IndexError):
+            unrank_recommendation_subsequence([1, 2, 3], rank)
+
+    @pytest.mark.parametrize("input_ids, expected", RECOMMENDATIONS_SEQUENCES_SAMPLES)
+    def test_iter_recommendation_subsequences_from(self, input_ids: tuple[int, ...], expected: list[list[int]]):
+        sequence = sorted(input_ids)
+
+        for rank in range(len(expected) + 1):
+            assert list(iter_recommendation_subsequences_from(sequence, rank)) == expected[rank:]
+
+    @pytest.mark.parametrize(
+        "count, sequence_length, expected",
+        [(0, None, 0), (3, None, 7), (20, None, 1_048_575), (5, 2, 10), (5, 5, 1), (5, 6, 0), (5, 0, 0)],
+    )
+    def test_count_recommendation_subsequences(self, count: int, sequence_length: int | None, expected: int):
+        assert count_recommendation_subsequences(count, sequence_length) == expected
+
     def test_generate_product_ids_fingerprint(self):
         product_ids = [1, 2, 3]
         fingerprint = generate_product_ids_fingerprint(product_ids)
 
         assert fingerprint == "9ef50cc82ae474279fb8e82896142702bccbb33a"
+
+    def test_generate_product_ids_fingerprint_v2(self):
+        fingerprint = generate_product_ids_fingerprint([1, 2, 3], FingerprintScheme.V2)
+
+        assert isinstance(fingerprint, bytes)
+        assert len(fingerprint) == 16
+        assert fingerprint.hex() == "abccad42d03c940bc2b249bf5a4e1e3d"
+
+    @pytest.mark.parametrize("other", [[1, 2], [1, 2, 4], [2**32 + 1, 2, 3], [-1, 2, 3]])
+    def test_generate_product_ids_fingerprint_v2_is_unique(self, other: list[int]):
+        fingerprint = generate_product_ids_fingerprint([1, 2, 3], FingerprintScheme.V2)
+
+        assert generate_product_ids_fingerprint(other, FingerprintScheme.V2) != fingerprint
+
+    def test_format_product_ids_fingerprint(self):
+        assert format_product_ids_fingerprint(b"\x01\xab") == "01ab"
+        assert format_product_ids_fingerprint("9ef50c") == "9ef50c"
+
+    @pytest.mark.parametrize("product_id", [0, 3, 5, 9, 12])
+    def test_add_product_to_recommendation_subsequences(self, product_id: int):
+        product_ids = [1, 4, 6, 8, 10]
+        _, subsequences = generate_recommendation_subsequences(product_ids)
+
+        new_product_ids, new_subsequences = add_product_to_recommendation_subsequences(
+            product_ids, subsequences, product_id
+        )
+
+        assert new_product_ids == sorted([*product_ids, product_id])
+        assert new_subsequences == generate_recommendation_subsequences(new_product_ids)[1]
+
+    def test_add_product_to_empty_recommendation_subsequences(self):
+        assert add_product_to_recommendation_subsequences([], [], 7) == ([7], [[7]])
+
+    def test_add_existing_product_to_recommendation_subsequences(self):
+        _, subsequences = generate_recommendation_subsequences([1, 2])
+
+        assert add_product_to_recommendation_subsequences([1, 2], subsequences, 2) == ([1, 2], subsequences)
+
+    @pytest.mark.parametrize("product_id", [1, 6, 10, 7])
+    def test_remove_product_from_recommendation_subsequences(self, product_id: int):
+        product_ids = [1, 4, 6, 8, 10]
+        _, subsequences = generate_recommendation_subsequences(product_ids)
+
+        new_product_ids, new_subsequences = remove_product_from_recommendation_subsequences(
+            product_ids, subsequences, product_id
+        )
+
+        assert new_product_ids == [current for current in product_ids if current != product_id]
+        assert new_subsequences == generate_recommendation_subsequences(new_product_ids)[1]
+
+
+@pytest.mark.unit
+class TestUnitCompactRecommendationAlgorithm:
+    @pytest.mark.parametrize("input_ids, expected", RECOMMENDATIONS_SEQUENCES_SAMPLES)
+    def test_generate_recommendation_subsequences_compact(self, input_ids: tuple[int, ...], expected: list[list[int]]):
+        _, subsequences = generate_recommendation_subsequences_compact(input_ids)
+
+        assert isinstance(subsequences, CompactSubSequences)
+        assert len(subsequences) == len(expected)
+        assert subsequences.tolist() == expected
+
+    @pytest.mark.parametrize("count", [6, 10, 12])
+    def test_matches_python_engine(self, count: int):
+        product_ids = [(index * 7919) % 10007 for index in range(count)]
+
+        ordered_python, expected = generate_recommendation_subsequences(product_ids)
+        ordered_compact, subsequences = generate_recommendation_subsequences_compact(product_ids)
+
+        assert ordered_compact == ordered_python
+        assert subsequences.tolist() == expected
+        assert subsequences.offsets[-1] == count * 2 ** (count - 1)
+
+    def test_unsorted_and_repeated_values(self):
+        unique_ordered_product_ids, subsequences = generate_recommendation_subsequences_compact((3, 1, 2, 3, 1))
+
+        assert unique_ordered_product_ids == [1, 2, 3]
+        assert subsequences.values.tolist() == [1, 2, 3, 1, 2, 1, 3, 2, 3, 1, 2, 3]
+        assert subsequences.offsets.tolist() == [0, 1, 2, 3, 5, 7, 9, 12]
+
+    def test_empty(self):
+        unique_ordered_product_ids, subsequences = generate_recommendation_subsequences_compact([])
+
+        assert unique_ordered_product_ids == []
+        assert len(subsequences) == 0
+        assert subsequences.tolist() == []
+
+    def test_values_dtype(self):
+        _, small_ids = generate_recommendation_subsequences_compact([1, 2])
+        _, large_ids = generate_recommendation_subsequences_compact([1, 2**40])
+
+        assert small_ids.values.dtype == np.int32
+        assert large_ids.values.dtype == np.int64
+        assert large_ids.tolist() == [[1], [2**40], [1, 2**40]]
+
+    def test_compact_subsequences_access(self):
+        _, subsequences = generate_recommendation_subsequences_compact([1, 2, 3])
+
+        assert subsequences[3] == [1, 2]
+        assert subsequences[-1] == [1, 2, 3]
+        assert list(subsequences) == subsequences.tolist()
+        assert list(subsequences.iter_chunks(3)) == [[[1], [2], [3]], [[1, 2], [1, 3], [2, 3]], [[1, 2, 3]]]
+        assert subsequences.nbytes == subsequences.values.nbytes + subsequences.offsets.nbytes
+        with pytest.raises(IndexError):
+            subsequences[7]
+
+    @pytest.mark.parametrize("index", [slice(0, 3), slice(2, 5), slice(-2, None), slice(5, 2), slice(None, 100)])
+    def test_compact_subsequences_slice(self, index: slice):
+        expected = [[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]]
+        _, subsequences = generate_recommendation_subsequences_compact([1, 2, 3])
+
+        assert subsequences[index] == expected[index]
+
+    @pytest.mark.parametrize("engine", list(RecommendationEngine))
+    def test_generate_subsequences_with_engine(self, engine: RecommendationEngine):
+        unique_ordered_product_ids, subsequences = generate_subsequences_with_engine([2, 1], engine)
+
+        assert unique_ordered_product_ids == [1, 2]
+        assert list(subsequences) == [[1], [2], [1, 2]]
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId
+
+from recommendation_engine.app.recommendation.algorithm import (
+    generate_recommendation_subsequences,
+    generate_recommendation_subsequences_compact,
+)
+from recommendation_engine.app.recommendation.chunks import (
+    RecommendationChunksRepository,
+    split_subsequences_in_chunks,
+)
+
+
+@pytest.mark.unit
+class TestUnitSplitSubsequencesInChunks:
+    def test_chunks_hold_subsequences_of_a_single_length(self):
+        subsequences = [[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]]
+
+        chunks = list(split_subsequences_in_chunks(3, subsequences, 2))
+
+        assert chunks == [
+            (1, 0, [[1], [2]]),
+            (1, 1, [[3]]),
+            (2, 0, [[1, 2], [1, 3]]),
+            (2, 1, [[2, 3]]),
+            (3, 0, [[1, 2, 3]]),
+        ]
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 100, 10_000])
+    def test_chunks_reassemble_the_subsequences(self, chunk_size):
+        _, subsequences = generate_recommendation_subsequences(list(range(1, 11)))
+        subsequences = [list(subsequence) for subsequence in subsequences]
+
+        chunks = list(split_subsequences_in_chunks(10, subsequences, chunk_size))
+
+        assert [subsequence for _, _, chunk in chunks for subsequence in chunk] == subsequences
+        assert all(0 < len(chunk) <= chunk_size for _, _, chunk in chunks)
+        assert all(len(subsequence) == length for length, _, chunk in chunks for subsequence in chunk)
+
+    def test_chunks_of_a_compact_layout(self):
+        _, subsequences = generate_recommendation_subsequences_compact([1, 2, 3])
+
+        chunks = list(split_subsequences_in_chunks(3, subsequences, 2))
+
+        assert chunks == list(split_subsequences_in_chunks(3, subsequences.tolist(), 2))
+
+
+@pytest.mark.unit
+class TestUnitRecommendationChunksRepository:
+    async def test_insert_writes_bounded_batches(self, monkeypatch):
+        collection = MagicMock()
+        collection.insert_many = AsyncMock()
+        repository = RecommendationChunksRepository(
+            SimpleNamespace(db={RecommendationChunksRepository.COLLECTION_NAME: collection})
+        )
+        monkeypatch.setattr(RecommendationChunksRepository, "INSERT_BATCH_SUBSEQUENCES", 4)
+        chunks_id = ObjectId()
+        _, subsequences = generate_recommendation_subsequences_compact(list(range(1, 11)))
+
+        await repository.insert([(chunks_id, 10, subsequences)], chunk_size=2)
+
+        batches = [call.args[0] for call in collection.insert_many.await_args_list]
+        assert all(len(batch) <= 2 for batch in batches)
+        assert [subsequence for batch in batches for chunk in batch for subsequence in chunk["subsequences"]] == (
+            subsequences.tolist()
+        )
@@ -0,0 +1,51 @@
+import bson
+import pytest
+
+from recommendation_engine.app.recommendation.algorithm import generate_subsequences_with_engine
+from recommendation_engine.app.recommendation.encoding import (
+    bitmask_width,
+    decode_subsequences_bitmask,
+    encode_subsequences_bitmask,
+)
+from recommendation_engine.app.recommendation.types import RecommendationEngine
+
+
+@pytest.mark.unit
+class TestUnitSubsequencesBitmask:
+    @pytest.mark.parametrize(("product_count", "width"), [(1, 1), (8, 1), (9, 2), (16, 2), (17, 3), (64, 8)])
+    def test_bitmask_width(self, product_count, width):
+        assert bitmask_width(product_count) == width
+
+    @pytest.mark.parametrize("product_count", [1, 2, 8, 9, 12])
+    @pytest.mark.parametrize("engine", list(RecommendationEngine))
+    def test_round_trip(self, product_count, engine):
+        product_ids, subsequences = generate_subsequences_with_engine(
+            [product_id * 7 for product_id in range(product_count)], engine
+        )
+        expected = subsequences if isinstance(subsequences, list) else subsequences.tolist()
+
+        data = encode_subsequences_bitmask(product_ids, subsequences)
+
+        assert len(data) == len(expected) * bitmask_width(product_count)
+        assert decode_subsequences_bitmask(product_ids, data).tolist() == expected
+
+    def test_list_and_compact_subsequences_encode_the_same(self):
+        product_ids, subsequences = generate_subsequences_with_engine(list(range(10)), RecommendationEngine.NUMPY)
+        assert not isinstance(subsequences, list)
+
+        encoded = encode_subsequences_bitmask(product_ids, subsequences)
+
+        assert encode_subsequences_bitmask(product_ids, subsequences.tolist()) == encoded
+
+    def test_bson_is_several_times_smaller(self):
+        product_ids, subsequences = generate_subsequences_with_engine(list(range(1, 13)), RecommendationEngine.NUMPY)
+        assert not isinstance(subsequences, list)
+
+        array_size = len(bson.encode({"subsequences": subsequences.tolist()}))
+        bitmask_size = len(bson.encode({"subsequences": encode_subsequences_bitmask(product_ids, subsequences)}))
+
+        assert bitmask_size * 10 < array_size
+
+    def test_too_many_products(self):
+        with pytest.raises(ValueError):
+            encode_subsequences_bitmask(list(range(65)), [[1]])
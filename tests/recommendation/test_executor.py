@@ -0,0 +1,75 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from recommendation_engine.app.recommendation import executor as executor_module
+from recommendation_engine.app.recommendation.executor import SubsequencesExecutor, SubsequencesExecutorBusy
+from recommendation_engine.app.recommendation.types import CompactSubSequences, RecommendationEngine
+
+
+def _executor(**kwargs) -> SubsequencesExecutor:
+    options = dict(
+        engine=RecommendationEngine.PYTHON,
+        inline_max_products=3,
+        max_workers=1,
+        max_pending=1,
+        queue_timeout=0.05,
+    )
+    return SubsequencesExecutor(**(options | kwargs))
+
+
+@pytest.mark.unit
+class TestUnitSubsequencesExecutor:
+    async def test_small_baskets_are_generated_inline_with_the_engine(self):
+        executor = _executor()
+
+        unique_ordered_product_ids, subsequences = await executor.generate([2, 1, 2])
+
+        assert unique_ordered_product_ids == [1, 2]
+        assert subsequences == [[1], [2], [1, 2]]
+        assert executor._pool is None
+
+    async def test_large_baskets_are_generated_on_the_pool(self, monkeypatch):
+        executor = _executor()
+        monkeypatch.setattr(executor, "_get_pool", lambda: ThreadPoolExecutor(max_workers=1))
+
+        unique_ordered_product_ids, subsequences = await executor.generate([4, 3, 2, 1])
+
+        assert unique_ordered_product_ids == [1, 2, 3, 4]
+        assert isinstance(subsequences, CompactSubSequences)
+        assert len(subsequences) == 15
+        assert subsequences[-1] == [1, 2, 3, 4]
+
+    async def test_full_queue_rejects_with_busy(self, monkeypatch):
+        executor = _executor(max_pending=1, queue_timeout=0.01)
+        monkeypatch.setattr(executor, "_get_pool", lambda: ThreadPoolExecutor(max_workers=1))
+
+        def slow_generate(product_ids):
+            time.sleep(0.2)
+            return product_ids, None
+
+        monkeypatch.setattr(executor_module, "_generate_compact", slow_generate)
+
+        running = asyncio.create_task(executor.generate([1, 2, 3, 4]))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(SubsequencesExecutorBusy):
+            await executor.generate([5, 6, 7, 8])
+        assert (await running)[0] == [1, 2, 3, 4]
+
+        # Small baskets never wait for the pool
+        assert (await executor.generate([1]))[1] == [[1]]
+
+    async def test_process_pool_returns_compact_buffer(self):
+        executor = _executor(inline_max_products=0)
+        try:
+            unique_ordered_product_ids, subsequences = await executor.generate([3, 1, 2])
+        finally:
+            executor.shutdown()
+
+        assert unique_ordered_product_ids == [1, 2, 3]
+        assert isinstance(subsequences, CompactSubSequences)
+        assert subsequences.tolist() == [[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]]
+        assert executor._pool is None
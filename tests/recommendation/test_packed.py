@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+
+from recommendation_engine.app.recommendation.algorithm import generate_recommendation_subsequences
+from recommendation_engine.app.recommendation.models import RecommendationModel, RecommendationSummaryModel
+from recommendation_engine.app.recommendation.packed import (
+    PackedFormatException,
+    PackedLayout,
+    pack_recommendation,
+    pack_recommendations,
+    unpack_recommendations,
+)
+
+
+@pytest.mark.unit
+class TestUnitPackedRecommendations:
+    @pytest.fixture
+    def document(self) -> RecommendationModel:
+        sequence, subsequences = generate_recommendation_subsequences([30, 10, 2**40, 20])
+        return RecommendationModel(
+            _id=str(ObjectId()),
+            fingerprint=b"\x01\xab",
+            sequence=sequence,
+            subsequences=subsequences,
+            createdAt=datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc),
+        )
+
+    @pytest.mark.parametrize("layout", [PackedLayout.BITMASK, PackedLayout.OFFSETS])
+    def test_round_trip(self, document, layout):
+        data = pack_recommendation(document, layout)
+        (record,) = unpack_recommendations(data)
+
+        assert len(data) % 8 == 0
+        assert data[5] == layout
+        assert record.id == document.id
+        assert record.fingerprint == "01ab"
+        assert record.sequence == document.sequence
+        assert record.createdAt == document.createdAt
+        assert record.subsequences is not None
+        assert record.subsequences.tolist() == document.subsequences
+
+    def test_bitmask_is_smaller_than_offsets(self, document):
+        assert len(pack_recommendation(document, PackedLayout.BITMASK)) < len(
+            pack_recommendation(document, PackedLayout.OFFSETS)
+        )
+
+    def test_large_sequences_fall_back_to_offsets(self):
+        sequence = list(range(70))
+        document = RecommendationModel.model_construct(
+            fingerprint="abc", sequence=sequence, subsequences=[[0], [5, 69]], createdAt=datetime(2025, 1, 1)
+        )
+
+        data = pack_recommendation(document, PackedLayout.BITMASK)
+        (record,) = unpack_recommendations(data)
+
+        assert data[5] == PackedLayout.OFFSETS
+        assert record.id is None
+        assert record.subsequences is not None
+        assert record.subsequences.tolist() == [[0], [5, 69]]
+
+    def test_many_records_without_subsequences(self, document):
+        summary = RecommendationSummaryModel(
+            _id=str(ObjectId()), fingerprint="abc", sequence=[7], createdAt=datetime(2025, 1, 1)
+        )
+
+        records = unpack_recommendations(pack_recommendations([document, summary], PackedLayout.NONE))
+
+        assert [record.id for record in records] == [document.id, summary.id]
+        assert [record.subsequences for record in records] == [None, None]
+        assert records[1].sequence == [7]
+
+    @pytest.mark.parametrize("data", [b"RCMD", b"XXXX" + bytes(36), b"RCMD\x02" + bytes(35)])
+    def test_invalid_data_raises(self, data):
+        with pytest.raises(PackedFormatException):
+            unpack_recommendations(data)
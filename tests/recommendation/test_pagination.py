@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+
+from recommendation_engine.app.recommendation.pagination import PageCursor
+
+
+@pytest.mark.unit
+class TestUnitPageCursor:
+    def test_round_trip(self):
+        cursor = PageCursor(created_at=datetime(2025, 3, 4, 5, 6, 7, 891000, tzinfo=timezone.utc), id=ObjectId())
+
+        token = cursor.encode()
+
+        assert PageCursor.decode(token) == cursor
+        assert token.isascii() and "=" not in token
+
+    def test_naive_dates_are_utc(self):
+        # Dates read from MongoDB are naive UTC
+        object_id = ObjectId()
+        naive = PageCursor(created_at=datetime(2025, 3, 4, 5, 6, 7), id=object_id)
+
+        assert PageCursor.decode(naive.encode()).created_at == datetime(2025, 3, 4, 5, 6, 7, tzinfo=timezone.utc)
+
+    @pytest.mark.parametrize("token", ["", "abc", "not a cursor", "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA", "é"])
+    def test_invalid_token(self, token):
+        with pytest.raises(ValueError):
+            PageCursor.decode(token)
+
+    def test_query_continues_after_the_cursor_with_ties_broken_by_id(self):
+        created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        object_id = ObjectId()
+
+        assert PageCursor(created_at=created_at, id=object_id).query() == {
+            "$or": [
+                {"createdAt": {"$lt": created_at}},
+                {"createdAt": created_at, "_id": {"$lt": object_id}},
+            ]
+        }
@@ -0,0 +1,532 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from recommendation_engine.app.core.bloom import BloomFilter
+from recommendation_engine.app.recommendation import repository as repository_module
+from recommendation_engine.app.recommendation.algorithm import (
+    generate_product_ids_fingerprint,
+    generate_recommendation_subsequences,
+    generate_recommendation_subsequences_compact,
+)
+from recommendation_engine.app.recommendation.chunks import RecommendationChunksRepository
+from recommendation_engine.app.recommendation.models import GeneratedRecommendation, RecommendationModel
+from recommendation_engine.app.recommendation.pagination import PageCursor
+from recommendation_engine.app.recommendation.repository import (
+    SUMMARY_PROJECTION,
+    RecommendationDuplicate,
+    RecommendationRepository,
+    RecommendationRepositoryException,
+    RecommendationUpdateConflict,
+)
+from recommendation_engine.app.recommendation.types import (
+    FingerprintScheme,
+    RecommendationStorage,
+    SearchMatch,
+    SubsequencesEncoding,
+)
+
+
+@pytest.mark.unit
+class TestUnitRecommendationRepository:
+    @pytest.fixture
+    def collection(self):
+        collection = MagicMock()
+        collection.insert_one = AsyncMock(return_value=SimpleNamespace(inserted_id=ObjectId()))
+        collection.find_one = AsyncMock()
+        collection.find_one_and_update = AsyncMock(return_value={})
+        return collection
+
+    @pytest.fixture
+    def chunks_collection(self):
+        chunks_collection = MagicMock()
+        chunks_collection.insert_many = AsyncMock()
+        chunks_collection.delete_many = AsyncMock()
+        return chunks_collection
+
+    @pytest.fixture
+    def database_client(self, collection, chunks_collection):
+        return SimpleNamespace(
+            db={
+                RecommendationRepository.COLLECTION_NAME: collection,
+                RecommendationChunksRepository.COLLECTION_NAME: chunks_collection,
+            }
+        )
+
+    async def test_create_inline_persists_subsequences(self, database_client, collection):
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        document = await repository.create("fingerprint", [1, 2], [[1], [2], [1, 2]])
+        inserted = collection.insert_one.await_args.args[0]
+
+        assert inserted["subsequences"] == [[1], [2], [1, 2]]
+        assert inserted["storage"] == "inline"
+        assert document.subsequences == [[1], [2], [1, 2]]
+
+    @pytest.mark.parametrize("compact", [False, True])
+    async def test_create_does_not_validate_the_generated_subsequences(
+        self, database_client, collection, monkeypatch, compact
+    ):
+        product_ids, subsequences = (
+            generate_recommendation_subsequences_compact if compact else generate_recommendation_subsequences
+        )([3, 1, 2, 4])
+        fingerprint = generate_product_ids_fingerprint(product_ids, FingerprintScheme.V2)
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+        expected = RecommendationModel(
+            fingerprint=fingerprint,
+            sequence=product_ids,
+            subsequences=subsequences.tolist() if compact else subsequences,
+            createdAt=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        )
+
+        validate = MagicMock(side_effect=AssertionError("validated"))
+        monkeypatch.setattr(RecommendationModel, "__init__", validate)
+        document = await repository.create(fingerprint, product_ids, subsequences)
+        inserted = collection.insert_one.await_args.args[0]
+
+        expected.id = document.id
+        document.createdAt = expected.createdAt
+        assert document.model_dump_json(by_alias=True) == expected.model_dump_json(by_alias=True)
+        assert inserted["subsequences"] is document.subsequences
+        assert list(inserted) == ["fingerprint", "sequence", "createdAt", "storage", "subsequences"]
+
+    async def test_create_large_basket_is_inserted_already_encoded(self, database_client, collection):
+        repository = RecommendationRepository(
+            database_client, storage=RecommendationStorage.INLINE, inline_max_products=2
+        )
+        product_ids, subsequences = generate_recommendation_subsequences_compact([3, 1, 2])
+
+        document = await repository.create("fingerprint", product_ids, subsequences)
+        inserted = collection.insert_one.await_args.args[0]
+
+        assert isinstance(inserted, RawBSONDocument)
+        assert isinstance(inserted["_id"], ObjectId)
+        assert inserted["subsequences"] == document.subsequences == subsequences.tolist()
+
+    async def test_create_derived_persists_only_the_sequence(self, database_client, collection):
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.DERIVED)
+
+        document = await repository.create("fingerprint", [1, 2], [[1], [2], [1, 2]])
+        inserted = collection.insert_one.await_args.args[0]
+
+        assert "subsequences" not in inserted
+        assert inserted["sequence"] == [1, 2]
+        assert inserted["storage"] == "derived"
+        assert document.subsequences == [[1], [2], [1, 2]]
+
+    @pytest.mark.parametrize("storage", [None, "inline"])
+    async def test_get_inline_document(self, database_client, collection, storage):
+        _id = ObjectId()
+        collection.find_one.return_value = {
+            "_id": _id,
+            "fingerprint": "fingerprint",
+            "sequence": [1, 2],
+            "subsequences": [[1], [2], [1, 2]],
+            "createdAt": "2025-01-01T00:00:00",
+        } | ({"storage": storage} if storage else {})
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.DERIVED)
+
+        document = await repository.get(str(_id))
+
+        assert document.id == str(_id)
+        assert document.subsequences == [[1], [2], [1, 2]]
+
+    async def test_get_does_not_validate_the_stored_document(self, database_client, collection, monkeypatch):
+        _id = ObjectId()
+        collection.find_one.return_value = {
+            "_id": _id,
+            "fingerprint": b"\x01",
+            "sequence": [1, 2],
+            "subsequences": [[1], [2], [1, 2]],
+            "storage": "inline",
+            "createdAt": datetime(2025, 1, 1),
+        }
+        validate = MagicMock(side_effect=AssertionError("validated"))
+        monkeypatch.setattr(RecommendationModel, "__init__", validate)
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        document = await repository.get(str(_id))
+
+        assert document.id == str(_id)
+        assert document.model_dump_json(by_alias=True) == (
+            f'{{"_id":"{_id}","fingerprint":"01","sequence":[1,2],"subsequences":[[1],[2],[1,2]],'
+            '"createdAt":"2025-01-01T00:00:00"}'
+        )
+
+    async def test_get_derived_document_computes_subsequences(self, database_client, collection):
+        collection.find_one.return_value = {
+            "_id": ObjectId(),
+            "fingerprint": "fingerprint",
+            "sequence": [1, 2, 3],
+            "storage": "derived",
+            "createdAt": "2025-01-01T00:00:00",
+        }
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        document = await repository.get(str(ObjectId()))
+
+        assert document.subsequences == [[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]]
+
+    async def test_large_derived_subsequences_are_computed_on_a_thread(self, database_client, collection, monkeypatch):
+        threaded = []
+
+        async def to_thread(function, *args):
+            threaded.append(function)
+            return function(*args)
+
+        monkeypatch.setattr(repository_module.asyncio, "to_thread", to_thread)
+        collection.find_one.return_value = {
+            "_id": ObjectId(),
+            "fingerprint": "fingerprint",
+            "sequence": [1, 2, 3],
+            "storage": "derived",
+            "createdAt": "2025-01-01T00:00:00",
+        }
+        repository = RecommendationRepository(
+            database_client, storage=RecommendationStorage.INLINE, inline_max_products=2
+        )
+
+        document = await repository.get(str(ObjectId()))
+        await repository.update(str(ObjectId()), "old", "new", [1, 2, 3])
+        _, update = collection.find_one_and_update.await_args.args
+
+        assert threaded == [repository._to_model, list]
+        assert (
+            document.subsequences
+            == update["$set"]["subsequences"]
+            == [[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]]
+        )
+
+    async def test_update_is_conditional_on_the_current_fingerprint(self, database_client, collection):
+        _id = ObjectId()
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        await repository.update(str(_id), "old", "new", [1, 2])
+        query, update = collection.find_one_and_update.await_args.args
+
+        assert query == {"_id": _id, "fingerprint": "old"}
+        assert update["$set"]["subsequences"] == [[1], [2], [1, 2]]
+        assert update["$set"]["fingerprint"] == "new"
+
+    async def test_update_derived_unsets_subsequences(self, database_client, collection):
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.DERIVED)
+
+        await repository.update(str(ObjectId()), "old", "new", [1, 2], [[1], [2], [1, 2]])
+        _, update = collection.find_one_and_update.await_args.args
+
+        assert "subsequences" not in update["$set"]
+        assert update["$unset"] == {"subsequences": "", "chunksId": ""}
+
+    async def test_update_conflict(self, database_client, collection):
+        collection.find_one_and_update.return_value = None
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        with pytest.raises(RecommendationUpdateConflict):
+            await repository.update(str(ObjectId()), "old", "new", [1, 2])
+
+    async def test_create_bitmask_encodes_subsequences(self, database_client, collection):
+        repository = RecommendationRepository(
+            database_client, storage=RecommendationStorage.INLINE, encoding=SubsequencesEncoding.BITMASK
+        )
+
+        document = await repository.create("fingerprint", [1, 2], [[1], [2], [1, 2]])
+        inserted = collection.insert_one.await_args.args[0]
+
+        assert inserted["subsequences"] == b"\x01\x02\x03"
+        assert document.subsequences == [[1], [2], [1, 2]]
+
+    async def test_get_bitmask_document_decodes_subsequences(self, database_client, collection):
+        collection.find_one.return_value = {
+            "_id": ObjectId(),
+            "fingerprint": "fingerprint",
+            "sequence": [4, 5, 6],
+            "subsequences": b"\x01\x02\x04\x03\x05\x06\x07",
+            "storage": "inline",
+            "createdAt": "2025-01-01T00:00:00",
+        }
+        repository = RecommendationRepository(
+            database_client, storage=RecommendationStorage.INLINE, encoding=SubsequencesEncoding.ARRAY
+        )
+
+        document = await repository.get(str(ObjectId()))
+
+        assert document.subsequences == [[4], [5], [6], [4, 5], [4, 6], [5, 6], [4, 5, 6]]
+
+    async def test_update_bitmask_encodes_subsequences(self, database_client, collection):
+        repository = RecommendationRepository(
+            database_client, storage=RecommendationStorage.INLINE, encoding=SubsequencesEncoding.BITMASK
+        )
+
+        await repository.update(str(ObjectId()), "old", "new", [1, 2])
+        _, update = collection.find_one_and_update.await_args.args
+
+        assert update["$set"]["subsequences"] == b"\x01\x02\x03"
+
+    async def test_create_chunked_writes_the_chunks_before_the_document(
+        self, database_client, collection, chunks_collection
+    ):
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.CHUNKED, chunk_size=2)
+
+        document = await repository.create("fingerprint", [1, 2, 3], [[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]])
+        inserted = collection.insert_one.await_args.args[0]
+        chunks = chunks_collection.insert_many.await_args.args[0]
+
+        assert "subsequences" not in inserted
+        assert inserted["storage"] == "chunked"
+        assert inserted["chunksId"] == inserted["_id"]
+        assert [(chunk["length"], chunk["block"]) for chunk in chunks] == [(1, 0), (1, 1), (2, 0), (2, 1), (3, 0)]
+        assert {chunk["chunksId"] for chunk in chunks} == {inserted["_id"]}
+        assert document.subsequences == [[1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3]]
+
+    async def test_create_chunked_duplicate_deletes_the_chunks(self, database_client, collection, chunks_collection):
+        collection.insert_one.side_effect = DuplicateKeyError("E11000 duplicate key")
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.CHUNKED)
+
+        with pytest.raises(RecommendationDuplicate):
+            await repository.create("fingerprint", [1, 2], [[1], [2], [1, 2]])
+
+        inserted = collection.insert_one.await_args.args[0]
+        chunks_collection.delete_many.assert_awaited_once_with({"chunksId": {"$in": [inserted["chunksId"]]}})
+
+    async def test_get_chunked_document_assembles_the_chunks(self, database_client, collection, chunks_collection):
+        chunks_id = ObjectId()
+        collection.find_one.return_value = {
+            "_id": chunks_id,
+            "fingerprint": "fingerprint",
+            "sequence": [1, 2],
+            "storage": "chunked",
+            "chunksId": chunks_id,
+            "createdAt": "2025-01-01T00:00:00",
+        }
+        cursor = MagicMock()
+        cursor.sort = MagicMock(return_value=cursor)
+        cursor.__aiter__.return_value = [{"subsequences": [[1], [2]]}, {"subsequences": [[1, 2]]}]
+        chunks_collection.find = MagicMock(return_value=cursor)
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        document = await repository.get(str(chunks_id))
+
+        assert chunks_collection.find.call_args.args[0] == {"chunksId": chunks_id}
+        assert document.subsequences == [[1], [2], [1, 2]]
+
+    async def test_update_chunked_replaces_the_chunks(self, database_client, collection, chunks_collection):
+        previous_chunks_id = ObjectId()
+        collection.find_one_and_update.return_value = {"chunksId": previous_chunks_id}
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.CHUNKED)
+
+        await repository.update(str(ObjectId()), "old", "new", [1, 2])
+        _, update = collection.find_one_and_update.await_args.args
+        chunks = chunks_collection.insert_many.await_args.args[0]
+
+        assert update["$unset"] == {"subsequences": ""}
+        assert {chunk["chunksId"] for chunk in chunks} == {update["$set"]["chunksId"]}
+        assert update["$set"]["chunksId"] != previous_chunks_id
+        chunks_collection.delete_many.assert_awaited_once_with({"chunksId": {"$in": [previous_chunks_id]}})
+
+    async def test_update_chunked_conflict_deletes_the_new_chunks(self, database_client, collection, chunks_collection):
+        collection.find_one_and_update.return_value = None
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.CHUNKED)
+
+        with pytest.raises(RecommendationUpdateConflict):
+            await repository.update(str(ObjectId()), "old", "new", [1, 2])
+
+        _, update = collection.find_one_and_update.await_args.args
+        chunks_collection.delete_many.assert_awaited_once_with({"chunksId": {"$in": [update["$set"]["chunksId"]]}})
+
+    async def test_paginate_summaries_does_not_fetch_subsequences(self, database_client, collection):
+        cursor = MagicMock()
+        cursor.sort = MagicMock(return_value=cursor)
+        cursor.limit = MagicMock(return_value=cursor)
+        cursor.to_list = AsyncMock(
+            return_value=[
+                {"_id": ObjectId(), "fingerprint": "f", "sequence": [1, 2], "createdAt": "2025-01-01T00:00:00"}
+            ]
+        )
+        collection.find = MagicMock(return_value=cursor)
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        summaries = await repository.paginate_summaries(limit=10)
+
+        assert collection.find.call_args.args[0] == {}
+        assert collection.find.call_args.kwargs["projection"] == {"fingerprint": 1, "sequence": 1, "createdAt": 1}
+        cursor.limit.assert_called_once_with(10)
+        assert summaries[0].sequence == [1, 2]
+
+    async def test_export_streams_oldest_first_from_a_batched_cursor(self, database_client, collection):
+        since = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        cursor = MagicMock()
+        cursor.sort = MagicMock(return_value=cursor)
+        cursor.__aiter__.return_value = [
+            {"_id": ObjectId(), "fingerprint": "f", "sequence": [count], "createdAt": "2025-01-01T00:00:00"}
+            for count in range(1, 4)
+        ]
+        collection.find = MagicMock(return_value=cursor)
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        documents = [
+            document async for document in repository.export(since=since, with_subsequences=False, batch_size=500)
+        ]
+
+        assert collection.find.call_args.args[0] == {"createdAt": {"$gte": since}}
+        assert collection.find.call_args.kwargs == {"projection": SUMMARY_PROJECTION, "batch_size": 500}
+        cursor.sort.assert_called_once_with([("createdAt", 1), ("_id", 1)])
+        assert [document.sequence for document in documents] == [[1], [2], [3]]
+
+    async def test_paginate_after_cursor_is_a_range_query(self, database_client, collection):
+        cursor = MagicMock()
+        cursor.sort = MagicMock(return_value=cursor)
+        cursor.limit = MagicMock(return_value=cursor)
+        cursor.to_list = AsyncMock(return_value=[])
+        collection.find = MagicMock(return_value=cursor)
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+        after = PageCursor(created_at=datetime(2025, 1, 1, tzinfo=timezone.utc), id=ObjectId())
+
+        await repository.paginate(limit=5, after=after)
+
+        assert collection.find.call_args.args[0] == after.query()
+        cursor.sort.assert_called_once_with([("createdAt", -1), ("_id", -1)])
+
+    def test_listing_is_indexed_on_created_at_and_id(self):
+        assert {"key": [("createdAt", -1), ("_id", -1)], "unique": False} in RecommendationRepository.COLLECTION_INDEXES
+
+    async def test_get_binary_fingerprint_is_hex_encoded_in_json(self, database_client, collection):
+        collection.find_one.return_value = {
+            "_id": ObjectId(),
+            "fingerprint": b"\x01\xab",
+            "sequence": [1],
+            "subsequences": [[1]],
+            "createdAt": datetime(2025, 1, 1),
+        }
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        document = await repository.get(str(ObjectId()))
+
+        assert document.fingerprint == b"\x01\xab"
+        assert document.model_dump(mode="json")["fingerprint"] == "01ab"
+
+    async def test_create_many_reports_each_document(self, database_client, collection):
+        def insert_many(documents, ordered):
+            for document in documents:
+                document["_id"] = ObjectId()
+            raise BulkWriteError(
+                {
+                    "writeErrors": [
+                        {"index": 1, "code": 11000, "errmsg": "E11000 duplicate key"},
+                        {"index": 2, "code": 121, "errmsg": "Document failed validation"},
+                    ],
+                    "nInserted": 1,
+                }
+            )
+
+        collection.insert_many = AsyncMock(side_effect=insert_many)
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+        recommendations = [
+            GeneratedRecommendation(fingerprint=f"f{count}", sequence=[count], subsequences=[[count]])
+            for count in range(1, 4)
+        ]
+
+        created, duplicate, error = await repository.create_many(recommendations)
+
+        assert collection.insert_many.await_args.kwargs["ordered"] is False
+        assert created.id is not None
+        assert created.sequence == [1]
+        assert isinstance(duplicate, RecommendationDuplicate)
+        assert duplicate.fingerprint == "f2"
+        assert type(error) is RecommendationRepositoryException
+
+    async def test_create_many_empty(self, database_client, collection):
+        collection.insert_many = AsyncMock()
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        assert await repository.create_many([]) == []
+        collection.insert_many.assert_not_awaited()
+
+    async def test_find_existing_fingerprints_reads_only_the_index(self, database_client, collection):
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[{"fingerprint": "a"}])
+        collection.find = MagicMock(return_value=cursor)
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        assert await repository.find_existing_fingerprints(["a", "b"]) == {"a"}
+        assert collection.find.call_args.args[0] == {"fingerprint": {"$in": ["a", "b"]}}
+        assert collection.find.call_args.kwargs["projection"] == {"_id": 0, "fingerprint": 1}
+        assert await repository.exists("a") is True
+
+    async def test_fingerprint_filter_skips_lookup_of_new_fingerprints(self, database_client, collection):
+        cursor = MagicMock()
+        cursor.hint = MagicMock(return_value=cursor)
+        cursor.__aiter__.return_value = [{"fingerprint": "a"}, {"fingerprint": b"\x01"}]
+        cursor.to_list = AsyncMock(return_value=[{"fingerprint": "a"}])
+        collection.find = MagicMock(return_value=cursor)
+        repository = RecommendationRepository(
+            database_client,
+            storage=RecommendationStorage.INLINE,
+            fingerprint_filter=BloomFilter(capacity=100, error_rate=0.001),
+        )
+
+        await repository.load_fingerprint_filter()
+        assert repository.fingerprint_filter_loaded
+        assert len(repository.fingerprint_filter) == 2
+        collection.find.reset_mock()
+
+        assert await repository.exists("new") is False
+        collection.find.assert_not_called()
+
+        assert await repository.find_existing_fingerprints(["a", "new"]) == {"a"}
+        assert collection.find.call_args.args[0] == {"fingerprint": {"$in": ["a"]}}
+
+    async def test_fingerprint_filter_is_not_used_before_loaded(self, database_client, collection):
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[{"fingerprint": "a"}])
+        collection.find = MagicMock(return_value=cursor)
+        repository = RecommendationRepository(
+            database_client,
+            storage=RecommendationStorage.INLINE,
+            fingerprint_filter=BloomFilter(capacity=100, error_rate=0.001),
+        )
+
+        assert await repository.exists("a") is True
+
+    async def test_create_adds_to_fingerprint_filter(self, database_client, collection):
+        repository = RecommendationRepository(
+            database_client,
+            storage=RecommendationStorage.INLINE,
+            fingerprint_filter=BloomFilter(capacity=100, error_rate=0.001),
+        )
+
+        await repository.create("fingerprint", [1], [[1]])
+
+        assert "fingerprint" in repository.fingerprint_filter
+
+    @pytest.mark.parametrize("match, operator", [(SearchMatch.ALL, "$all"), (SearchMatch.ANY, "$in")])
+    async def test_search_by_contained_products(self, database_client, collection, match, operator):
+        after = PageCursor(created_at=datetime(2025, 1, 1, tzinfo=timezone.utc), id=ObjectId())
+        cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        cursor.limit.return_value = cursor
+        cursor.to_list = AsyncMock(
+            return_value=[
+                {"_id": ObjectId(), "fingerprint": "a", "sequence": [1, 2, 3], "createdAt": "2025-01-01T00:00:00"}
+            ]
+        )
+        collection.find = MagicMock(return_value=cursor)
+        repository = RecommendationRepository(database_client, storage=RecommendationStorage.INLINE)
+
+        documents = await repository.search([1, 2], match, limit=10, after=after)
+
+        assert collection.find.call_args.args[0] == {"sequence": {operator: [1, 2]}} | after.query()
+        assert collection.find.call_args.kwargs["projection"] == SUMMARY_PROJECTION
+        cursor.sort.assert_called_once_with([("createdAt", -1), ("_id", -1)])
+        cursor.limit.assert_called_once_with(10)
+        assert documents[0].sequence == [1, 2, 3]
+
+    def test_sequence_is_indexed_in_the_order_of_the_search(self):
+        assert {
+            "key": [("sequence", 1), ("createdAt", -1), ("_id", -1)],
+            "unique": False,
+        } in RecommendationRepository.COLLECTION_INDEXES
@@ -0,0 +1,43 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from recommendation_engine.app.recommendation.models import RecommendationSummaryModel
+from recommendation_engine.app.recommendation.repository import RecommendationRepositoryException
+from recommendation_engine.app.recommendation.serializer import NDJSON_ERROR_LINE, iter_recommendations_ndjson
+
+
+async def _documents(count: int, fail: bool = False):
+    for index in range(count):
+        yield RecommendationSummaryModel(
+            fingerprint=f"f{index}", sequence=[index], createdAt=datetime(2025, 1, 1, tzinfo=timezone.utc)
+        )
+    if fail:
+        raise RecommendationRepositoryException("cursor lost")
+
+
+async def _chunks(documents, batch_size: int, max_bytes: int) -> list[bytes]:
+    return [chunk async for chunk in iter_recommendations_ndjson(documents, batch_size, max_bytes)]
+
+
+@pytest.mark.unit
+class TestUnitIterRecommendationsNdjson:
+    async def test_chunks_are_bounded_by_count(self):
+        chunks = await _chunks(_documents(5), batch_size=2, max_bytes=1024**2)
+
+        assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+
+    async def test_chunks_are_bounded_by_bytes(self):
+        line = (await _chunks(_documents(1), batch_size=1, max_bytes=1))[0]
+        chunks = await _chunks(_documents(5), batch_size=10_000, max_bytes=2 * len(line))
+
+        assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+
+    async def test_repository_error_ends_with_an_error_line(self):
+        chunks = await _chunks(_documents(3, fail=True), batch_size=2, max_bytes=1024**2)
+        lines = b"".join(chunks).splitlines()
+
+        assert [json.loads(line)["fingerprint"] for line in lines[:-1]] == ["f0", "f1", "f2"]
+        assert lines[-1] + b"\n" == NDJSON_ERROR_LINE
+        assert "error" in json.loads(lines[-1])
@@ -0,0 +1,385 @@
+import asyncio
+import dataclasses
+from collections import Counter
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from recommendation_engine.app.cooccurrence.repository import CooccurrenceRepository, CooccurrenceRepositoryException
+from recommendation_engine.app.core.cache import ByteBudgetLRUCache
+from recommendation_engine.app.recommendation.algorithm import (
+    generate_product_ids_fingerprint,
+    generate_recommendation_subsequences,
+)
+from recommendation_engine.app.recommendation.executor import SubsequencesExecutor
+from recommendation_engine.app.recommendation.models import (
+    BatchCreateResult,
+    GeneratedRecommendation,
+    RecommendationModel,
+    RecommendationSummaryModel,
+)
+from recommendation_engine.app.recommendation.repository import (
+    RecommendationDuplicate,
+    RecommendationRepository,
+    RecommendationRepositoryException,
+)
+from recommendation_engine.app.recommendation.service import RecommendationSequenceEmpty, RecommendationService
+from recommendation_engine.app.recommendation.types import (
+    BatchItemStatus,
+    FingerprintScheme,
+    RecommendationEngine,
+    RecommendationStorage,
+)
+
+
+@pytest.mark.unit
+class TestUnitRecommendationService:
+    @pytest.fixture
+    def repository(self):
+        repository = Mock(spec=RecommendationRepository)
+        repository.create = AsyncMock(side_effect=lambda *args: args)
+        repository.update = AsyncMock()
+        repository.exists = AsyncMock(return_value=False)
+        repository.find_existing_fingerprints = AsyncMock(return_value=set())
+        repository.storage = RecommendationStorage.INLINE
+        return repository
+
+    @pytest.fixture
+    def executor(self):
+        executor = SubsequencesExecutor(
+            engine=RecommendationEngine.NUMPY,
+            inline_max_products=20,
+            max_workers=1,
+            max_pending=1,
+            queue_timeout=1,
+        )
+        executor.generate = AsyncMock(wraps=executor.generate)
+        return executor
+
+    @pytest.fixture
+    def cooccurrence_repository(self):
+        cooccurrence_repository = Mock(spec=CooccurrenceRepository)
+        cooccurrence_repository.increment = AsyncMock()
+        return cooccurrence_repository
+
+    @pytest.fixture
+    def service(self, repository, executor, cooccurrence_repository):
+        cache = ByteBudgetLRUCache(max_bytes=1024**2, sizeof=lambda generated: generated.nbytes)
+        return RecommendationService(
+            repository=repository,
+            executor=executor,
+            subsequences_cache=cache,
+            cooccurrence_repository=cooccurrence_repository,
+        )
+
+    async def test_generate_memoizes_by_fingerprint(self, service, executor):
+        first = await service.generate([3, 1, 2])
+        second = await service.generate([2, 3, 1, 1])
+
+        assert second is first
+        assert first.fingerprint == generate_product_ids_fingerprint([1, 2, 3], FingerprintScheme.V1)
+        assert first.sequence == [1, 2, 3]
+        assert executor.generate.await_count == 1
+
+        stats = service.subsequences_cache.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+        assert stats.nbytes == first.subsequences.nbytes
+
+    async def test_create_persists_generated_subsequences(self, service, repository):
+        document, generated = await service.create([2, 1])
+
+        assert document == (generated.fingerprint, [1, 2], generated.subsequences)
+        assert generated.subsequences.tolist() == [[1], [2], [1, 2]]
+
+    def test_generated_recommendation_nbytes_of_lists(self):
+        generated = GeneratedRecommendation(fingerprint="f", sequence=[1, 2], subsequences=[[1], [2], [1, 2]])
+
+        assert generated.nbytes > 0
+
+    async def test_update_derives_subsequences_from_stored_ones(self, service, repository):
+        repository.get = AsyncMock(
+            return_value=RecommendationModel(
+                _id="abc",
+                fingerprint=generate_product_ids_fingerprint([1, 2, 3]),
+                sequence=[1, 2, 3],
+                subsequences=generate_recommendation_subsequences([1, 2, 3])[1],
+                createdAt=datetime.now(timezone.utc),
+            )
+        )
+
+        document = await service.update("abc", add_product_ids=[5, 4], remove_product_ids=[2, 9])
+
+        assert document.sequence == [1, 3, 4, 5]
+        assert document.subsequences == generate_recommendation_subsequences([1, 3, 4, 5])[1]
+        assert document.fingerprint == generate_product_ids_fingerprint([1, 3, 4, 5], FingerprintScheme.V1)
+        repository.update.assert_awaited_once_with(
+            "abc",
+            generate_product_ids_fingerprint([1, 2, 3]),
+            document.fingerprint,
+            document.sequence,
+            document.subsequences,
+        )
+        assert document.fingerprint in service.subsequences_cache
+
+    async def test_update_large_basket_derives_subsequences_on_a_thread(self, service, repository, monkeypatch):
+        repository.get = AsyncMock(
+            return_value=RecommendationModel(
+                _id="abc",
+                fingerprint=generate_product_ids_fingerprint([1, 2, 3]),
+                sequence=[1, 2, 3],
+                subsequences=generate_recommendation_subsequences([1, 2, 3])[1],
+                createdAt=datetime.now(timezone.utc),
+            )
+        )
+        service.settings = dataclasses.replace(service.settings, app_executor_inline_max_products=3)
+        to_thread = AsyncMock(wraps=asyncio.to_thread)
+        monkeypatch.setattr(asyncio, "to_thread", to_thread)
+
+        document = await service.update("abc", add_product_ids=[4], remove_product_ids=[])
+
+        assert to_thread.await_args.args[0] == service._derive_subsequences
+        assert document.sequence == [1, 2, 3, 4]
+        assert document.subsequences == generate_recommendation_subsequences([1, 2, 3, 4])[1]
+
+    async def test_update_returns_the_document_without_validating_it(self, service, repository, monkeypatch):
+        repository.get = AsyncMock(
+            return_value=RecommendationModel(
+                _id="abc",
+                fingerprint=generate_product_ids_fingerprint([1]),
+                sequence=[1],
+                subsequences=[[1]],
+                createdAt=datetime.now(timezone.utc),
+            )
+        )
+        monkeypatch.setattr(RecommendationModel, "__init__", Mock(side_effect=AssertionError("validated")))
+
+        document = await service.update("abc", add_product_ids=[2], remove_product_ids=[])
+
+        assert document.id == "abc"
+        assert document.subsequences == [[1], [2], [1, 2]]
+
+    async def test_update_derived_storage_only_changes_sequence(self, service, repository):
+        repository.storage = RecommendationStorage.DERIVED
+        repository.get_summary = AsyncMock(
+            return_value=RecommendationSummaryModel(
+                _id="abc",
+                fingerprint=generate_product_ids_fingerprint([1, 2]),
+                sequence=[1, 2],
+                createdAt=datetime.now(timezone.utc),
+            )
+        )
+
+        document = await service.update("abc", add_product_ids=[3], remove_product_ids=[1])
+
+        assert document.sequence == [2, 3]
+        assert document.subsequences == [[2], [3], [2, 3]]
+        assert repository.update.await_args.args[4] is None
+
+    async def test_update_without_changes_does_not_write(self, service, repository):
+        repository.get = AsyncMock(
+            return_value=RecommendationModel(
+                _id="abc",
+                fingerprint=generate_product_ids_fingerprint([1, 2]),
+                sequence=[1, 2],
+                subsequences=[[1], [2], [1, 2]],
+                createdAt=datetime.now(timezone.utc),
+            )
+        )
+
+        document = await service.update("abc", add_product_ids=[2], remove_product_ids=[7])
+
+        assert document.sequence == [1, 2]
+        repository.update.assert_not_awaited()
+
+    async def test_update_not_found(self, service, repository):
+        repository.get = AsyncMock(return_value=None)
+
+        assert await service.update("abc", add_product_ids=[1], remove_product_ids=[]) is None
+
+    async def test_update_removing_every_product_raises(self, service, repository):
+        repository.get = AsyncMock(
+            return_value=RecommendationModel(
+                _id="abc",
+                fingerprint=generate_product_ids_fingerprint([1]),
+                sequence=[1],
+                subsequences=[[1]],
+                createdAt=datetime.now(timezone.utc),
+            )
+        )
+
+        with pytest.raises(RecommendationSequenceEmpty):
+            await service.update("abc", add_product_ids=[], remove_product_ids=[1])
+
+    async def test_create_many_dedupes_within_the_batch(self, service, repository, executor):
+        async def create_many(recommendations):
+            return [
+                RecommendationDuplicate("Document already exists.", fingerprint=recommendation.fingerprint)
+                if recommendation.sequence == [4]
+                else RecommendationModel(
+                    _id="abc",
+                    fingerprint=recommendation.fingerprint,
+                    sequence=recommendation.sequence,
+                    subsequences=recommendation.subsequences,
+                    createdAt=datetime.now(timezone.utc),
+                )
+                for recommendation in recommendations
+            ]
+
+        repository.create_many = AsyncMock(side_effect=create_many)
+
+        results = await service.create_many([[2, 1], [4], [1, 2, 2]])
+
+        assert [result.status for result in results] == [
+            BatchItemStatus.CREATED,
+            BatchItemStatus.DUPLICATE,
+            BatchItemStatus.DUPLICATE,
+        ]
+        assert results[0].document.subsequences == [[1], [2], [1, 2]]
+        assert results[2] == BatchCreateResult(
+            status=BatchItemStatus.DUPLICATE,
+            fingerprint=results[0].fingerprint,
+            sequence=[1, 2],
+            detail="Same products as basket 0 of the batch",
+        )
+        assert executor.generate.await_count == 2
+        assert len(repository.create_many.await_args.args[0]) == 2
+
+    async def test_create_existing_basket_is_not_generated(self, service, repository, executor):
+        repository.exists = AsyncMock(return_value=True)
+
+        with pytest.raises(RecommendationDuplicate) as error:
+            await service.create([2, 1])
+
+        assert error.value.product_ids == [1, 2]
+        assert error.value.document is None
+        executor.generate.assert_not_awaited()
+        repository.create.assert_not_awaited()
+
+    async def test_create_existing_basket_returns_existing_document(self, service, repository, executor):
+        existing = RecommendationModel(
+            _id="abc",
+            fingerprint=generate_product_ids_fingerprint([1, 2], FingerprintScheme.V1),
+            sequence=[1, 2],
+            subsequences=[[1], [2], [1, 2]],
+            createdAt=datetime.now(timezone.utc),
+        )
+        service.settings = dataclasses.replace(service.settings, app_create_return_existing=True)
+        repository.create = AsyncMock(side_effect=RecommendationDuplicate("Document already exists."))
+        repository.get_by_fingerprint = AsyncMock(return_value=existing)
+
+        # Created concurrently after the existence check, rejected by the unique index
+        with pytest.raises(RecommendationDuplicate) as error:
+            await service.create([2, 1])
+
+        assert error.value.document is existing
+        repository.get_by_fingerprint.assert_awaited_once_with(existing.fingerprint)
+
+    async def test_create_many_skips_existing_baskets(self, service, repository, executor):
+        existing = generate_product_ids_fingerprint([1, 2], FingerprintScheme.V1)
+        repository.find_existing_fingerprints = AsyncMock(return_value={existing})
+        repository.create_many = AsyncMock(return_value=[])
+
+        results = await service.create_many([[2, 1], [1, 2]])
+
+        assert [result.status for result in results] == [BatchItemStatus.DUPLICATE, BatchItemStatus.DUPLICATE]
+        executor.generate.assert_not_awaited()
+
+    @staticmethod
+    async def created_documents(recommendations):
+        return [
+            RecommendationModel(
+                _id="abc",
+                fingerprint=recommendation.fingerprint,
+                sequence=recommendation.sequence,
+                subsequences=recommendation.subsequences,
+                createdAt=datetime.now(timezone.utc),
+            )
+            for recommendation in recommendations
+        ]
+
+    async def test_create_many_reports_failed_generations_per_basket(self, service, repository):
+        generate = service.generate
+
+        async def failing_generate(sequence):
+            if sequence == [4]:
+                raise ValueError("boom")
+            return await generate(sequence)
+
+        service.generate = failing_generate
+        repository.create_many = AsyncMock(side_effect=self.created_documents)
+
+        results = await service.create_many([[2, 1], [4]])
+
+        assert [result.status for result in results] == [BatchItemStatus.CREATED, BatchItemStatus.ERROR]
+        assert results[1].detail == "Unexpected error, please try again later..."
+        assert len(repository.create_many.await_args.args[0]) == 1
+
+    async def test_create_many_inserts_in_bounded_slices(self, service, repository):
+        service.settings = dataclasses.replace(service.settings, app_batch_slice_max_subsequences=4)
+
+        async def create_many(recommendations):
+            if repository.create_many.await_count == 1:
+                raise RecommendationRepositoryException("PyMongoError while inserting documents")
+            return await self.created_documents(recommendations)
+
+        repository.create_many = AsyncMock(side_effect=create_many)
+
+        results = await service.create_many([[1, 2], [3], [4, 5]])
+
+        assert [
+            [recommendation.sequence for recommendation in call.args[0]]
+            for call in repository.create_many.await_args_list
+        ] == [
+            [[1, 2], [3]],
+            [[4, 5]],
+        ]
+        assert [result.status for result in results] == [
+            BatchItemStatus.ERROR,
+            BatchItemStatus.ERROR,
+            BatchItemStatus.CREATED,
+        ]
+        assert results[0].detail == "PyMongoError while inserting documents"
+
+    async def test_concurrent_creates_of_the_same_basket_are_coalesced(self, service, repository, executor):
+        async def create(*args):
+            await asyncio.sleep(0)
+            return args
+
+        repository.create = AsyncMock(side_effect=create)
+
+        results = await asyncio.gather(service.create([1, 2]), service.create([2, 1, 1]), service.create([3]))
+
+        assert results[0] is results[1]
+        assert repository.create.await_count == 2
+        assert executor.generate.await_count == 2
+        assert service.create_flights.stats().coalesced == 1
+
+    async def test_create_counts_cooccurrences(self, service, cooccurrence_repository):
+        await service.create([2, 1])
+
+        cooccurrence_repository.increment.assert_awaited_once_with(Counter({(1, 2): 1, (2, 1): 1}))
+
+    async def test_create_succeeds_when_cooccurrences_fail(self, service, cooccurrence_repository):
+        cooccurrence_repository.increment.side_effect = CooccurrenceRepositoryException("boom")
+
+        document, _ = await service.create([2, 1])
+
+        assert document[1] == [1, 2]
+
+    async def test_update_counts_cooccurrence_changes(self, service, repository, cooccurrence_repository):
+        repository.get = AsyncMock(
+            return_value=RecommendationModel(
+                _id="abc",
+                fingerprint=generate_product_ids_fingerprint([1, 2]),
+                sequence=[1, 2],
+                subsequences=[[1], [2], [1, 2]],
+                createdAt=datetime.now(timezone.utc),
+            )
+        )
+
+        await service.update("abc", add_product_ids=[3], remove_product_ids=[1])
+
+        cooccurrence_repository.increment.assert_awaited_once_with(
+            Counter({(2, 3): 1, (3, 2): 1, (1, 2): -1, (2, 1): -1})
+        )
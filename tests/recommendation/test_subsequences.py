@@ -0,0 +1,56 @@
+import pytest
+
+from recommendation_engine.app.recommendation.algorithm import generate_recommendation_subsequences
+from recommendation_engine.app.recommendation.subsequences import DerivedSubsequences
+from tests.data.recommendation_sequences_samples import RECOMMENDATIONS_SEQUENCES_SAMPLES
+
+
+@pytest.mark.unit
+class TestUnitDerivedSubsequences:
+    @pytest.mark.parametrize("input_ids, expected", RECOMMENDATIONS_SEQUENCES_SAMPLES)
+    def test_matches_generated_subsequences(self, input_ids: tuple[int, ...], expected: list[list[int]]):
+        subsequences = DerivedSubsequences(sorted(input_ids))
+
+        assert len(subsequences) == len(expected)
+        assert list(subsequences) == expected
+        assert [subsequences[index] for index in range(len(expected))] == expected
+
+    def test_negative_index(self):
+        subsequences = DerivedSubsequences([1, 2, 3])
+
+        assert subsequences[-1] == [1, 2, 3]
+        assert subsequences[-7] == [1]
+        with pytest.raises(IndexError):
+            subsequences[-8]
+
+    @pytest.mark.parametrize(
+        "index",
+        [slice(0, 3), slice(2, 9), slice(5, None), slice(None, None, 2), slice(-3, None), slice(10, 20), slice(4, 2)],
+    )
+    def test_slice(self, index: slice):
+        sequence = [3, 8, 13, 21, 34]
+        _, expected = generate_recommendation_subsequences(sequence)
+
+        assert DerivedSubsequences(sequence)[index] == expected[index]
+
+    def test_large_sequence_is_not_materialized(self):
+        subsequences = DerivedSubsequences(list(range(1, 61)))
+
+        assert len(subsequences) == 2**60 - 1
+        assert subsequences[-1] == list(range(1, 61))
+        assert subsequences[60:62] == [[1, 2], [1, 3]]
+
+    @pytest.mark.parametrize("sequence_length", [1, 2, 3, 4, 5, 6])
+    def test_sequence_length(self, sequence_length: int):
+        sequence = [3, 8, 13, 21, 34]
+        _, generated = generate_recommendation_subsequences(sequence)
+        expected = [subsequence for subsequence in generated if len(subsequence) == sequence_length]
+
+        subsequences = DerivedSubsequences(sequence, sequence_length=sequence_length)
+
+        assert len(subsequences) == len(expected)
+        assert list(subsequences) == expected
+        assert [subsequences[index] for index in range(len(expected))] == expected
+        assert subsequences[1:3] == expected[1:3]
+        with pytest.raises(IndexError):
+            subsequences[len(expected)]